@@ -1,6 +1,6 @@
 import logging
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, pipeline
-import torch
+
+from core.ai.models import seq2seq, text_generation
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -9,10 +9,7 @@ logger = logging.getLogger(__name__)
 MODEL_NAME = "google/flan-t5-base"
 MODEL_NAME_2 = "gpt2"
 
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_NAME)
-
-generator = pipeline("text-generation", model=MODEL_NAME_2)
+# Models are loaded on first use, and shared with anything else loading them in this process
 
 
 def cover_letter_generator_one(
@@ -42,7 +39,7 @@ def cover_letter_generator_one(
     )
 
     # Generate the cover letter text.
-    generated = generator(
+    generated = text_generation(MODEL_NAME_2)(
         prompt, truncation=True, max_new_tokens=max_length, num_return_sequences=1
     )
     # The generated text includes the prompt; you might want to process it further.
@@ -51,6 +48,7 @@ def cover_letter_generator_one(
 
 
 def truncate_text(text: str, max_tokens: int = 300) -> str:
+    tokenizer, _ = seq2seq(MODEL_NAME)
     tokens = tokenizer.encode(text, max_length=max_tokens, truncation=True)
     return tokenizer.decode(tokens, skip_special_tokens=True)
 
@@ -62,6 +60,9 @@ def cover_letter_generator(
     skills: str,
     experience: str,
 ) -> str:
+    # Imported here, so importing this module doesn't pay for torch
+    import torch
+
     try:
         # Truncate long inputs
         job_description = truncate_text(job_description)
@@ -84,6 +85,7 @@ def cover_letter_generator(
         """
         logger.info("Prompt: %s", prompt)  # Debug prompt
 
+        tokenizer, model = seq2seq(MODEL_NAME)
         inputs = tokenizer(prompt, return_tensors="pt", max_length=512, truncation=True)
         outputs = model.generate(
             inputs.input_ids,
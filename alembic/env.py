@@ -53,6 +53,20 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 
+def do_run_migrations(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        compare_type=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    # Migrations must run in a migration transaction so they are committed, and so
+    # autocommit_block() can step out of it for CREATE INDEX CONCURRENTLY.
+    with context.begin_transaction():
+        context.run_migrations()
+
+
 async def run_migrations_online():
     """
     Run migrations in 'online' mode.
@@ -65,15 +79,7 @@ async def run_migrations_online():
     connectable = engine
 
     async with connectable.connect() as connection:
-        await connection.run_sync(
-            lambda sync_conn: context.configure(
-                connection=sync_conn,
-                target_metadata=target_metadata,
-                compare_type=True,
-                dialect_opts={"paramstyle": "named"},
-            )
-        )
-        await connection.run_sync(lambda sync_conn: context.run_migrations())
+        await connection.run_sync(do_run_migrations)
 
 
 # def run_migrations_online() -> None:
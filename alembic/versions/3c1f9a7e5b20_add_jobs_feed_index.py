@@ -0,0 +1,39 @@
+"""Add jobs feed index
+
+Revision ID: 3c1f9a7e5b20
+Revises: 90da6f5582dd
+Create Date: 2026-10-18 10:12:41.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f9a7e5b20'
+down_revision: Union[str, None] = '90da6f5582dd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Backs the keyset-paginated job feed: (created_at, id) row comparisons
+    # ordered newest first are served by a backward scan of this index.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_jobs_created_at_id',
+            'jobs',
+            ['created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_jobs_created_at_id',
+            table_name='jobs',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,56 @@
+"""Add hot query indexes
+
+Revision ID: b7d2e4f81a63
+Revises: 3c1f9a7e5b20
+Create Date: 2026-10-18 11:02:17.538940
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e4f81a63'
+down_revision: Union[str, None] = '3c1f9a7e5b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns) for the predicates the bot handlers run on every update
+INDEXES = [
+    ('ix_users_telegram_id_role_id', 'users', ['telegram_id', 'role_id']),
+    ('ix_companies_user_id', 'companies', ['user_id']),
+    ('ix_jobs_user_id_created_at', 'jobs', ['user_id', 'created_at']),
+    ('ix_applications_job_id_created_at', 'applications', ['job_id', 'created_at']),
+    ('ix_applications_user_id_created_at', 'applications', ['user_id', 'created_at']),
+    ('ix_applications_job_id_user_id', 'applications', ['job_id', 'user_id']),
+    ('ix_saved_jobs_user_id_created_at', 'saved_jobs', ['user_id', 'created_at']),
+    ('ix_saved_jobs_job_id_user_id', 'saved_jobs', ['job_id', 'user_id']),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block. if_not_exists
+    # lets a re-run pick up where a failed build left off (drop any INVALID index first).
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
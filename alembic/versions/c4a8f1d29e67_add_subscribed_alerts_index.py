@@ -0,0 +1,41 @@
+"""Add subscribed alerts index
+
+Revision ID: c4a8f1d29e67
+Revises: e91a0c5d7f34
+Create Date: 2026-10-18 14:37:52.118406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a8f1d29e67'
+down_revision: Union[str, None] = 'e91a0c5d7f34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Backs the job alert fan-out: subscribed_alerts && <the job's alert keys>
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_subscribed_alerts',
+            'users',
+            ['subscribed_alerts'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_users_subscribed_alerts',
+            table_name='users',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
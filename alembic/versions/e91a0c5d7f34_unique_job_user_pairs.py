@@ -0,0 +1,89 @@
+"""Unique job/user pairs on applications and saved jobs
+
+Deletes duplicate applications and saved jobs first, keeping the earliest row of each pair.
+
+Revision ID: e91a0c5d7f34
+Revises: b7d2e4f81a63
+Create Date: 2026-10-18 11:48:09.771205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e91a0c5d7f34'
+down_revision: Union[str, None] = 'b7d2e4f81a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (unique index, index it supersedes, table)
+PAIRS = [
+    ('uq_applications_job_id_user_id', 'ix_applications_job_id_user_id', 'applications'),
+    ('uq_saved_jobs_job_id_user_id', 'ix_saved_jobs_job_id_user_id', 'saved_jobs'),
+]
+
+
+def index_is_valid(name: str) -> Union[bool, None]:
+    """Whether an index is valid, or None if it does not exist."""
+    return op.get_bind().execute(
+        sa.text(
+            "SELECT i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+        ),
+        {'name': name},
+    ).scalar()
+
+
+def upgrade() -> None:
+    # Double taps could insert the same pair twice before; keep the earliest row
+    for _, _, table in PAIRS:
+        op.execute(
+            f"DELETE FROM {table} a USING {table} b "
+            "WHERE a.job_id = b.job_id AND a.user_id = b.user_id AND a.id > b.id"
+        )
+
+    with op.get_context().autocommit_block():
+        for name, superseded, table in PAIRS:
+            # A failed concurrent build (e.g. a duplicate inserted after the DELETE) leaves an
+            # INVALID index behind that if_not_exists would skip; build it again
+            if index_is_valid(name) is False:
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+            op.create_index(
+                name,
+                table,
+                ['job_id', 'user_id'],
+                unique=True,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            if not index_is_valid(name):
+                raise RuntimeError(f"{name} is not valid, keeping {superseded}")
+            op.drop_index(
+                superseded,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, superseded, table in reversed(PAIRS):
+            op.create_index(
+                superseded,
+                table,
+                ['job_id', 'user_id'],
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
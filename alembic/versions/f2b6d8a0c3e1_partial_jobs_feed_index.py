@@ -0,0 +1,57 @@
+"""Partial jobs feed index over open jobs
+
+Revision ID: f2b6d8a0c3e1
+Revises: c4a8f1d29e67
+Create Date: 2026-10-18 16:05:27.530914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b6d8a0c3e1'
+down_revision: Union[str, None] = 'c4a8f1d29e67'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The feed only lists open jobs; the predicate matches its WHERE clause word for word so
+    # the planner can prove the index applies
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_jobs_open_created_at_id',
+            'jobs',
+            ['created_at', 'id'],
+            unique=False,
+            postgresql_where=sa.text("job_status IS DISTINCT FROM 'closed'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_jobs_created_at_id',
+            table_name='jobs',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_jobs_created_at_id',
+            'jobs',
+            ['created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_jobs_open_created_at_id',
+            table_name='jobs',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -4,6 +4,7 @@ from telegram import Update
 from telegram.ext import (
     filters,
     CommandHandler,
+    Application,
     ApplicationBuilder,
     CallbackQueryHandler,
     ContextTypes,
@@ -32,8 +33,14 @@ from applicants.handlers.application import (
     apply_job_handler,
 )
 from applicants.handlers.onboarding import onboarding_handler
+from core.ai.cover_letter import PRELOAD, cover_letters, drafts
+from core.database.session import pool_stats
+from core.telegram.persistence import RedisPersistence
+from core.telegram.rate_limiter import OutboundRateLimiter
+from core.telegram.update_processor import PerChatUpdateProcessor
+from core.telegram.webhook import create_webhook_app
 from utils.helpers import get_applicant, view_applicant_profile
-
+from utils.job_alerts import job_alerts
 
 # Logging
 logging.basicConfig(
@@ -45,12 +52,6 @@ logging.getLogger("httpx").setLevel(
 )  # avoid all GET and POST requests from being logged
 logger = logging.getLogger(__name__)
 
-# Constants
-CURRENT_JOB_INDEX = 0
-TOTAL_JOBS = 0
-CURRENT_APPLICATION_INDEX = 0
-TOTAL_APPLICATIONS = 0
-
 
 async def main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
@@ -66,7 +67,7 @@ async def main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
 
     choice = update.message.text.lower()
-    applicant = get_applicant(update, context)
+    applicant = await get_applicant(update, context)
 
     if not applicant:
         await start_command(update, context)
@@ -88,20 +89,27 @@ async def main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Please use the buttons below to navigate.")
 
 
-def main() -> None:
-    """
-    This is the main function of the Applicant Bot. It sets up the bot by adding
-    all the necessary handlers, and then starts the bot using the `run_polling`
-    method.
+async def post_init(application: Application) -> None:
+    await job_alerts.start(application)
+    if PRELOAD:
+        cover_letters.preload()
 
-    The bot will listen for incoming messages, commands, and callback queries.
-    It will respond accordingly to each of these, and will also send messages
-    and updates to the user as needed.
 
-    The bot will also log any errors that occur, and will attempt to restart
-    itself if an error occurs.
+async def post_shutdown(application: Application) -> None:
+    await job_alerts.stop(application)
+    # Stop the cover letter workers, they're started at startup or on the first draft
+    cover_letters.stop()
+    logger.info("Cover letter batching: %s", drafts.metrics())
+    logger.info("Database pool: %s", pool_stats())
 
-    The bot will run indefinitely until it is manually stopped.
+
+def build_application() -> Application:
+    """
+    Builds the Applicant Bot with all of its handlers, ready to be run by polling or behind
+    a webhook.
+
+    Returns:
+        Application: The bot, not initialized yet.
     """
 
     token = os.getenv("APPLICANT_BOT_TOKEN")
@@ -109,7 +117,22 @@ def main() -> None:
         logger.error("APPLICANT_BOT_TOKEN environment variable is not set.")
         raise ValueError("APPLICANT_BOT_TOKEN environment variable is not set.")
 
-    app = ApplicationBuilder().token(token).build()
+    # Conversation states and drafts live in Redis, so restarts and replicas don't lose them.
+    # Updates of different chats are handled concurrently, a chat's updates one at a time.
+    # Outgoing messages are throttled to Telegram's limits, replies first.
+    # Posted jobs are sent to matching alert subscribers in the background.
+    app = (
+        ApplicationBuilder()
+        .token(token)
+        .persistence(RedisPersistence("ptb:applicant:"))
+        .rate_limiter(OutboundRateLimiter())
+        .concurrent_updates(
+            PerChatUpdateProcessor(int(os.getenv("MAX_CONCURRENT_UPDATES", "64")))
+        )
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
     # * For DEBUG purposes ONLY
     # app.add_handler(MessageHandler(filters.ALL, capture_group_topics))
@@ -148,6 +171,27 @@ def main() -> None:
     app.add_handler(CommandHandler("saved_jobs", saved_jobs))
     app.add_handler(CommandHandler("my_applications", my_applications))
 
+    return app
+
+
+def main() -> None:
+    """
+    This is the main function of the Applicant Bot. It sets up the bot by adding
+    all the necessary handlers, and then starts the bot using the `run_polling`
+    method.
+
+    The bot will listen for incoming messages, commands, and callback queries.
+    It will respond accordingly to each of these, and will also send messages
+    and updates to the user as needed.
+
+    The bot will also log any errors that occur, and will attempt to restart
+    itself if an error occurs.
+
+    The bot will run indefinitely until it is manually stopped.
+    """
+
+    app = build_application()
+
     logger.info("Applicant Bot running...")
 
     try:
@@ -162,5 +206,32 @@ def main() -> None:
         logger.error("A general error occurred: %s", e)
 
 
+def webhook_app():
+    """
+    Serves the Applicant Bot behind a webhook instead of polling, e.g.:
+
+        uvicorn applicants.applicant:webhook_app --factory --workers 4
+
+    Set WEBHOOK_PARTITIONS when running more than one worker.
+
+    Returns:
+        FastAPI: The ASGI app.
+    """
+
+    secret_token = os.getenv("WEBHOOK_SECRET")
+    if not secret_token:
+        logger.error("WEBHOOK_SECRET environment variable is not set.")
+        raise ValueError("WEBHOOK_SECRET environment variable is not set.")
+
+    return create_webhook_app(
+        build_application(),
+        secret_token,
+        url_path=os.getenv("WEBHOOK_PATH", "/applicant"),
+        webhook_url=os.getenv("WEBHOOK_URL"),
+        partitions=int(os.getenv("WEBHOOK_PARTITIONS", "0")),
+        prefix="ptb:applicant:",
+    )
+
+
 if __name__ == "__main__":
     main()
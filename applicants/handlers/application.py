@@ -1,3 +1,4 @@
+import html
 import json
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (
@@ -16,33 +17,59 @@ from applicants.states.all import (
     CONFIRM_APPLY,
     CONFIRM_GENERATE,
 )
-from utils.constants import (
-    CURRENT_APPLICATION_INDEX,
-    TOTAL_APPLICATIONS,
+from core.ai.cover_letter import draft_cover_letters
+from core.ai.inference import InferenceTimeout
+from core.telegram.rate_limiter import PRIORITY_NOTIFICATION
+from modules.applicant.domain.entities import ApplicationCard
+from utils.db import execute_query_async
+from utils.helpers import (
+    get_applicant,
+    get_job,
+    get_job_cards,
+    get_telegram_id,
+)
+from utils.job_cards import MESSAGE_LIMIT, fit_text, render_job_card
+from utils.navigation import navigation, navigation_buttons
+
+# EXPLAINed by tests/test_query_plans.py
+APPLICATIONS_QUERY = (
+    "SELECT job_id, status FROM applications WHERE user_id = %s "
+    "ORDER BY created_at DESC LIMIT 50"
+)
+APPLICATION_EXISTS_QUERY = (
+    "SELECT 1 FROM applications WHERE job_id = %s AND user_id = %s LIMIT 1"
 )
-from utils.db import execute_query
-from utils.helpers import format_date, get_applicant, get_job, get_telegram_id
 
 
-async def my_applications(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def my_applications(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, index: int = 0
+):
     """
     Shows a list of jobs that the user has applied for.
 
     Args:
         update (Update): The Telegram update.
         context (ContextTypes.DEFAULT_TYPE): The context of the Telegram conversation.
+        index (int, optional): The position in the list to show. Defaults to 0.
     """
 
-    applicant = get_applicant(update, context)
+    applicant = await get_applicant(update, context)
 
     if not applicant:
         await start_command(update, context)
         return
 
-    applications = execute_query(
-        "SELECT j.*, a.* FROM applications a JOIN jobs j ON a.job_id = j.job_id WHERE a.user_id = %s ORDER BY a.created_at DESC LIMIT 50",
+    # Ids come from the database, the job cards themselves from the cache in one round trip
+    applied = await execute_query_async(
+        APPLICATIONS_QUERY,
         (applicant["user_id"],),
     )
+    cards = await get_job_cards([row["job_id"] for row in applied])
+    applications = [
+        ApplicationCard(**cards[row["job_id"]].as_dict(), status=row["status"])
+        for row in applied
+        if row["job_id"] in cards
+    ]
 
     if not applications:
         if update.callback_query:
@@ -53,56 +80,21 @@ async def my_applications(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("You haven't applied for any jobs yet.")
         return
 
-    application_list = [job for job in applications]
-    # global CURRENT_APPLICATION_INDEX
-    application = application_list[CURRENT_APPLICATION_INDEX]
-    global TOTAL_APPLICATIONS
-    TOTAL_APPLICATIONS = len(application_list)
-    # CURRENT_APPLICATION_INDEX = 0  # Reset index when starting
-
-    application_details = (
-        f"Job Title: <b>\t{application["job_title"]}</b> \n\n"
-        f"Job Type: <b>\t{application["job_site"]} - {application["job_type"]}</b> \n\n"
-        f"Work Location: <b>\t{application["job_city"]}, {application["job_country"]}</b> \n\n"
-        f"Applicants Needed: <b>\t{application["gender_preference"]}</b> \n\n"
-        f"Salary: <b>\t{application["salary_amount"]} {application["salary_currency"]}, {application["salary_type"]}</b> \n\n"
-        f"Deadline: <b>\t{format_date(application["job_deadline"])}</b> \n\n"
-        f"<b>Description</b>: \t{application["job_description"]} \n\n"
-        f"<b>Requirements</b>: \t{application["job_requirements"]} \n\n"
+    total = len(applications)
+    index = await navigation.set(update.effective_chat.id, "application", index, total)
+    application = applications[index]
+
+    application_details, _ = render_job_card(application, "application")
+    application_details += (
         f"<b>__________________</b>\n\n"
         # f"<b>Applied at</b>: \t{format_date(application["a.created_at"])} \n\n"
-        f"<b>Application Status</b>: \t{application["status"].upper()} \n\n"
+        f"<b>Application Status</b>: \t{application.status.upper()} \n\n"
     )
 
-    # keyboard = []
-    # if CURRENT_APPLICATION_INDEX > 0:
-    #     keyboard.append([InlineKeyboardButton("Previous", callback_data='job_previous')])
-    # if CURRENT_APPLICATION_INDEX < len(job_list) - 1:
-    #     keyboard.append([InlineKeyboardButton("Next", callback_data='job_next')])
-
     keyboard = []
-    if TOTAL_APPLICATIONS > 1:
-        if CURRENT_APPLICATION_INDEX > 0:
-            keyboard = [
-                [
-                    InlineKeyboardButton(
-                        "Previous", callback_data="application_previous"
-                    ),
-                    InlineKeyboardButton("Next", callback_data="application_next"),
-                ],
-            ]
-            if TOTAL_APPLICATIONS == CURRENT_APPLICATION_INDEX + 1:
-                keyboard = [
-                    [
-                        InlineKeyboardButton(
-                            "Previous", callback_data="application_previous"
-                        ),
-                    ],
-                ]
-        else:
-            keyboard = [
-                [InlineKeyboardButton("Next", callback_data="application_next")],
-            ]
+    navigation_row = navigation_buttons("application", index, total)
+    if navigation_row:
+        keyboard.append(navigation_row)
 
     if update.callback_query:
         await update.callback_query.edit_message_text(
@@ -127,20 +119,20 @@ async def next_application(update: Update, context: ContextTypes.DEFAULT_TYPE):
         update (Update): The Telegram update containing the callback query.
         context (ContextTypes.DEFAULT_TYPE): The context of the Telegram conversation.
 
-    Increments or decrements the global CURRENT_APPLICATION_INDEX based on the user's input
+    Moves the chat's stored position in the application list based on the user's input
     and calls the my_applications function to display the updated application list.
     """
 
-    global CURRENT_APPLICATION_INDEX
     query = update.callback_query
     await query.answer()
 
+    index = await navigation.get(update.effective_chat.id, "application")
     if query.data == "application_next":
-        CURRENT_APPLICATION_INDEX += 1
+        index += 1
     elif query.data == "application_previous":
-        CURRENT_APPLICATION_INDEX -= 1
+        index -= 1
 
-    await my_applications(update, context)
+    await my_applications(update, context, index)
 
 
 async def apply_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -166,15 +158,25 @@ async def apply_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     context.user_data["job_id"] = int(query.data.split("_")[-1])
-    applicant = get_applicant(update, context)
+    applicant = await get_applicant(update, context)
 
     if not applicant:
         await start_command(update, context)
         return
 
-    # checking duplicate
-    duplicate = execute_query(
-        "SELECT * FROM applications WHERE job_id = %s AND user_id = %s",
+    # Early exits so the user doesn't fill in the form for nothing, confirm_apply
+    # still guards against closed jobs and duplicates atomically
+    job = await get_job(context.user_data["job_id"])
+    if not job or job.job_status == "closed":
+        await context.bot.send_message(
+            chat_id=query.from_user.id,
+            text="This job is closed." if job else "Job not found.",
+            parse_mode="HTML",
+        )
+        return ConversationHandler.END
+
+    duplicate = await execute_query_async(
+        APPLICATION_EXISTS_QUERY,
         (context.user_data["job_id"], applicant["user_id"]),
     )
     if duplicate:
@@ -276,14 +278,40 @@ async def skip_cover_letter(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return NEW_CV
 
 
+def profile_text(value) -> str:
+    """
+    Returns a profile field as prompt text. Experience is stored as JSONB and skills may
+    come back as a list, but the prompt and the drafts' cache key are built from strings.
+
+    Args:
+        value: The field's value.
+
+    Returns:
+        str: The text, empty if the field is not set.
+    """
+
+    if not value:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return ", ".join(profile_text(item) for item in value)
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+
+
 async def generate_cover_letter(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Generates a draft of a cover letter using AI and presents it to the user.
 
     This function retrieves job and company information from the database
-    based on the job ID stored in the user's context data. It then uses
-    predefined skills and experience to generate a draft cover letter. The user
-    is presented with options to accept, decline, write, or regenerate the cover letter.
+    based on the job ID stored in the user's context data. It then shows a draft
+    cover letter for the applicant's skills and experience, written in the inference
+    worker processes. The user is presented with options to accept, decline, write,
+    or regenerate the cover letter.
+
+    Drafts are cached per job and applicant profile, several at a time: "Regenerate"
+    shows the next cached draft, and only writes new ones once the user saw them all.
+    While new drafts are written, the message is edited with the text so far.
 
     Args:
         update (Update): The update object containing the user's interaction data.
@@ -295,22 +323,83 @@ async def generate_cover_letter(update: Update, context: ContextTypes.DEFAULT_TY
         options for further actions.
     """
 
-    job = execute_query(
-        "SELECT j.*, c.* FROM jobs j JOIN companies c ON j.company_id = c.company_id WHERE job_id = %s",
+    query = update.callback_query
+    await query.answer()
+    applicant = await get_applicant(update, context)
+
+    if not applicant:
+        await start_command(update, context)
+        return
+
+    job = await execute_query_async(
+        "SELECT j.job_title, j.job_description, c.name FROM jobs j JOIN companies c ON j.company_id = c.company_id WHERE j.job_id = %s",
         (context.user_data["job_id"],),
     )
+    if not job:
+        await query.edit_message_text("Job not found.")
+        return
+
+    await query.edit_message_text(
+        "<i>✨ Writing your cover letter...</i>", parse_mode="HTML"
+    )
 
-    job_title = job["job_title"]
-    company_name = job["name"]
-    job_description = job["job_description"]
-    skills = "react, vue, node, mongodb, python, laravel, javascript, typescript"
-    experience = "4 years"
+    previous = context.user_data.get("cover_letter_drafts") or {}
+    shown = (
+        previous.get("shown", -1) + 1 if query.data == "regenerate_cover_letter" else 0
+    )
+    request = (
+        context.user_data["job_id"],
+        job[0]["job_title"],
+        job[0]["name"],
+        job[0]["job_description"],
+        profile_text(applicant["skills"]),
+        profile_text(applicant["experience"]),
+    )
 
-    # TODO: Generate cover letter with AI
-    letter = "Cover letter generated by AI"
-    # letter = cover_letter_generator_one(
-    #     job_title, company_name, job_description, skills, experience
-    # )
+    async def show_progress(text: str) -> None:
+        await query.edit_message_text(
+            f"<b>Writing your draft...</b> \n\n {html.escape(text)} ✍️",
+            parse_mode="HTML",
+        )
+
+    # Runs in the inference worker processes, the bot keeps serving other users meanwhile.
+    # A new draft is shown as it's written.
+    try:
+        key, candidates, generated = await draft_cover_letters(
+            *request, on_text=show_progress
+        )
+        if generated or key != previous.get("key"):
+            # New drafts, or the job or the profile changed since the last draft
+            shown = 0
+        if candidates and shown >= len(candidates):
+            # Seen every cached draft, write new ones
+            key, candidates, _ = await draft_cover_letters(
+                *request, refresh=True, on_text=show_progress
+            )
+            shown = 0
+        letter = candidates[shown] if shown < len(candidates) else None
+        context.user_data["cover_letter_drafts"] = {"key": key, "shown": shown}
+    except InferenceTimeout:
+        letter = None
+    except Exception as e:
+        print(f"Error in generate_cover_letter: {e}")
+        letter = None
+
+    if not letter:
+        keyboard = [
+            [
+                InlineKeyboardButton("Skip", callback_data="skip_cover_letter"),
+                InlineKeyboardButton(
+                    "✨ Try again", callback_data="generate_cover_letter"
+                ),
+            ]
+        ]
+        await query.edit_message_text(
+            "Sorry, we couldn't write your cover letter right now. Try again, or type your own \n\n<i>*enter less than 500 characters</i>",
+            reply_markup=InlineKeyboardMarkup(keyboard),
+            parse_mode="HTML",
+        )
+        return
 
     keyboard = [
         [
@@ -323,8 +412,8 @@ async def generate_cover_letter(update: Update, context: ContextTypes.DEFAULT_TY
         ],
     ]
 
-    await update.callback_query.edit_message_text(
-        f"<b>Here's your draft:</b> \n\n {letter}",
+    await query.edit_message_text(
+        f"<b>Here's your draft:</b> \n\n {html.escape(letter)}",
         reply_markup=InlineKeyboardMarkup(keyboard),
         parse_mode="HTML",
     )
@@ -473,6 +562,40 @@ async def skip_new_cv(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return PORTFOLIO
 
 
+def _application_summary(job_details: str, user_data: dict) -> str:
+    """
+    Renders the job card followed by the application the user is about to send, truncating
+    the cover letter and portfolio links so the message stays within MESSAGE_LIMIT.
+
+    Args:
+        job_details (str): The rendered job card.
+        user_data (dict): The conversation's user data holding the application.
+
+    Returns:
+        str: The message text, for parse_mode="HTML".
+    """
+
+    cover_letter = user_data["cover_letter"] or None
+    portfolio = user_data["portfolio"] or None
+    cv = "✅" if user_data["new_cv"] else None
+
+    def render(cover_letter_text: str, portfolio_text: str) -> str:
+        return (
+            f"{job_details}"
+            f"<b>__________________</b>\n\n"
+            f"<b>Cover Letter</b> \n{cover_letter_text}\n\n"
+            f"<b>CV Uploaded</b> \n{cv}\n\n"
+            f"<b>Portfolio(s)</b> \n{portfolio_text}\n\n\n"
+            f"<b>Apply for the job?</b>"
+        )
+
+    # Both are typed by the user, split what the card left between them, links first as they
+    # are usually the shorter
+    budget = max(MESSAGE_LIMIT - len(render("", "")), 0)
+    portfolio_text = fit_text(portfolio, budget // 2)
+    return render(fit_text(cover_letter, budget - len(portfolio_text)), portfolio_text)
+
+
 async def portfolio(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Updates the user's portfolio information and displays job details for confirmation.
@@ -497,32 +620,17 @@ async def portfolio(update: Update, context: ContextTypes.DEFAULT_TYPE):
         update.message.text.split(",") if update.message.text else []
     )
 
-    job = get_job(context.user_data["job_id"])
-    job_details = (
-        f"Job Title: <b>\t{job["job_title"]}</b> \n\n"
-        f"Job Type: <b>\t{job["job_site"]} - {job["job_type"]}</b> \n\n"
-        f"Work Location: <b>\t{job["job_city"]}, {job["job_country"]}</b> \n\n"
-        f"Applicants Needed: <b>\t{job["gender_preference"]}</b> \n\n"
-        f"Salary: <b>\t{job["salary_amount"]} {job["salary_currency"]}, {job["salary_type"]}</b> \n\n"
-        f"Deadline: <b>\t{format_date(job["job_deadline"])}</b> \n\n"
-        f"<b>Description</b>: \t{job["job_description"]} \n\n"
-        f"<b>Requirements</b>: \t{job["job_requirements"]} \n\n"
-    )
-    context.user_data["job_title"] = job["job_title"]
-    context.user_data["employer_id"] = job["user_id"]
+    job = await get_job(context.user_data["job_id"])
+    job_details, _ = render_job_card(job, "application")
+    context.user_data["job_title"] = job.job_title
+    context.user_data["employer_id"] = job.user_id
 
     keyboard = [
         [InlineKeyboardButton("Confirm", callback_data="confirm_apply")],
         [InlineKeyboardButton("Cancel", callback_data="cancel_apply")],
     ]
     await update.message.reply_text(
-        f"{job_details}"
-        f"<b>__________________</b>\n\n"
-        f"<b>Cover Letter</b> \n{context.user_data['cover_letter'] if context.user_data['cover_letter'] else None}\n\n"
-        f"<b>CV Uploaded</b> \n{'✅' if context.user_data['new_cv'] else None}\n\n"
-        f"<b>Portfolio(s)</b> \n{context.user_data['portfolio'] if context.user_data['portfolio'] else None}\n\n\n"
-        # f"<b>CV</b> \n{file.file_path}\n\n"
-        f"<b>Apply for the job?</b>",
+        _application_summary(job_details, context.user_data),
         reply_markup=InlineKeyboardMarkup(keyboard),
         parse_mode="HTML",
     )
@@ -553,19 +661,10 @@ async def skip_portfolio(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
     context.user_data["portfolio"] = []
 
-    job = get_job(context.user_data["job_id"])
-    job_details = (
-        f"Job Title: <b>\t{job["job_title"]}</b> \n\n"
-        f"Job Type: <b>\t{job["job_site"]} - {job["job_type"]}</b> \n\n"
-        f"Work Location: <b>\t{job["job_city"]}, {job["job_country"]}</b> \n\n"
-        f"Applicants Needed: <b>\t{job["gender_preference"]}</b> \n\n"
-        f"Salary: <b>\t{job["salary_amount"]} {job["salary_currency"]}, {job["salary_type"]}</b> \n\n"
-        f"Deadline: <b>\t{format_date(job["job_deadline"])}</b> \n\n"
-        f"<b>Description</b>: \t{job["job_description"]} \n\n"
-        f"<b>Requirements</b>: \t{job["job_requirements"]} \n\n"
-    )
-    context.user_data["job_title"] = job["job_title"]
-    context.user_data["employer_id"] = job["user_id"]
+    job = await get_job(context.user_data["job_id"])
+    job_details, _ = render_job_card(job, "application")
+    context.user_data["job_title"] = job.job_title
+    context.user_data["employer_id"] = job.user_id
 
     # if context.user_data['new_cv']:
     #     file = await context.bot.get_file(context.user_data['new_cv'])
@@ -575,13 +674,7 @@ async def skip_portfolio(update: Update, context: ContextTypes.DEFAULT_TYPE):
         [InlineKeyboardButton("Cancel", callback_data="cancel_apply")],
     ]
     await query.edit_message_text(
-        f"{job_details}"
-        f"<b>__________________</b>\n\n"
-        f"<b>Cover Letter</b> \n{context.user_data['cover_letter'] if context.user_data['cover_letter'] else None}\n\n"
-        f"<b>CV Uploaded</b> \n{'✅' if context.user_data['new_cv'] else None}\n\n"
-        f"<b>Portfolio(s)</b> \n{context.user_data['portfolio'] if context.user_data['portfolio'] else None}\n\n\n"
-        # f"<b>CV</b> \n{file.file_path}\n\n"
-        f"<b>Apply for the job?</b>",
+        _application_summary(job_details, context.user_data),
         reply_markup=InlineKeyboardMarkup(keyboard),
         parse_mode="HTML",
     )
@@ -591,32 +684,51 @@ async def skip_portfolio(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def confirm_apply(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
-    applicant = get_applicant(update, context)
+    applicant = await get_applicant(update, context)
 
     if not applicant:
         await start_command(update, context)
         return
 
-    execute_query(
-        "INSERT INTO applications (job_id, user_id, cover_letter, cv, portfolio) VALUES (%s, %s, %s, %s, %s)",
+    # Nothing is inserted if the job was closed while the user filled in the form
+    applied = await execute_query_async(
+        "INSERT INTO applications (job_id, user_id, cover_letter, cv, portfolio) "
+        "SELECT %s, %s, %s, %s, %s WHERE EXISTS ("
+        "SELECT 1 FROM jobs WHERE job_id = %s AND job_status IS DISTINCT FROM 'closed'"
+        ") ON CONFLICT (job_id, user_id) DO NOTHING RETURNING job_id",
         (
             context.user_data["job_id"],
             applicant["user_id"],
             context.user_data["cover_letter"],
             context.user_data["new_cv"],
             json.dumps(context.user_data.get("portfolio", [])),
+            context.user_data["job_id"],
         ),
     )
+
+    if not applied:
+        duplicate = await execute_query_async(
+            APPLICATION_EXISTS_QUERY,
+            (context.user_data["job_id"], applicant["user_id"]),
+        )
+        await query.edit_message_text(
+            "You've already applied for this job."
+            if duplicate
+            else "This job is closed."
+        )
+        return ConversationHandler.END
+
     await query.edit_message_text("Application submitted successfully!")
 
     # TODO: Notify employer
-    employer_telegram_id = get_telegram_id(context.user_data["employer_id"])
+    employer_telegram_id = await get_telegram_id(context.user_data["employer_id"])
     await context.bot.send_message(
         chat_id=employer_telegram_id,
         text=f"🔔 A new application has been submitted for this job \n\n"
         f"<b>Job Title:</b>\t {context.user_data["job_title"]}\n"
         f"<b>Applicant:</b>\t {update.effective_user.first_name} {update.effective_user.last_name if update.effective_user.last_name else ''}\n\n",
         parse_mode="HTML",
+        rate_limit_args=PRIORITY_NOTIFICATION,
     )
 
     return ConversationHandler.END
@@ -657,7 +769,7 @@ apply_job_handler = ConversationHandler(
         COVER_LETTER: [
             MessageHandler(filters.TEXT & ~filters.COMMAND, cover_letter),
             CallbackQueryHandler(
-                generate_cover_letter, pattern="^generate_cover_letter$"
+                generate_cover_letter, pattern="^(re)?generate_cover_letter$"
             ),
             CallbackQueryHandler(skip_cover_letter, pattern="^skip_cover_letter$"),
         ],
@@ -684,4 +796,6 @@ apply_job_handler = ConversationHandler(
         ],
     },
     fallbacks=[CommandHandler("cancel", cancel_apply)],
+    name="apply_job",
+    persistent=True,
 )
@@ -4,13 +4,20 @@ from telegram.ext import (
 )
 
 from applicants.handlers.general import start_command
-from utils.db import execute_query
-from utils.helpers import format_date, get_applicant, get_job
-from utils.constants import (
-    CURRENT_JOB_INDEX,
-    TOTAL_JOBS,
-    CURRENT_SAVEDJOB_INDEX,
-    TOTAL_SAVEDJOBS,
+from utils.db import execute_query_async
+from utils.helpers import (
+    get_applicant,
+    get_job,
+    get_job_cards,
+    get_job_feed,
+)
+from utils.pagination import decode_cursor, encode_cursor
+from utils.job_cards import render_job_card
+from utils.navigation import navigation, navigation_buttons
+
+# EXPLAINed by tests/test_query_plans.py
+SAVED_JOBS_QUERY = (
+    "SELECT job_id FROM saved_jobs WHERE user_id = %s ORDER BY created_at DESC LIMIT 50"
 )
 
 
@@ -27,32 +34,17 @@ async def show_job(update: Update, context: ContextTypes.DEFAULT_TYPE, job_id: s
         None
     """
 
-    job = get_job(job_id)
+    job = await get_job(job_id)
 
-    if not job:
+    if not job or job.job_status == "closed":
+        message = "This job is closed." if job else "Job not found."
         if update.callback_query:
-            await update.callback_query.answer("Job not found.")
+            await update.callback_query.answer(message)
         else:
-            await update.message.reply_text("Job not found.")
+            await update.message.reply_text(message)
         return
 
-    job_details = (
-        f"Job Title: <b>\t{job["job_title"]}</b> \n\n"
-        f"Job Type: <b>\t{job["job_site"]} - {job["job_type"]}</b> \n\n"
-        f"Work Location: <b>\t{job["job_city"]}, {job["job_country"]}</b> \n\n"
-        f"Applicants Needed: <b>\t{job["gender_preference"]}</b> \n\n"
-        f"Salary: <b>\t{job["salary_amount"]} {job["salary_currency"]}, {job["salary_type"]}</b> \n\n"
-        f"Deadline: <b>\t{format_date(job["job_deadline"])}</b> \n\n"
-        f"<b>Description</b>: \t{job["job_description"]} \n\n"
-        f"<b>Requirements</b>: \t{job["job_requirements"]} \n\n"
-    )
-
-    keyboard = [
-        [
-            InlineKeyboardButton("Save", callback_data=f"save_{job["job_id"]}"),
-            InlineKeyboardButton("Apply", callback_data=f"apply_{job["job_id"]}"),
-        ],
-    ]
+    job_details, keyboard = render_job_card(job, "applicant")
 
     if update.callback_query:
         await update.callback_query.edit_message_text(
@@ -68,19 +60,40 @@ async def show_job(update: Update, context: ContextTypes.DEFAULT_TYPE, job_id: s
         )
 
 
-async def browse_jobs(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def browse_jobs(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    cursor: str | None = None,
+    direction: str = "next",
+):
     """
-    Shows a list of the most recent 50 jobs.
+    Shows one job from the feed of open jobs, newest first.
+
+    The feed is paged with a keyset cursor carried in the Previous/Next callback data, so every
+    page is a single indexed lookup no matter how deep the user has browsed.
 
     Args:
         update (Update): The Telegram update.
         context (ContextTypes.DEFAULT_TYPE): The context of the Telegram conversation.
+        cursor (str | None): The encoded position of the job currently shown, or None to start
+            from the newest job.
+        direction (str): "next" for an older job, "previous" for a newer job.
 
     Returns:
         None
     """
 
-    jobs = execute_query("SELECT * FROM jobs ORDER BY created_at DESC LIMIT 50")
+    try:
+        position = decode_cursor(cursor) if cursor else None
+    except (ValueError, OverflowError):
+        # A malformed or tampered cursor, start from the newest job
+        position = None
+    jobs, has_more = await get_job_feed(position, direction)
+
+    if not jobs and position is not None:
+        # The neighbouring job is gone (e.g. deleted meanwhile), restart from the newest
+        position = None
+        jobs, has_more = await get_job_feed()
 
     if not jobs:
         if update.callback_query:
@@ -91,68 +104,28 @@ async def browse_jobs(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("No jobs available at the moment.")
         return
 
-    job_list = [job for job in jobs]
-    # global CURRENT_JOB_INDEX
-    job = job_list[CURRENT_JOB_INDEX]
-    global TOTAL_JOBS
-    TOTAL_JOBS = len(job_list)
-    # CURRENT_JOB_INDEX = 0  # Reset index when starting
-
-    job_details = (
-        f"Job Title: <b>\t{job["job_title"]}</b> \n\n"
-        f"Job Type: <b>\t{job["job_site"]} - {job["job_type"]}</b> \n\n"
-        f"Work Location: <b>\t{job["job_city"]}, {job["job_country"]}</b> \n\n"
-        f"Applicants Needed: <b>\t{job["gender_preference"]}</b> \n\n"
-        f"Salary: <b>\t{job["salary_amount"]} {job["salary_currency"]}, {job["salary_type"]}</b> \n\n"
-        f"Deadline: <b>\t{format_date(job["job_deadline"])}</b> \n\n"
-        f"<b>Description</b>: \t{job["job_description"]} \n\n"
-        f"<b>Requirements</b>: \t{job["job_requirements"]} \n\n"
-    )
-
-    # keyboard = []
-    # if CURRENT_JOB_INDEX > 0:
-    #     keyboard.append([InlineKeyboardButton("Previous", callback_data='job_previous')])
-    # if CURRENT_JOB_INDEX < len(job_list) - 1:
-    #     keyboard.append([InlineKeyboardButton("Next", callback_data='job_next')])
-
-    if TOTAL_JOBS > 1:
-        if CURRENT_JOB_INDEX > 0:
-            keyboard = [
-                [
-                    InlineKeyboardButton("Previous", callback_data="job_previous"),
-                    InlineKeyboardButton("Next", callback_data="job_next"),
-                ],
-                [
-                    InlineKeyboardButton("Save", callback_data=f"save_{job["job_id"]}"),
-                    InlineKeyboardButton(
-                        "Apply", callback_data=f"apply_{job["job_id"]}"
-                    ),
-                ],
-            ]
-            if TOTAL_JOBS == CURRENT_JOB_INDEX + 1:
-                keyboard = [
-                    [InlineKeyboardButton("Previous", callback_data="job_previous")],
-                    [
-                        InlineKeyboardButton(
-                            "Save", callback_data=f"save_{job["job_id"]}"
-                        ),
-                        InlineKeyboardButton(
-                            "Apply", callback_data=f"apply_{job["job_id"]}"
-                        ),
-                    ],
-                ]
-        else:
-            keyboard = [
-                [InlineKeyboardButton("Next", callback_data="job_next")],
-                [
-                    InlineKeyboardButton("Save", callback_data=f"save_{job["job_id"]}"),
-                    InlineKeyboardButton(
-                        "Apply", callback_data=f"apply_{job["job_id"]}"
-                    ),
-                ],
-            ]
+    job = jobs[0]
+    if position is None:
+        has_previous, has_next = False, has_more
+    elif direction == "previous":
+        has_previous, has_next = has_more, True
     else:
-        keyboard = []
+        has_previous, has_next = True, has_more
+
+    job_details, actions = render_job_card(job, "applicant")
+
+    current = encode_cursor(job.created_at, job.job_id)
+    feed_buttons = []
+    if has_previous:
+        feed_buttons.append(
+            InlineKeyboardButton("Previous", callback_data=f"job_previous_{current}")
+        )
+    if has_next:
+        feed_buttons.append(
+            InlineKeyboardButton("Next", callback_data=f"job_next_{current}")
+        )
+
+    keyboard = ([feed_buttons] if feed_buttons else []) + actions
 
     if update.callback_query:
         await update.callback_query.edit_message_text(
@@ -172,42 +145,54 @@ async def next_job(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Handles the callback query for the next/previous job buttons.
 
+    The callback data has the form `job_<direction>_<cursor>`. Buttons sent before cursors were
+    introduced carry no cursor and restart the feed from the newest job.
+
     Args:
         update (Update): The Telegram update.
         context (ContextTypes.DEFAULT_TYPE): The context of the Telegram conversation.
     """
 
-    global CURRENT_JOB_INDEX
     query = update.callback_query
     await query.answer()
 
-    if query.data == "job_next":
-        CURRENT_JOB_INDEX += 1
-    elif query.data == "job_previous":
-        CURRENT_JOB_INDEX -= 1
+    _, direction, cursor = (query.data.split("_", 2) + [""])[:3]
+    if direction not in ("next", "previous"):
+        direction = "next"
 
-    await browse_jobs(update, context)
+    await browse_jobs(update, context, cursor or None, direction)
 
 
-async def saved_jobs(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def saved_jobs(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, index: int = 0
+):
     """
     Shows a list of jobs that the user has saved.
 
     Args:
         update (Update): The Telegram update.
         context (ContextTypes.DEFAULT_TYPE): The context of the Telegram conversation.
+        index (int, optional): The position in the list to show. Defaults to 0.
     """
 
-    applicant = get_applicant(update, context)
+    applicant = await get_applicant(update, context)
 
     if not applicant:
         await start_command(update, context)
         return
 
-    savedjobs = execute_query(
-        "SELECT j.*, sj.* FROM saved_jobs sj JOIN jobs j ON sj.job_id = j.job_id WHERE sj.user_id = %s ORDER BY sj.created_at DESC LIMIT 50",
+    # Ids come from the database, the cards themselves from the cache in one round trip
+    saved = await execute_query_async(
+        SAVED_JOBS_QUERY,
         (applicant["user_id"],),
     )
+    cards = await get_job_cards([row["job_id"] for row in saved])
+    # Closed jobs can't be applied to anymore, leave them out
+    savedjobs = [
+        cards[row["job_id"]]
+        for row in saved
+        if row["job_id"] in cards and cards[row["job_id"]].job_status != "closed"
+    ]
 
     if not savedjobs:
         if update.callback_query:
@@ -218,61 +203,17 @@ async def saved_jobs(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("You haven't saved any jobs yet.")
         return
 
-    savedjobs_list = [job for job in savedjobs]
-    # global CURRENT_SAVEDJOB_INDEX
-    savedjob = savedjobs_list[CURRENT_SAVEDJOB_INDEX]
-    global TOTAL_SAVEDJOBS
-    TOTAL_SAVEDJOBS = len(savedjobs_list)
-    # CURRENT_SAVEDJOB_INDEX = 0  # Reset index when starting
-
-    savedjob_details = (
-        f"Job Title: <b>\t{savedjob["job_title"]}</b> \n\n"
-        f"Job Type: <b>\t{savedjob["job_site"]} - {savedjob["job_type"]}</b> \n\n"
-        f"Work Location: <b>\t{savedjob["job_city"]}, {savedjob["job_country"]}</b> \n\n"
-        f"Applicants Needed: <b>\t{savedjob["gender_preference"]}</b> \n\n"
-        f"Salary: <b>\t{savedjob["salary_amount"]} {savedjob["salary_currency"]}, {savedjob["salary_type"]}</b> \n\n"
-        f"Deadline: <b>\t{format_date(savedjob["job_deadline"])}</b> \n\n"
-        f"<b>Description</b>: \t{savedjob["job_description"]} \n\n"
-        f"<b>Requirements</b>: \t{savedjob["job_requirements"]} \n\n"
-    )
+    total = len(savedjobs)
+    index = await navigation.set(update.effective_chat.id, "savedjob", index, total)
+    savedjob = savedjobs[index]
 
-    if TOTAL_SAVEDJOBS > 1:
-        if CURRENT_SAVEDJOB_INDEX > 0:
-            keyboard = [
-                [
-                    InlineKeyboardButton("Previous", callback_data="savedjob_previous"),
-                    InlineKeyboardButton("Next", callback_data="savedjob_next"),
-                ],
-                [
-                    InlineKeyboardButton(
-                        "Apply", callback_data=f"apply_{savedjob["job_id"]}"
-                    )
-                ],
-            ]
-            if TOTAL_SAVEDJOBS == CURRENT_SAVEDJOB_INDEX + 1:
-                keyboard = [
-                    [
-                        InlineKeyboardButton(
-                            "Previous", callback_data="savedjob_previous"
-                        )
-                    ],
-                    [
-                        InlineKeyboardButton(
-                            "Apply", callback_data=f"apply_{savedjob["job_id"]}"
-                        )
-                    ],
-                ]
-        else:
-            keyboard = [
-                [InlineKeyboardButton("Next", callback_data="savedjob_next")],
-                [
-                    InlineKeyboardButton(
-                        "Apply", callback_data=f"apply_{savedjob["job_id"]}"
-                    )
-                ],
-            ]
-    else:
-        keyboard = []
+    savedjob_details, actions = render_job_card(savedjob, "saved")
+
+    keyboard = []
+    navigation_row = navigation_buttons("savedjob", index, total)
+    if navigation_row:
+        keyboard.append(navigation_row)
+    keyboard += actions
 
     if update.callback_query:
         await update.callback_query.edit_message_text(
@@ -297,16 +238,16 @@ async def next_savedjob(update: Update, context: ContextTypes.DEFAULT_TYPE):
         context (ContextTypes.DEFAULT_TYPE): The context of the Telegram conversation.
     """
 
-    global CURRENT_SAVEDJOB_INDEX
     query = update.callback_query
     await query.answer()
 
+    index = await navigation.get(update.effective_chat.id, "savedjob")
     if query.data == "savedjob_next":
-        CURRENT_SAVEDJOB_INDEX += 1
+        index += 1
     elif query.data == "savedjob_previous":
-        CURRENT_SAVEDJOB_INDEX -= 1
+        index -= 1
 
-    await saved_jobs(update, context)
+    await saved_jobs(update, context, index)
 
 
 async def save_job(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -317,11 +258,10 @@ async def save_job(update: Update, context: ContextTypes.DEFAULT_TYPE):
         update (Update): The Telegram update containing the callback query.
         context (ContextTypes.DEFAULT_TYPE): The context of the Telegram conversation.
 
-    Retrieves the job ID from the callback query data and checks if the applicant
-    has already saved the job. If not, it inserts the job into the saved_jobs
-    table associated with the applicant's user ID. Sends a confirmation message
-    to the applicant on successful saving or a duplicate message if the job
-    is already saved.
+    Retrieves the job ID from the callback query data and inserts the job into the
+    saved_jobs table associated with the applicant's user ID, skipping the insert if
+    the applicant has already saved the job. Sends a confirmation message to the
+    applicant on successful saving or a duplicate message if the job is already saved.
 
     Handles exceptions by notifying the applicant of an error and logs the error
     details for debugging purposes.
@@ -331,37 +271,24 @@ async def save_job(update: Update, context: ContextTypes.DEFAULT_TYPE):
         query = update.callback_query
         await query.answer()
         job_id = int(query.data.split("_")[-1])
-        applicant = get_applicant(update, context)
+        applicant = await get_applicant(update, context)
 
         if not applicant:
             await start_command(update, context)
             return
 
-        # checking duplicate
-        duplicate = execute_query(
-            "SELECT * FROM saved_jobs WHERE job_id = %s AND user_id = %s",
+        # A duplicate save is a no-op, RETURNING tells us whether a row was inserted
+        saved = await execute_query_async(
+            "INSERT INTO saved_jobs (job_id, user_id) VALUES (%s, %s) "
+            "ON CONFLICT (job_id, user_id) DO NOTHING RETURNING job_id",
             (job_id, applicant["user_id"]),
         )
-        if duplicate:
-            await context.bot.send_message(
-                chat_id=query.from_user.id,
-                text="You've already saved this job.",
-                parse_mode="HTML",
-            )
-        else:
-            response = execute_query(
-                "INSERT INTO saved_jobs (job_id, user_id) VALUES (%s, %s)",
-                (
-                    job_id,
-                    applicant["user_id"],
-                ),
-            )
 
-            await context.bot.send_message(
-                chat_id=query.from_user.id,
-                text="Job saved",
-                parse_mode="HTML",
-            )
+        await context.bot.send_message(
+            chat_id=query.from_user.id,
+            text="Job saved" if saved else "You've already saved this job.",
+            parse_mode="HTML",
+        )
     except Exception as e:
         await update.message.reply_text(
             "An error occurred while saving job. Please try again."
@@ -23,8 +23,13 @@ from applicants.states.all import (
     EDIT_USERNAME,
 )
 from utils.constants import ROLE_APPLICANT
-from utils.db import execute_query, redis_client
-from utils.helpers import get_all_cities, get_applicant, is_valid_email
+from utils.db import execute_query_async
+from utils.helpers import (
+    get_all_cities,
+    get_applicant,
+    invalidate_applicant,
+    is_valid_email,
+)
 
 
 async def applicant_profile(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -34,7 +39,7 @@ async def applicant_profile(update: Update, context: ContextTypes.DEFAULT_TYPE)
     Otherwise, send a new message with the applicant's profile.
     If the applicant is not found, start the conversation with the start handler.
     """
-    applicant = get_applicant(update, context)
+    applicant = await get_applicant(update, context)
 
     if not applicant:
         await start_command(update, context)
@@ -272,11 +277,11 @@ async def edit_name(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     name = update.message.text.strip()
     telegram_id = update.effective_user.id
 
-    response = execute_query(
+    response = await execute_query_async(
         "UPDATE users SET name = %s WHERE telegram_id = %s AND role_id = %s",
         (name, telegram_id, ROLE_APPLICANT),
     )
-    redis_client.delete(f"applicant:{telegram_id}")
+    await invalidate_applicant(telegram_id)
 
     keyboard = [
         [InlineKeyboardButton("Back to Profile", callback_data="applicant_profile")]
@@ -311,11 +316,11 @@ async def update_username(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     query = update.callback_query
     await query.answer()
 
-    response = execute_query(
+    response = await execute_query_async(
         "UPDATE users SET username = %s WHERE telegram_id = %s AND role_id = %s",
         (username, telegram_id, ROLE_APPLICANT),
     )
-    redis_client.delete(f"applicant:{telegram_id}")
+    await invalidate_applicant(telegram_id)
 
     keyboard = [
         [InlineKeyboardButton("Back to Profile", callback_data="applicant_profile")]
@@ -350,11 +355,11 @@ async def edit_gender(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
         await query.answer()
         telegram_id = update.effective_user.id
 
-        response = execute_query(
+        response = await execute_query_async(
             "UPDATE users SET gender = %s WHERE telegram_id = %s AND role_id = %s",
             (query.data, telegram_id, ROLE_APPLICANT),
         )
-        redis_client.delete(f"applicant:{telegram_id}")
+        await invalidate_applicant(telegram_id)
 
         keyboard = [
             [InlineKeyboardButton("Back to Profile", callback_data="applicant_profile")]
@@ -418,11 +423,11 @@ async def edit_dob(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
 
                 telegram_id = update.effective_user.id
 
-                response = execute_query(
+                response = await execute_query_async(
                     "UPDATE users SET dob = %s WHERE telegram_id = %s AND role_id = %s",
-                    (dob, telegram_id, ROLE_APPLICANT),
+                    (age, telegram_id, ROLE_APPLICANT),
                 )
-                redis_client.delete(f"applicant:{telegram_id}")
+                await invalidate_applicant(telegram_id)
 
                 await update.message.reply_text(
                     text="Age updated successfully!",
@@ -470,11 +475,11 @@ async def edit_country(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
         await query.answer()
         telegram_id = update.effective_user.id
 
-        response = execute_query(
+        response = await execute_query_async(
             "UPDATE users SET country = %s WHERE telegram_id = %s AND role_id = %s",
             (query.data, telegram_id, ROLE_APPLICANT),
         )
-        redis_client.delete(f"applicant:{telegram_id}")
+        await invalidate_applicant(telegram_id)
 
         keyboard = [
             [InlineKeyboardButton("Back to Profile", callback_data="applicant_profile")]
@@ -514,11 +519,11 @@ async def edit_city(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         await query.answer()
         telegram_id = update.effective_user.id
 
-        response = execute_query(
+        response = await execute_query_async(
             "UPDATE users SET city = %s WHERE telegram_id = %s AND role_id = %s",
             (query.data, telegram_id, ROLE_APPLICANT),
         )
-        redis_client.delete(f"applicant:{telegram_id}")
+        await invalidate_applicant(telegram_id)
 
         keyboard = [
             [InlineKeyboardButton("Back to Profile", callback_data="applicant_profile")]
@@ -565,11 +570,11 @@ async def edit_email(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
             )
             return EDIT_EMAIL
 
-        response = execute_query(
+        response = await execute_query_async(
             "UPDATE users SET email = %s WHERE telegram_id = %s AND role_id = %s",
             (email, telegram_id, ROLE_APPLICANT),
         )
-        redis_client.delete(f"applicant:{telegram_id}")
+        await invalidate_applicant(telegram_id)
 
         keyboard = [
             [InlineKeyboardButton("Back to Profile", callback_data="applicant_profile")]
@@ -616,11 +621,11 @@ async def edit_phone(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
             )
             return EDIT_PHONE
 
-        response = execute_query(
+        response = await execute_query_async(
             "UPDATE users SET phone = %s WHERE telegram_id = %s AND role_id = %s",
             (phone, telegram_id, ROLE_APPLICANT),
         )
-        redis_client.delete(f"applicant:{telegram_id}")
+        await invalidate_applicant(telegram_id)
 
         keyboard = [
             [InlineKeyboardButton("Back to Profile", callback_data="applicant_profile")]
@@ -656,4 +661,6 @@ profile_handler = ConversationHandler(
         EDIT_PHONE: [MessageHandler(filters.TEXT & ~filters.COMMAND, edit_phone)],
     },
     fallbacks=[CommandHandler("cancel", cancel_profile)],
+    name="applicant_profile",
+    persistent=True,
 )
@@ -0,0 +1,77 @@
+"""
+Compares the cache serializers on the rows the bot caches most: applicant/employer rows and job
+cards.
+
+Run from the repository root:
+
+    python -m benchmarks.serializers [--number 20000]
+"""
+
+import argparse
+import datetime
+import timeit
+
+from core.database.serializers import SERIALIZERS
+
+APPLICANT = {
+    "user_id": 48213,
+    "telegram_id": 5829301744,
+    "role_id": 1,
+    "name": "Abebe Kebede",
+    "username": "abebek",
+    "email": "abebe.kebede@example.com",
+    "phone": "+251911234567",
+    "gender": "Male",
+    "dob": datetime.date(1996, 4, 12),
+    "country": "Ethiopia",
+    "city": "Addis Ababa",
+    "education": '[{"degree": "BSc", "field": "Computer Science"}]',
+    "experience": '[{"title": "Backend Developer", "years": 3}]',
+    "cv": "BQACAgQAAxkBAAIBQ2Zp9d2v8sL0x7mFz0pQeUbXhZ2TAAJvEwACm3ZRUb1P",
+    "skills": None,
+    "portfolios": '["https://github.com/abebek"]',
+    "subscribed_alerts": None,
+    "preferences": None,
+}
+
+JOB = {
+    "job_id": 91544,
+    "job_title": "Senior Backend Engineer",
+    "job_site": "Remote",
+    "job_type": "Full Time",
+    "job_city": "Addis Ababa",
+    "job_country": "Ethiopia",
+    "gender_preference": "Both",
+    "salary_amount": 85000,
+    "salary_currency": "ETB",
+    "salary_type": "Monthly",
+    "job_deadline": datetime.date(2025, 9, 30),
+    "job_description": "Build and run the services behind our marketplace. " * 12,
+    "job_requirements": "5+ years of Python, PostgreSQL and Redis. " * 6,
+    "user_id": 1207,
+    "created_at": datetime.datetime(2025, 8, 14, 10, 21, 7, 523118),
+}
+
+SAMPLES = {"applicant": APPLICANT, "job": JOB}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'row':<10} {'codec':<8} {'bytes':>6} {'encode µs':>10} {'decode µs':>10}")
+    for sample_name, sample in SAMPLES.items():
+        for codec_name, codec in SERIALIZERS.items():
+            serializer = codec()
+            raw = serializer.dumps(sample)
+            encode = timeit.timeit(lambda: serializer.dumps(sample), number=args.number)
+            decode = timeit.timeit(lambda: serializer.loads(raw), number=args.number)
+            print(
+                f"{sample_name:<10} {codec_name:<8} {len(raw):>6} "
+                f"{encode / args.number * 1e6:>10.2f} {decode / args.number * 1e6:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
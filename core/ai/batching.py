@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Groups concurrent requests into batches, so a model runs one padded batch instead of many
+    single-row ones.
+
+    A batch is sent as soon as it holds `max_batch` requests, or `max_wait` seconds after its
+    first request arrived. Each caller gets its own item of the batch's results.
+
+    At most `max_in_flight` batches run at once. While they do, requests keep queueing, so the
+    next batch goes out as full as possible once one finishes, instead of waiting behind the
+    others in the executor.
+
+    A caller that gives up leaves the batch running for the others. Once every caller of a
+    batch gave up, the batch itself is cancelled.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[list], Awaitable[list]],
+        max_batch: int = 8,
+        max_wait: float = 0.01,
+        max_in_flight: int | None = None,
+    ):
+        """
+        Args:
+            run_batch (Callable[[list], Awaitable[list]]): Runs a batch of requests and returns
+                one result per request, in order.
+            max_batch (int, optional): The largest batch. Defaults to 8.
+            max_wait (float, optional): Seconds a request may wait for others to join its
+                batch. Defaults to 0.01.
+            max_in_flight (int, optional): The most batches running at once, e.g. the
+                number of workers running them. Defaults to None, no limit.
+        """
+
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        # (request, caller's future, time it was queued)
+        self._queue: list[tuple[Any, asyncio.Future, float]] = []
+        self._timer: asyncio.TimerHandle | None = None
+
+        self.batches = 0
+        self.requests = 0
+        self.largest_batch = 0
+        self.queue_wait = 0.0
+        self.longest_queue_wait = 0.0
+        self.tokens = 0
+        self.generation_seconds = 0.0
+
+    async def submit(self, request: Any) -> Any:
+        """
+        Adds a request to the next batch and waits for its result.
+
+        Args:
+            request (Any): The request.
+
+        Returns:
+            Any: The request's item of the batch results.
+        """
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((request, future, time.monotonic()))
+        if len(self._queue) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.max_wait, self._flush
+            )
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self.max_in_flight is not None and self.in_flight >= self.max_in_flight:
+            # The next batch goes out when a running one finishes
+            return
+
+        # Callers cancelled while queued don't take a seat in the batch
+        queued = [entry for entry in self._queue if not entry[1].done()]
+        batch, rest = queued[: self.max_batch], queued[self.max_batch :]
+        self._queue = rest
+        if rest:
+            self._timer = asyncio.get_running_loop().call_later(0, self._flush)
+        if not batch:
+            return
+
+        now = time.monotonic()
+        waits = [now - queued_at for _, _, queued_at in batch]
+        self.batches += 1
+        self.requests += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        self.queue_wait += sum(waits)
+        self.longest_queue_wait = max(self.longest_queue_wait, *waits)
+
+        self.in_flight += 1
+        task = asyncio.create_task(self.run_batch([request for request, _, _ in batch]))
+        futures = [future for _, future, _ in batch]
+
+        def caller_gave_up(_):
+            if all(future.cancelled() for future in futures):
+                task.cancel()
+
+        for future in futures:
+            future.add_done_callback(caller_gave_up)
+        task.add_done_callback(lambda _: self._deliver(task, futures))
+
+    def _deliver(self, task: asyncio.Task, futures: list[asyncio.Future]) -> None:
+        self.in_flight -= 1
+        if self._queue:
+            self._flush()
+        for i, future in enumerate(futures):
+            if future.done():
+                continue
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result()[i])
+
+    def record_generation(self, tokens: int, seconds: float) -> None:
+        """
+        Adds a batch's generated tokens and generation time to the metrics.
+
+        Args:
+            tokens (int): Tokens generated for the whole batch.
+            seconds (float): Time the batch took to generate.
+        """
+
+        self.tokens += tokens
+        self.generation_seconds += seconds
+
+    def metrics(self) -> dict:
+        """
+        Returns:
+            dict: Batches and requests run, the mean and largest batch size, the mean and
+            longest wait for a batch in milliseconds, and the tokens generated per second.
+        """
+
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch_size": (
+                round(self.requests / self.batches, 2) if self.batches else 0
+            ),
+            "largest_batch": self.largest_batch,
+            "mean_queue_wait_ms": (
+                round(self.queue_wait / self.requests * 1000, 2) if self.requests else 0
+            ),
+            "longest_queue_wait_ms": round(self.longest_queue_wait * 1000, 2),
+            "tokens_per_second": (
+                round(self.tokens / self.generation_seconds, 1)
+                if self.generation_seconds
+                else 0
+            ),
+        }
@@ -0,0 +1,355 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Awaitable, Callable
+
+from redis.exceptions import RedisError
+
+from core.ai.batching import MicroBatcher
+from core.ai.inference import InferenceService, publish
+from core.ai.models import seq2seq
+from core.database.cache import cache
+from utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# google/flan-t5-large, google/flan-t5-base, google/flan-t5-small
+MODEL_NAME = os.getenv("COVER_LETTER_MODEL", "google/flan-t5-base")
+WORKERS = int(os.getenv("COVER_LETTER_WORKERS", "1"))
+# torch threads per worker, keep WORKERS * THREADS within the CPU cores
+THREADS = int(os.getenv("COVER_LETTER_THREADS", "2"))
+TIMEOUT = float(os.getenv("COVER_LETTER_TIMEOUT", "60"))
+BATCH_SIZE = int(os.getenv("COVER_LETTER_BATCH_SIZE", "8"))
+BATCH_WAIT = float(os.getenv("COVER_LETTER_BATCH_WAIT_MS", "10")) / 1000
+# Load the model when the bot starts rather than on the first draft
+PRELOAD = os.getenv("COVER_LETTER_PRELOAD", "1") == "1"
+# Letters sampled per generation, "Regenerate" goes through them before generating again
+CANDIDATES = int(os.getenv("COVER_LETTER_CANDIDATES", "3"))
+CACHE_TTL = int(os.getenv("COVER_LETTER_CACHE_TTL", "86400"))
+# Seconds between publishing the text streamed so far (in the workers), and between edits of
+# the message showing it (Telegram allows about one message or edit per second in a chat)
+STREAM_INTERVAL = 0.2
+STREAM_EDIT_INTERVAL = float(os.getenv("COVER_LETTER_STREAM_EDIT_INTERVAL", "1.5"))
+# Bump whenever build_prompt or the generation settings change, so cached drafts aren't reused
+PROMPT_VERSION = 1
+
+# Loaded in each worker process by load_model
+_tokenizer = None
+_model = None
+
+
+def load_model(model_name: str, threads: int) -> None:
+    """
+    Loads the tokenizer and model in an inference worker. torch is only ever imported there.
+    The model comes from the worker's model registry, which records its load time and size.
+
+    Args:
+        model_name (str): The Hugging Face seq2seq model to load.
+        threads (int): The number of threads torch may use.
+    """
+
+    global _tokenizer, _model
+    import torch
+
+    torch.set_num_threads(threads)
+    _tokenizer, _model = seq2seq(model_name)
+
+
+def _truncate(text: str, max_tokens: int = 300) -> str:
+    tokens = _tokenizer.encode(text, max_length=max_tokens, truncation=True)
+    return _tokenizer.decode(tokens, skip_special_tokens=True)
+
+
+def build_prompt(
+    job_title: str,
+    company_name: str,
+    job_description: str,
+    skills: str,
+    experience: str,
+) -> str:
+    """
+    Builds the cover letter prompt.
+
+    Args:
+        job_title (str): The job title.
+        company_name (str): The company name.
+        job_description (str): The job description, already truncated.
+        skills (str): The applicant's skills.
+        experience (str): The applicant's experience, already truncated.
+
+    Returns:
+        str: The prompt.
+    """
+
+    return f"""
+        Task: Generate a formal cover letter for a job application.
+        Job Title: {job_title}
+        Company: {company_name}
+        Job Description: {job_description}
+        Applicant Skills: {skills}
+        Applicant Experience: {experience}
+        Instructions:
+        1. Address the hiring manager.
+        2. Highlight 2-3 skills from "Applicant Skills".
+        3. Mention experience from "Applicant Experience".
+        4. Keep it under 300 words.
+        Output:
+        """
+
+
+def _clean(letter: str) -> str:
+    # Remove redundant instructions (if any)
+    return letter.split("Output:")[-1].strip()
+
+
+def write_cover_letters(requests: list[dict], should_stop) -> dict:
+    """
+    Generates a batch of cover letters in an inference worker, as one padded batch. Each
+    request gets CANDIDATES sampled letters from the same generate call.
+
+    The first candidate of requests with a "stream" key is published under that key as it's
+    generated, every STREAM_INTERVAL seconds.
+
+    Args:
+        requests (list[dict]): The job_title, company_name, job_description, skills and
+            experience of each cover letter, and optionally its "stream" key.
+        should_stop (Callable[[], bool]): Tells whether the callers gave up on the results.
+
+    Returns:
+        dict: The "letters", a list of candidates per request in the order of the requests
+        (empty if generation was stopped), and the "tokens" generated and "seconds" it took,
+        for the batch as a whole.
+    """
+
+    import torch
+    from transformers import StoppingCriteria, StoppingCriteriaList
+    from transformers.generation.streamers import BaseStreamer
+
+    class Abandoned(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            return torch.full((input_ids.shape[0],), should_stop(), dtype=torch.bool)
+
+    class Progress(BaseStreamer):
+        def __init__(self):
+            # Generated tokens of the first candidate of each streamed request, by its row
+            self.tokens = {
+                i * CANDIDATES: []
+                for i, request in enumerate(requests)
+                if "stream" in request
+            }
+            self.started = False
+            self.published = time.monotonic()
+
+        def put(self, value):
+            # The first call gets the decoder's start tokens, the next ones a new token per row
+            if not self.started:
+                self.started = True
+                return
+            for row, tokens in self.tokens.items():
+                tokens.append(int(value[row]))
+            if time.monotonic() - self.published >= STREAM_INTERVAL:
+                self.end()
+
+        def end(self):
+            self.published = time.monotonic()
+            for row, tokens in self.tokens.items():
+                text = _tokenizer.decode(tokens, skip_special_tokens=True)
+                publish(requests[row // CANDIDATES]["stream"], _clean(text))
+
+    streamer = Progress() if any("stream" in request for request in requests) else None
+
+    prompts = [
+        build_prompt(
+            request["job_title"],
+            request["company_name"],
+            _truncate(request["job_description"]),
+            request["skills"],
+            _truncate(request["experience"]),
+        )
+        for request in requests
+    ]
+    inputs = _tokenizer(
+        prompts, return_tensors="pt", padding=True, max_length=512, truncation=True
+    )
+    started = time.monotonic()
+    with torch.inference_mode():
+        outputs = _model.generate(
+            inputs.input_ids,
+            attention_mask=inputs.attention_mask,
+            max_new_tokens=500,
+            temperature=0.9,
+            do_sample=True,
+            top_k=50,
+            top_p=0.95,
+            num_return_sequences=CANDIDATES,
+            stopping_criteria=StoppingCriteriaList([Abandoned()]),
+            streamer=streamer,
+        )
+    seconds = time.monotonic() - started
+    # Shorter letters are padded up to the longest one, padding isn't generated text
+    tokens = int((outputs != _tokenizer.pad_token_id).sum())
+    if should_stop():
+        return {"letters": [[] for _ in requests], "tokens": tokens, "seconds": seconds}
+    letters = [
+        _clean(letter)
+        for letter in _tokenizer.batch_decode(outputs, skip_special_tokens=True)
+    ]
+    return {
+        # The candidates of each request are next to each other
+        "letters": [
+            letters[i : i + CANDIDATES] for i in range(0, len(letters), CANDIDATES)
+        ],
+        "tokens": tokens,
+        "seconds": seconds,
+    }
+
+
+cover_letters = InferenceService(
+    load_model,
+    write_cover_letters,
+    load_args=(MODEL_NAME, THREADS),
+    workers=WORKERS,
+    timeout=TIMEOUT,
+)
+
+
+async def _run_batch(requests: list[dict]) -> list[list[str]]:
+    result = await cover_letters.submit(requests)
+    drafts.record_generation(result["tokens"], result["seconds"])
+    return result["letters"]
+
+
+# Requests arriving within BATCH_WAIT of each other share one generate call, and requests
+# arriving while every worker is busy share the next one
+drafts = MicroBatcher(
+    _run_batch, max_batch=BATCH_SIZE, max_wait=BATCH_WAIT, max_in_flight=WORKERS
+)
+
+
+# Coalesces concurrent generations of the same drafts
+_generations = SingleFlight()
+
+
+def draft_key(job_id: int, request: dict) -> str:
+    """
+    Returns the cache key of a job's drafts for an applicant profile. It changes whenever
+    anything the prompt is built from, the prompt itself or the model changes.
+
+    Args:
+        job_id (int): The job ID.
+        request (dict): The job_title, company_name, job_description, skills and experience.
+
+    Returns:
+        str: The cache key.
+    """
+
+    fingerprint = json.dumps(
+        [job_id, request, PROMPT_VERSION, MODEL_NAME], sort_keys=True
+    ).encode()
+    return f"cover_letter:{hashlib.sha256(fingerprint).hexdigest()}"
+
+
+async def _generate(key: str, request: dict) -> list[str]:
+    try:
+        # The text of the first draft is streamed under the drafts' cache key
+        candidates = await drafts.submit(request | {"stream": key})
+    finally:
+        cover_letters.clear_progress(key)
+    # Letters of a stopped generation are empty
+    candidates = [letter for letter in candidates if letter]
+    if candidates:
+        try:
+            await cache.set(key, candidates, ttl=CACHE_TTL)
+        except RedisError as e:
+            # The cache is best effort, the drafts are still shown
+            logger.warning("Caching cover letters %s failed: %s", key, e)
+    return candidates
+
+
+async def _stream(
+    key: str, generation: asyncio.Future, on_text: Callable[[str], Awaitable[None]]
+) -> None:
+    text, edited = "", None
+    while not generation.done():
+        await asyncio.wait([generation], timeout=STREAM_INTERVAL)
+        latest = cover_letters.progress(key)
+        if generation.done() or not latest or latest == text:
+            continue
+        # The first text is shown right away, later ones at most every STREAM_EDIT_INTERVAL
+        if edited is not None and time.monotonic() - edited < STREAM_EDIT_INTERVAL:
+            continue
+        text, edited = latest, time.monotonic()
+        try:
+            await on_text(text)
+        except Exception as e:
+            # Progress is best effort, the finished draft is still shown
+            logger.warning("Streaming cover letter %s failed: %s", key, e)
+
+
+async def draft_cover_letters(
+    job_id: int,
+    job_title: str,
+    company_name: str,
+    job_description: str,
+    skills: str,
+    experience: str,
+    refresh: bool = False,
+    on_text: Callable[[str], Awaitable[None]] | None = None,
+) -> tuple[str, list[str], bool]:
+    """
+    Returns cover letter drafts for a job and an applicant profile. Drafts are cached for
+    COVER_LETTER_CACHE_TTL seconds; on a miss, CANDIDATES of them are generated in the
+    inference workers, without blocking the event loop. Concurrent requests are batched
+    together.
+
+    Args:
+        job_id (int): The job ID.
+        job_title (str): The job title.
+        company_name (str): The company name.
+        job_description (str): The job description.
+        skills (str): The applicant's skills.
+        experience (str): The applicant's experience.
+        refresh (bool, optional): Generate new drafts even if some are cached, e.g. once the
+            applicant went through them all. Defaults to False.
+        on_text (Callable[[str], Awaitable[None]], optional): Called with the text of the
+            first draft so far while it's generated, at most every
+            COVER_LETTER_STREAM_EDIT_INTERVAL seconds. Defaults to None.
+
+    Returns:
+        tuple[str, list[str], bool]: The drafts' cache key (see `draft_key`), the drafts
+        (empty if none could be written), and whether they were just generated rather than
+        read from the cache.
+
+    Raises:
+        InferenceTimeout: Its batch took longer than COVER_LETTER_TIMEOUT seconds.
+    """
+
+    request = {
+        "job_title": job_title,
+        "company_name": company_name,
+        "job_description": job_description,
+        "skills": skills,
+        "experience": experience,
+    }
+    key = draft_key(job_id, request)
+    if not refresh:
+        try:
+            candidates = await cache.get(key)
+        except RedisError as e:
+            logger.warning("Reading cached cover letters %s failed: %s", key, e)
+            candidates = None
+        if candidates:
+            return key, candidates, False
+    generation = asyncio.ensure_future(
+        _generations.do(key, lambda: _generate(key, request))
+    )
+    try:
+        if on_text is not None:
+            await _stream(key, generation, on_text)
+        return key, await generation, True
+    finally:
+        # Only stops waiting when cancelled, the generation goes on for whoever else waits
+        generation.cancel()
@@ -0,0 +1,252 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+
+from core.ai.models import models
+
+logger = logging.getLogger(__name__)
+
+# Set in each worker process by _init_worker
+_run: Callable[[Any, Callable[[], bool]], Any] | None = None
+_cancelled = None
+_progress = None
+
+
+def _init_worker(
+    load: Callable[..., None], load_args: tuple, run: Callable, cancelled, progress
+) -> None:
+    global _run, _cancelled, _progress
+    _run, _cancelled, _progress = run, cancelled, progress
+    load(*load_args)
+
+
+def publish(key: str, value: Any) -> None:
+    """
+    Shares a partial result (e.g. the text generated so far) of a running request with the
+    main process, which reads it with `InferenceService.progress`. Only callable from `run`.
+
+    Args:
+        key (str): Identifies the result, e.g. a key passed in the request's payload.
+        value (Any): The partial result. Must be picklable.
+    """
+
+    _progress[key] = value
+
+
+def _call(request_id: int, payload: Any) -> Any:
+    def should_stop() -> bool:
+        return request_id in _cancelled
+
+    try:
+        return _run(payload, should_stop)
+    finally:
+        _cancelled.pop(request_id, None)
+
+
+def _loaded_models() -> dict:
+    return models.stats()
+
+
+class InferenceTimeout(Exception):
+    """
+    Raised when an inference request didn't finish within its timeout.
+    """
+
+
+class InferenceService:
+    """
+    Runs model inference in a pool of worker processes, so torch never blocks the event loop.
+
+    Each worker calls `load(*load_args)` once, to load its model, and then `run(payload,
+    should_stop)` for every request. `run` should call `should_stop()` regularly (e.g. from a
+    transformers StoppingCriteria) and return early when it's True: the request timed out or
+    its caller was cancelled, and nobody is waiting for the result anymore.
+
+    `run` can share partial results while it runs by calling `publish`, e.g. to stream
+    generated text to the user.
+
+    `load` and `run` must be module-level functions, the workers are started with "spawn"
+    (forking a process that already imported torch is unsafe).
+    """
+
+    def __init__(
+        self,
+        load: Callable[..., None],
+        run: Callable[[Any, Callable[[], bool]], Any],
+        load_args: tuple = (),
+        workers: int = 1,
+        timeout: float = 60,
+    ):
+        """
+        Args:
+            load (Callable[..., None]): Loads the model in a worker process.
+            run (Callable[[Any, Callable[[], bool]], Any]): Runs one request in a worker
+                process and returns its (picklable) result.
+            load_args (tuple, optional): Arguments for `load`. Defaults to ().
+            workers (int, optional): Worker processes, each with its own copy of the model.
+                Defaults to 1.
+            timeout (float, optional): Default seconds a request may take. Defaults to 60.
+        """
+
+        self.load = load
+        self.run = run
+        self.load_args = load_args
+        self.workers = workers
+        self.timeout = timeout
+        self._pool: ProcessPoolExecutor | None = None
+        self._manager = None
+        self._cancelled = None
+        self._progress = None
+        self._ids = itertools.count()
+        self._preloading: asyncio.Future | None = None
+
+    def start(self) -> None:
+        """
+        Starts the worker processes. They load their model on their first request.
+        """
+
+        if self._pool is not None:
+            return
+        context = multiprocessing.get_context("spawn")
+        if self._manager is None:
+            self._manager = context.Manager()
+            # Request IDs whose result nobody waits for anymore
+            self._cancelled = self._manager.dict()
+            # Partial results published by running requests
+            self._progress = self._manager.dict()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(
+                self.load,
+                self.load_args,
+                self.run,
+                self._cancelled,
+                self._progress,
+            ),
+        )
+
+    def preload(self) -> asyncio.Future:
+        """
+        Starts every worker now, so they load their model in the background instead of on the
+        first requests. Their load times and memory are logged once they're done.
+
+        Returns:
+            asyncio.Future: Resolves to each worker's loaded models, see `ModelRegistry.stats`.
+        """
+
+        if self._preloading is None:
+            self.start()
+            # Each request spawns a worker while none is idle
+            futures = [self._pool.submit(_loaded_models) for _ in range(self.workers)]
+            self._preloading = asyncio.gather(*map(asyncio.wrap_future, futures))
+            self._preloading.add_done_callback(self._preloaded)
+        return self._preloading
+
+    @staticmethod
+    def _preloaded(preloading: asyncio.Future) -> None:
+        if preloading.cancelled():
+            return
+        if preloading.exception() is not None:
+            logger.error(
+                "Preloading inference workers failed: %s", preloading.exception()
+            )
+        else:
+            logger.info("Inference workers loaded: %s", preloading.result())
+
+    def stop(self) -> None:
+        """
+        Stops the worker processes, cancelling the requests that haven't started.
+        """
+
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._preloading = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = self._cancelled = self._progress = None
+
+    def progress(self, key: str) -> Any:
+        """
+        Returns the latest partial result a running request published under `key`.
+
+        Args:
+            key (str): Identifies the result.
+
+        Returns:
+            Any: The partial result, or None if nothing was published yet.
+        """
+
+        if self._progress is None:
+            return None
+        return self._progress.get(key)
+
+    def clear_progress(self, key: str) -> None:
+        """
+        Forgets the partial result published under `key`, once its request is done.
+
+        Args:
+            key (str): Identifies the result.
+        """
+
+        if self._progress is not None:
+            self._progress.pop(key, None)
+
+    async def submit(self, payload: Any, timeout: float | None = None) -> Any:
+        """
+        Queues a request and waits for its result.
+
+        If the request times out or the caller is cancelled, the request is dropped if it
+        hasn't started yet, and asked to stop otherwise.
+
+        Args:
+            payload (Any): The request, passed to `run`. Must be picklable.
+            timeout (float, optional): Seconds to wait. Defaults to the service's timeout.
+
+        Returns:
+            Any: What `run` returned.
+
+        Raises:
+            InferenceTimeout: The request didn't finish in time.
+        """
+
+        self.start()
+        request_id = next(self._ids)
+        try:
+            future = self._pool.submit(_call, request_id, payload)
+        except BrokenProcessPool:
+            self._pool = None
+            self.start()
+            future = self._pool.submit(_call, request_id, payload)
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future),
+                self.timeout if timeout is None else timeout,
+            )
+        except asyncio.TimeoutError:
+            self._abandon(request_id, future)
+            raise InferenceTimeout(f"Inference request {request_id} timed out")
+        except asyncio.CancelledError:
+            self._abandon(request_id, future)
+            raise
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for using too much memory, or its model failed to
+            # load), the next request starts new ones
+            logger.error("Inference workers died, restarting them on the next request")
+            self._pool = None
+            raise
+
+    def _abandon(self, request_id: int, future: Future) -> None:
+        if future.cancel() or future.done():
+            # It never started, or already finished
+            return
+        cancelled = self._cancelled
+        cancelled[request_id] = True
+        # In case the worker finished before it saw the flag
+        future.add_done_callback(lambda _: cancelled.pop(request_id, None))
@@ -0,0 +1,185 @@
+import logging
+import resource
+import threading
+import time
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+def _size_mb(loaded: Any) -> float:
+    # Weights and buffers of the torch modules in `loaded` (a model, a pipeline, or a tuple
+    # holding them); tokenizers have none
+    parts = loaded if isinstance(loaded, tuple) else (loaded,)
+    size = 0
+    for part in parts:
+        module = getattr(part, "model", part)
+        for tensors in ("parameters", "buffers"):
+            if callable(getattr(module, tensors, None)):
+                size += sum(
+                    t.numel() * t.element_size() for t in getattr(module, tensors)()
+                )
+    return round(size / 2**20, 1)
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class ModelRegistry:
+    """
+    Loads models on first use and shares one instance of each per process.
+
+    Models are identified by a key, and loaded by the `load` callable passed along with it.
+    Concurrent callers of a model that is still loading wait for that load instead of
+    starting their own.
+    """
+
+    def __init__(self):
+        self._models: dict[str, Any] = {}
+        self._stats: dict[str, dict] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, load: Callable[[], Any]) -> Any:
+        """
+        Returns the model, loading it if this process hasn't yet.
+
+        Args:
+            key (str): Identifies the model.
+            load (Callable[[], Any]): Loads the model.
+
+        Returns:
+            Any: What `load` returned.
+        """
+
+        if key in self._models:
+            return self._models[key]
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in self._models:
+                started = time.monotonic()
+                loaded = load()
+                self._stats[key] = {
+                    "load_seconds": round(time.monotonic() - started, 2),
+                    "size_mb": _size_mb(loaded),
+                    "peak_rss_mb": _peak_rss_mb(),
+                }
+                logger.info("Loaded %s: %s", key, self._stats[key])
+                self._models[key] = loaded
+        return self._models[key]
+
+    def preload(self, key: str, load: Callable[[], Any]) -> threading.Thread:
+        """
+        Loads the model in a background thread, so its first user doesn't wait for it.
+
+        Args:
+            key (str): Identifies the model.
+            load (Callable[[], Any]): Loads the model.
+
+        Returns:
+            threading.Thread: The thread loading it.
+        """
+
+        def run():
+            try:
+                self.get(key, load)
+            except Exception as e:
+                # Its first user retries the load and gets the error
+                logger.error("Preloading %s failed: %s", key, e)
+
+        thread = threading.Thread(target=run, name=f"preload {key}", daemon=True)
+        thread.start()
+        return thread
+
+    def loaded(self, key: str) -> bool:
+        """
+        Returns:
+            bool: Whether this process already loaded the model.
+        """
+
+        return key in self._models
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Per loaded model, its load time in seconds, the size of its weights in MB,
+            and the process's peak RSS in MB right after it loaded.
+        """
+
+        return dict(self._stats)
+
+
+models = ModelRegistry()
+
+
+def _load_seq2seq(model_name: str):
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+    model.eval()
+    return AutoTokenizer.from_pretrained(model_name), model
+
+
+def _load_causal_lm(model_name: str):
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    model = AutoModelForCausalLM.from_pretrained(model_name)
+    model.eval()
+    return AutoTokenizer.from_pretrained(model_name), model
+
+
+def _load_text_generation(model_name: str):
+    from transformers import pipeline
+
+    # Built on the shared causal LM, so the weights are loaded once for both
+    tokenizer, model = causal_lm(model_name)
+    return pipeline("text-generation", model=model, tokenizer=tokenizer)
+
+
+def seq2seq(model_name: str) -> tuple:
+    """
+    Returns the shared tokenizer and seq2seq model (e.g. flan-t5), loading them on first use.
+
+    Args:
+        model_name (str): The Hugging Face model.
+
+    Returns:
+        tuple: The tokenizer and the model.
+    """
+
+    return models.get(f"seq2seq:{model_name}", lambda: _load_seq2seq(model_name))
+
+
+def causal_lm(model_name: str) -> tuple:
+    """
+    Returns the shared tokenizer and causal language model (e.g. gpt2), loading them on first
+    use.
+
+    Args:
+        model_name (str): The Hugging Face model.
+
+    Returns:
+        tuple: The tokenizer and the model.
+    """
+
+    return models.get(f"causal_lm:{model_name}", lambda: _load_causal_lm(model_name))
+
+
+def text_generation(model_name: str):
+    """
+    Returns the shared text-generation pipeline, loading it on first use. It runs the model
+    `causal_lm` returns, so both share one copy of the weights.
+
+    Args:
+        model_name (str): The Hugging Face model.
+
+    Returns:
+        Pipeline: The pipeline.
+    """
+
+    return models.get(
+        f"text_generation:{model_name}", lambda: _load_text_generation(model_name)
+    )
@@ -1,20 +1,227 @@
 import os
-import json
-from datetime import timedelta
-import redis
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Mapping
+
+from redis.asyncio import ConnectionPool, Redis
+
+from core.database.serializers import JsonSerializer, Serializer, get_serializer
+
+# Shared by every RedisCache (and other redis.asyncio users) in the process
+redis_pool = ConnectionPool(
+    host=os.getenv("REDIS_HOST", "localhost"),
+    port=6379,
+    password=os.getenv("REDIS_PASS", None),
+    # Cached values are binary; str users (e.g. navigation) convert what they read
+    decode_responses=False,
+    max_connections=int(os.getenv("REDIS_POOL_MAX", "50")),
+)
+
+# Lua scripts for leases held as `SET key <holder> NX EX ttl`. A lease is renewed (ARGV: holder,
+# ttl) and released (ARGV: holder) only by its holder, so a holder that stalled past the TTL
+# neither extends nor drops the lease someone else has taken over since. Both return 0 when the
+# caller no longer holds the lease.
+RENEW_LEASE = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("EXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LEASE = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+# Bump to start over with an empty cache keyspace, e.g. when the meaning of a key changes
+CACHE_KEY_VERSION = 1
+
+
+def _job_key(job_id: int) -> str:
+    # Bump the version whenever the cached job fields change, so old entries are never read
+    return f"job:v4:{job_id}"
+
+
+_MISSING = object()
+
+
+class LocalCache:
+    """
+    A size-bounded, in-process LRU with a short TTL, used as the first tier in front of Redis.
+
+    Values are returned as stored, without copying, so callers must treat them as read-only.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default: Any = _MISSING) -> Any:
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
 
 
 class RedisCache:
-    redis_host = os.getenv("REDIS_HOST", "localhost")
-    redis_password = os.getenv("REDIS_PASS", None)
-
-    def __init__(self):
-        self.r = redis.StrictRedis(
-            host=self.redis_host,
-            port=6379,
-            password=self.redis_password,
-            decode_responses=True,
-        )
+    def __init__(
+        self,
+        client: Redis | None = None,
+        local: LocalCache | None = None,
+        serializer: Serializer | None = None,
+    ):
+        """
+        Args:
+            client (Redis, optional): The Redis client. Defaults to a client on `redis_pool`.
+            local (LocalCache, optional): An in-process tier checked before Redis. Values read
+                from or written to Redis are kept there too, so repeat lookups in this process
+                skip the network hop. Defaults to None (Redis only).
+            serializer (Serializer, optional): The codec for values stored in Redis. Defaults
+                to JSON.
+        """
+
+        self.r = client or Redis(connection_pool=redis_pool)
+        self.local = local
+        self.serializer = serializer or JsonSerializer()
+        # Keys carry the codec, so switching codecs starts on fresh keys instead of reading
+        # values the new codec can't decode; the old ones simply expire
+        self.prefix = f"v{CACHE_KEY_VERSION}:{self.serializer.name}:"
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def _dumps(self, value: Any) -> bytes:
+        return self.serializer.dumps(value)
+
+    def _loads(self, raw: bytes | None) -> Any:
+        return self.serializer.loads(raw) if raw is not None else None
+
+    async def get(self, key: str) -> Any:
+        """
+        Retrieves a value from the Redis cache.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Any: The cached value, or None if the key is not cached.
+        """
+
+        if self.local is not None:
+            value = self.local.get(key)
+            if value is not _MISSING:
+                return value
+
+        value = self._loads(await self.r.get(self._key(key)))
+        if self.local is not None and value is not None:
+            self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: int = 3600):
+        """
+        Stores a value in the Redis cache.
+
+        Args:
+            key (str): The cache key.
+            value (Any): The value to store, anything the serializer can encode.
+            ttl (int, optional): The number of seconds to keep the value. Defaults to 3600.
+        """
+
+        raw = self._dumps(value)
+        await self.r.set(self._key(key), raw, ex=ttl)
+        if self.local is not None:
+            # Keep what a Redis read would return (JSON turns dates into strings), not the original
+            self.local.set(key, self._loads(raw), ttl)
+
+    async def delete(self, *keys: str):
+        """
+        Removes one or more keys from the Redis cache.
+
+        Args:
+            *keys (str): The cache keys to remove.
+        """
+
+        if not keys:
+            return
+        if self.local is not None:
+            self.local.delete(*keys)
+        await self.r.delete(*(self._key(key) for key in keys))
+
+    async def get_many(self, keys: Iterable[str]) -> list[Any]:
+        """
+        Retrieves several values from the Redis cache in a single MGET round trip.
+
+        Args:
+            keys (Iterable[str]): The cache keys.
+
+        Returns:
+            list[Any]: The cached values in the order of `keys`, None for keys not cached.
+        """
+
+        keys = list(keys)
+        if not keys:
+            return []
+
+        if self.local is None:
+            return [
+                self._loads(raw)
+                for raw in await self.r.mget([self._key(key) for key in keys])
+            ]
+
+        values = [self.local.get(key) for key in keys]
+        missing = [i for i, value in enumerate(values) if value is _MISSING]
+        if missing:
+            fetched = await self.r.mget([self._key(keys[i]) for i in missing])
+            for i, raw in zip(missing, fetched):
+                values[i] = self._loads(raw)
+                if values[i] is not None:
+                    self.local.set(keys[i], values[i])
+        return values
+
+    async def set_many(self, values: Mapping[str, Any], ttl: int = 3600):
+        """
+        Stores several values in the Redis cache in a single pipelined round trip.
+
+        Args:
+            values (Mapping[str, Any]): The values to store by cache key.
+            ttl (int, optional): The number of seconds to keep the values. Defaults to 3600.
+        """
+
+        if not values:
+            return
+        raws = {key: self._dumps(value) for key, value in values.items()}
+        async with self.r.pipeline(transaction=False) as pipe:
+            for key, raw in raws.items():
+                pipe.set(self._key(key), raw, ex=ttl)
+            await pipe.execute()
+        if self.local is not None:
+            for key, raw in raws.items():
+                self.local.set(key, self._loads(raw), ttl)
 
     async def get_job(self, job_id: int):
         """
@@ -27,10 +234,7 @@ class RedisCache:
             dict or None: The job's details if it exists in the cache, None otherwise.
         """
 
-        cached = self.r.get(f"job:{job_id}")
-        if cached:
-            return json.loads(cached)
-        return None
+        return await self.get(_job_key(job_id))
 
     async def set_job(self, job_id: int, data: dict, ttl: int = 3600):
         """
@@ -42,7 +246,33 @@ class RedisCache:
             ttl (int, optional): The number of seconds to store the job in the cache. Defaults to 3600.
         """
 
-        self.r.setex(f"job:{job_id}", timedelta(seconds=ttl), json.dumps(data))
+        await self.set(_job_key(job_id), data, ttl)
+
+    async def get_jobs(self, job_ids: Iterable[int]) -> list[dict | None]:
+        """
+        Retrieves several jobs from the Redis cache in one round trip.
+
+        Args:
+            job_ids (Iterable[int]): The IDs of the jobs to retrieve.
+
+        Returns:
+            list[dict | None]: The jobs' details in the order of `job_ids`, None for jobs not cached.
+        """
+
+        return await self.get_many(_job_key(job_id) for job_id in job_ids)
+
+    async def set_jobs(self, jobs: Mapping[int, dict], ttl: int = 3600):
+        """
+        Stores several jobs in the Redis cache in one round trip.
+
+        Args:
+            jobs (Mapping[int, dict]): The jobs' details by job ID.
+            ttl (int, optional): The number of seconds to store the jobs in the cache. Defaults to 3600.
+        """
+
+        await self.set_many(
+            {_job_key(job_id): data for job_id, data in jobs.items()}, ttl
+        )
 
     async def invalidate_job(self, job_id: int):
         """
@@ -52,8 +282,14 @@ class RedisCache:
             job_id (int): The ID of the job to invalidate.
         """
 
-        self.r.delete(f"job:{job_id}")
+        await self.delete(_job_key(job_id))
 
 
 # Initialize cache
-cache = RedisCache()
+cache = RedisCache(
+    local=LocalCache(
+        maxsize=int(os.getenv("LOCAL_CACHE_MAXSIZE", "10000")),
+        ttl=float(os.getenv("LOCAL_CACHE_TTL", "30")),
+    ),
+    serializer=get_serializer(os.getenv("CACHE_SERIALIZER", "msgpack")),
+)
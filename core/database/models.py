@@ -7,11 +7,13 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     SmallInteger,
     BigInteger,
     String,
     Text,
+    text,
 )
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
@@ -24,7 +26,7 @@ class Base(AsyncAttrs, DeclarativeBase):
     deleted_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
 
 
-class UserRole(str, IntEnum):
+class UserRole(IntEnum):
     APPLICANT = 1
     EMPLOYER = 2
     ADMIN = 3
@@ -32,6 +34,12 @@ class UserRole(str, IntEnum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_telegram_id_role_id", "telegram_id", "role_id"),
+        Index(
+            "ix_users_subscribed_alerts", "subscribed_alerts", postgresql_using="gin"
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     telegram_id: Mapped[str] = mapped_column(BigInteger, nullable=False)
@@ -87,6 +95,7 @@ class Category(Base):
 
 class Company(Base):
     __tablename__ = "companies"
+    __table_args__ = (Index("ix_companies_user_id", "user_id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(
@@ -117,6 +126,15 @@ class Company(Base):
 
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        Index(
+            "ix_jobs_open_created_at_id",
+            "created_at",
+            "id",
+            postgresql_where=text("job_status IS DISTINCT FROM 'closed'"),
+        ),
+        Index("ix_jobs_user_id_created_at", "user_id", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     company_id: Mapped[int] = mapped_column(
@@ -173,6 +191,11 @@ class Job(Base):
 
 class Application(Base):
     __tablename__ = "applications"
+    __table_args__ = (
+        Index("ix_applications_job_id_created_at", "job_id", "created_at"),
+        Index("ix_applications_user_id_created_at", "user_id", "created_at"),
+        Index("uq_applications_job_id_user_id", "job_id", "user_id", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     job_id: Mapped[int] = mapped_column(
@@ -203,6 +226,10 @@ class Application(Base):
 
 class SavedJob(Base):
     __tablename__ = "saved_jobs"
+    __table_args__ = (
+        Index("ix_saved_jobs_user_id_created_at", "user_id", "created_at"),
+        Index("uq_saved_jobs_job_id_user_id", "job_id", "user_id", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     job_id: Mapped[int] = mapped_column(
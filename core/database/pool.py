@@ -0,0 +1,291 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable
+
+import psycopg2
+from psycopg2 import extensions
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """
+    Raised when no connection could be checked out of the pool within the checkout timeout.
+    """
+
+
+class ConnectionPool:
+    """
+    A process-wide, thread-safe pool of psycopg2 connections.
+
+    Connections are opened lazily up to `maxconn`, `minconn` connections are kept warm once the
+    pool is first used, and every checkout is health checked before it is handed out. Callers
+    that find the pool exhausted wait up to `timeout` seconds before `PoolTimeout` is raised.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        minconn: int = 1,
+        maxconn: int = 10,
+        timeout: float = 30.0,
+        health_check_after: float = 30.0,
+    ):
+        """
+        Args:
+            connect (Callable[[], Any]): Factory returning a new DB-API connection.
+            minconn (int, optional): Connections kept open once the pool is in use. Defaults to 1.
+            maxconn (int, optional): Upper bound on open connections. Defaults to 10.
+            timeout (float, optional): Seconds to wait for a free connection. Defaults to 30.0.
+            health_check_after (float, optional): Idle seconds after which a connection is pinged
+                with `SELECT 1` on checkout. Defaults to 30.0.
+        """
+
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError(
+                "Invalid pool size: expected 0 <= minconn <= maxconn, maxconn >= 1"
+            )
+
+        self._connect = connect
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+
+        self._lock = threading.Condition()
+        self._idle: list[tuple[Any, float]] = []  # (connection, returned_at)
+        self._in_use: set[int] = set()
+        self._size = 0
+        self._waiting = 0
+        self._pid = os.getpid()
+        self._closed = False
+
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._discarded = 0
+        self._health_check_failures = 0
+        self._wait_time = 0.0
+
+    @contextmanager
+    def connection(self, timeout: float | None = None):
+        """
+        Check a connection out of the pool for the duration of the `with` block.
+
+        The connection is returned to the pool on exit. Any transaction left open by the caller
+        is rolled back so idle connections never sit "idle in transaction".
+        """
+
+        conn = self.getconn(timeout)
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def getconn(self, timeout: float | None = None):
+        """
+        Check out a healthy connection, waiting up to `timeout` seconds if the pool is exhausted.
+
+        Raises:
+            PoolTimeout: If no connection became available in time.
+        """
+
+        timeout = self.timeout if timeout is None else timeout
+        self._check_fork()
+        started = time.monotonic()
+        deadline = started + timeout
+        self._fill_min()
+
+        while True:
+            # Only bookkeeping happens under the lock; connecting and pinging happen outside
+            # it, so one slow server round trip doesn't hold up every other thread
+            conn, returned_at = self._reserve(deadline, timeout)
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                        self._lock.notify()
+                    raise
+                with self._lock:
+                    self._created += 1
+            elif not self._is_healthy(conn, returned_at):
+                with self._lock:
+                    self._health_check_failures += 1
+                    self._discard(conn)
+                    self._lock.notify()
+                continue
+
+            with self._lock:
+                self._in_use.add(id(conn))
+                self._checkouts += 1
+                self._wait_time += time.monotonic() - started
+            return conn
+
+    def _reserve(self, deadline: float, timeout: float) -> tuple[Any, float]:
+        # Takes an idle connection, or reserves a slot for a new one (returned as None)
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self.maxconn:
+                    self._size += 1
+                    return None, 0.0
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f"Timed out after {timeout}s waiting for a database connection "
+                        f"(pool size {self._size}/{self.maxconn})"
+                    )
+                self._waiting += 1
+                try:
+                    self._lock.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+    def putconn(self, conn, discard: bool = False) -> None:
+        """
+        Return a connection to the pool. Broken connections, or ones explicitly discarded,
+        are closed instead of being reused.
+        """
+
+        with self._lock:
+            if id(conn) not in self._in_use:
+                return
+
+        # The caller still owns the connection, so the rollback happens outside the lock
+        if not (discard or self._closed or getattr(conn, "closed", False)):
+            try:
+                status = conn.get_transaction_status()
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    discard = True
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        with self._lock:
+            self._in_use.discard(id(conn))
+            if discard or self._closed or getattr(conn, "closed", False):
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._lock.notify()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns a snapshot of the pool's counters.
+        """
+
+        with self._lock:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "waiting": self._waiting,
+                "minconn": self.minconn,
+                "maxconn": self.maxconn,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "created": self._created,
+                "discarded": self._discarded,
+                "health_check_failures": self._health_check_failures,
+                "avg_wait_ms": (
+                    (self._wait_time / self._checkouts) * 1000
+                    if self._checkouts
+                    else 0.0
+                ),
+            }
+
+    def close(self) -> None:
+        """
+        Close all idle connections and refuse further checkouts. Connections that are
+        currently checked out are closed when they are returned.
+        """
+
+        with self._lock:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+            self._lock.notify_all()
+
+    def _fill_min(self) -> None:
+        with self._lock:
+            missing = max(0, self.minconn - self._size)
+            self._size += missing
+        for opened in range(missing):
+            try:
+                conn = self._connect()
+            except psycopg2.Error as e:
+                logger.warning("Could not pre-open pooled connection: %s", e)
+                with self._lock:
+                    self._size -= missing - opened
+                    self._lock.notify_all()
+                return
+            with self._lock:
+                self._created += 1
+                self._idle.append((conn, time.monotonic()))
+                self._lock.notify()
+
+    def _discard(self, conn) -> None:
+        self._size -= 1
+        self._discarded += 1
+        try:
+            conn.close()
+        except Exception:  # already broken, nothing left to clean up
+            pass
+
+    def _is_healthy(self, conn, returned_at: float) -> bool:
+        if getattr(conn, "closed", False):
+            return False
+
+        if time.monotonic() - returned_at < self.health_check_after:
+            return True
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _check_fork(self) -> None:
+        # Connections must never be shared between a parent and a forked child process
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._idle.clear()
+                self._in_use.clear()
+                self._size = 0
+
+
+def _connect():
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST", "localhost"),
+        database=os.getenv("DB_NAME", "hulumjobs"),
+        user=os.getenv("DB_USER", "postgres"),
+        password=os.getenv("DB_PASSWORD", "postgres"),
+        port=os.getenv("DB_PORT", "5432"),
+    )
+
+
+# Initialize pool
+db_pool = ConnectionPool(
+    _connect,
+    minconn=int(os.getenv("DB_POOL_MIN", "1")),
+    maxconn=int(os.getenv("DB_POOL_MAX", "10")),
+    timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    health_check_after=float(os.getenv("DB_POOL_HEALTH_CHECK_AFTER", "30")),
+)
@@ -0,0 +1,73 @@
+from typing import Any, Mapping
+
+
+class Row:
+    """
+    Base class for lightweight, read-only row types hydrated straight from query results.
+
+    Subclasses only declare `__slots__`, so instances carry no per-instance `__dict__`. Fields
+    are the slots of the class and its bases, in declaration order, and are looked up by name
+    in the result row, so the SELECT list only has to contain (at least) those columns.
+    """
+
+    __slots__ = ()
+    _fields: tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = cls._fields + tuple(cls.__dict__.get("__slots__", ()))
+
+    def __init__(self, **fields: Any):
+        for name in self._fields:
+            object.__setattr__(self, name, fields[name])
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    @classmethod
+    def columns(cls, alias: str | None = None) -> str:
+        """
+        Returns the SELECT list for the fields of this row type.
+
+        Args:
+            alias (str, optional): The table alias to qualify the columns with. Defaults to None.
+
+        Returns:
+            str: The comma separated column list, e.g. "j.job_id, j.job_title".
+        """
+
+        prefix = f"{alias}." if alias else ""
+        return ", ".join(f"{prefix}{name}" for name in cls._fields)
+
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any]):
+        """
+        Builds an instance from a result row.
+
+        Args:
+            row (Mapping[str, Any]): A row mapping, e.g. SQLAlchemy's `Row._mapping` or a dict.
+
+        Returns:
+            Row: The hydrated instance.
+        """
+
+        instance = cls.__new__(cls)
+        for name in cls._fields:
+            object.__setattr__(instance, name, row[name])
+        return instance
+
+    def as_dict(self) -> dict[str, Any]:
+        """
+        Returns the fields as a plain dict, e.g. for JSON serialization.
+        """
+
+        return {name: getattr(self, name) for name in self._fields}
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, n) == getattr(other, n) for n in self._fields)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{n}={getattr(self, n)!r}" for n in self._fields)
+        return f"{type(self).__name__}({fields})"
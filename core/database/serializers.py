@@ -0,0 +1,116 @@
+import datetime
+import json
+import struct
+from typing import Any, Protocol
+
+import msgpack
+
+# msgpack extension type codes
+_EXT_DATE = 1
+_EXT_DATETIME = 2
+
+_DATE = struct.Struct(">i")
+_DATETIME = struct.Struct(">q")
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+class Serializer(Protocol):
+    """
+    Turns cached values into the bytes stored in Redis and back.
+
+    `name` goes into the cache key prefix, so values written by one codec are never read by
+    another.
+    """
+
+    name: str
+
+    def dumps(self, value: Any) -> bytes: ...
+
+    def loads(self, raw: bytes) -> Any: ...
+
+
+def _json_default(obj):
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class JsonSerializer:
+    """
+    JSON, with dates and datetimes written as ISO 8601 strings (and read back as strings).
+    """
+
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, default=_json_default, separators=(",", ":")).encode()
+
+    def loads(self, raw: bytes) -> Any:
+        return json.loads(raw)
+
+
+def _msgpack_default(obj):
+    # datetime is a subclass of date, so check it first
+    if isinstance(obj, datetime.datetime):
+        if obj.tzinfo is not None:
+            # Aware datetimes keep their offset, which needs the ISO form
+            return msgpack.ExtType(_EXT_DATETIME, obj.isoformat().encode())
+        micros = (obj - _EPOCH) // datetime.timedelta(microseconds=1)
+        return msgpack.ExtType(_EXT_DATETIME, _DATETIME.pack(micros))
+    if isinstance(obj, datetime.date):
+        return msgpack.ExtType(_EXT_DATE, _DATE.pack(obj.toordinal()))
+    raise TypeError(f"Object of type {type(obj).__name__} is not msgpack serializable")
+
+
+def _msgpack_ext_hook(code: int, data: bytes):
+    if code == _EXT_DATE:
+        return datetime.date.fromordinal(_DATE.unpack(data)[0])
+    if code == _EXT_DATETIME:
+        if len(data) == _DATETIME.size:
+            return _EPOCH + datetime.timedelta(microseconds=_DATETIME.unpack(data)[0])
+        return datetime.datetime.fromisoformat(data.decode())
+    return msgpack.ExtType(code, data)
+
+
+class MsgpackSerializer:
+    """
+    msgpack, with dates and datetimes round-tripped as native `date` / `datetime` objects.
+
+    Dates take 4 bytes (their ordinal) and naive datetimes 8 (microseconds since the epoch).
+    """
+
+    name = "msgpack"
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=_msgpack_default, use_bin_type=True)
+
+    def loads(self, raw: bytes) -> Any:
+        return msgpack.unpackb(raw, ext_hook=_msgpack_ext_hook, raw=False)
+
+
+SERIALIZERS = {
+    JsonSerializer.name: JsonSerializer,
+    MsgpackSerializer.name: MsgpackSerializer,
+}
+
+
+def get_serializer(name: str) -> Serializer:
+    """
+    Returns the serializer registered under a name.
+
+    Args:
+        name (str): The serializer's name, e.g. "msgpack".
+
+    Returns:
+        Serializer: A new instance of the serializer.
+
+    Raises:
+        ValueError: If no serializer is registered under `name`.
+    """
+
+    try:
+        return SERIALIZERS[name]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown cache serializer {name!r}, expected one of {sorted(SERIALIZERS)}"
+        ) from None
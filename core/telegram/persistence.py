@@ -0,0 +1,213 @@
+import asyncio
+import hashlib
+import json
+import pickle
+from typing import Any
+
+from redis.asyncio import Redis
+from telegram.ext import BasePersistence, PersistenceInput
+
+from core.database.cache import redis_pool
+
+ConversationKey = tuple[int | str, ...]
+
+
+def _digest(raw: bytes) -> bytes:
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
+
+def _conversation_field(key: ConversationKey) -> str:
+    return json.dumps(list(key))
+
+
+class RedisPersistence(BasePersistence):
+    """
+    Keeps user data, chat data, bot data, callback data and ConversationHandler states in Redis,
+    so a bot restart doesn't lose in-flight flows and several replicas share the same state.
+
+    Layout, under `prefix` (e.g. "ptb:employer:"):
+
+    - user_data:<user_id> and chat_data:<chat_id>: one key per user / chat
+    - bot_data and callback_data: one key each
+    - conversations:<name>: a hash with one field per conversation key
+
+    Values are pickled, like PicklePersistence, so drafts in `context.user_data` can hold
+    anything (dates, Telegram objects...).
+
+    python-telegram-bot already tells the persistence which users, chats and conversations were
+    touched. On top of that, values whose pickled bytes didn't change since they were last read
+    or written are skipped, and all the writes of one `update_persistence` run are coalesced
+    into a single pipelined round trip.
+
+    Before each update, `refresh_user_data` / `refresh_chat_data` re-read the user's and chat's
+    data, so a replica picks up what another one wrote. ConversationHandler states are only
+    read at startup though, so all of a user's updates must keep going to the same replica, as
+    the partitioned webhook (core.telegram.webhook) does.
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        client: Redis | None = None,
+        store_data: PersistenceInput | None = None,
+        update_interval: float = 5,
+    ):
+        """
+        Args:
+            prefix (str): Prepended to every key, e.g. "ptb:employer:". Bots must not share it.
+            client (Redis, optional): The Redis client. Defaults to a client on `redis_pool`.
+            store_data (PersistenceInput, optional): What to persist. Defaults to everything.
+            update_interval (float, optional): Seconds between writes of the changed data.
+                Defaults to 5.
+        """
+
+        super().__init__(store_data=store_data, update_interval=update_interval)
+        self.prefix = prefix
+        self.r = client or Redis(connection_pool=redis_pool)
+        # Digest of what Redis holds for each key, as far as this process knows
+        self._digests: dict[str, bytes] = {}
+        # (key, hash field or None) -> (operation, value)
+        self._pending: dict[tuple[str, str | None], tuple[str, Any]] = {}
+        self._batch: asyncio.Future | None = None
+
+    def _key(self, *parts: Any) -> str:
+        return self.prefix + ":".join(str(part) for part in parts)
+
+    # -- writes -------------------------------------------------------------------------------
+
+    async def _write(
+        self, key: str, op: str, value: Any = None, field: str | None = None
+    ) -> None:
+        """
+        Queues a write and waits until the batch it joined is in Redis. Every write queued
+        before the batch starts shares its round trip.
+        """
+
+        self._pending[(key, field)] = (op, value)
+        if self._batch is None:
+            self._batch = asyncio.ensure_future(self._write_batch())
+        await asyncio.shield(self._batch)
+
+    async def _write_batch(self) -> None:
+        # Let the other coroutines gathered by update_persistence queue their writes first
+        await asyncio.sleep(0)
+        pending, self._pending, self._batch = self._pending, {}, None
+
+        async with self.r.pipeline(transaction=False) as pipe:
+            for (key, field), (op, value) in pending.items():
+                if op == "set":
+                    pipe.set(key, value)
+                elif op == "hset":
+                    pipe.hset(key, field, value)
+                elif op == "hdel":
+                    pipe.hdel(key, field)
+                else:
+                    pipe.delete(key)
+            await pipe.execute()
+
+    async def _set_if_changed(self, key: str, data: Any) -> None:
+        raw = pickle.dumps(data)
+        digest = _digest(raw)
+        if self._digests.get(key) == digest:
+            return
+        await self._write(key, "set", raw)
+        self._digests[key] = digest
+
+    async def _drop(self, key: str) -> None:
+        self._digests.pop(key, None)
+        await self._write(key, "delete")
+
+    # -- reads --------------------------------------------------------------------------------
+
+    async def _load(self, key: str) -> Any:
+        raw = await self.r.get(key)
+        if raw is None:
+            self._digests.pop(key, None)
+            return None
+        self._digests[key] = _digest(raw)
+        return pickle.loads(raw)
+
+    async def _load_all(self, kind: str) -> dict[int, Any]:
+        keys = [key async for key in self.r.scan_iter(match=self._key(kind, "*"))]
+        if not keys:
+            return {}
+
+        loaded = {}
+        for key, raw in zip(keys, await self.r.mget(keys)):
+            if raw is None:
+                continue
+            key = key.decode() if isinstance(key, bytes) else key
+            self._digests[key] = _digest(raw)
+            loaded[int(key.rsplit(":", 1)[1])] = pickle.loads(raw)
+        return loaded
+
+    async def _refresh(self, key: str, data: dict) -> None:
+        raw = await self.r.get(key)
+        if raw is None or self._digests.get(key) == _digest(raw):
+            return
+        # Another replica changed it, update in place so the handler sees the new data
+        self._digests[key] = _digest(raw)
+        data.clear()
+        data.update(pickle.loads(raw))
+
+    # -- BasePersistence ----------------------------------------------------------------------
+
+    async def get_user_data(self) -> dict[int, Any]:
+        return await self._load_all("user_data")
+
+    async def get_chat_data(self) -> dict[int, Any]:
+        return await self._load_all("chat_data")
+
+    async def get_bot_data(self) -> Any:
+        return await self._load(self._key("bot_data")) or {}
+
+    async def get_callback_data(self) -> Any:
+        return await self._load(self._key("callback_data"))
+
+    async def get_conversations(self, name: str) -> dict[ConversationKey, object]:
+        states = await self.r.hgetall(self._key("conversations", name))
+        return {
+            tuple(json.loads(field)): pickle.loads(state)
+            for field, state in states.items()
+        }
+
+    async def update_conversation(
+        self, name: str, key: ConversationKey, new_state: object | None
+    ) -> None:
+        hash_key, field = self._key("conversations", name), _conversation_field(key)
+        if new_state is None:
+            await self._write(hash_key, "hdel", field=field)
+        else:
+            await self._write(hash_key, "hset", pickle.dumps(new_state), field=field)
+
+    async def update_user_data(self, user_id: int, data: Any) -> None:
+        await self._set_if_changed(self._key("user_data", user_id), data)
+
+    async def update_chat_data(self, chat_id: int, data: Any) -> None:
+        await self._set_if_changed(self._key("chat_data", chat_id), data)
+
+    async def update_bot_data(self, data: Any) -> None:
+        await self._set_if_changed(self._key("bot_data"), data)
+
+    async def update_callback_data(self, data: Any) -> None:
+        await self._set_if_changed(self._key("callback_data"), data)
+
+    async def drop_user_data(self, user_id: int) -> None:
+        await self._drop(self._key("user_data", user_id))
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        await self._drop(self._key("chat_data", chat_id))
+
+    async def refresh_user_data(self, user_id: int, user_data: Any) -> None:
+        await self._refresh(self._key("user_data", user_id), user_data)
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: Any) -> None:
+        await self._refresh(self._key("chat_data", chat_id), chat_data)
+
+    async def refresh_bot_data(self, bot_data: Any) -> None:
+        # Shared by every user, re-reading it per update isn't worth a round trip
+        pass
+
+    async def flush(self) -> None:
+        if self._batch is not None:
+            await asyncio.shield(self._batch)
@@ -0,0 +1,276 @@
+import asyncio
+import datetime
+import heapq
+import itertools
+import logging
+import time
+from collections import Counter
+from typing import Any, Callable, Coroutine
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Lanes, passed as `rate_limit_args` to any bot method. Lower goes first.
+# - replies: answers to what the user just did, the default
+# - notifications: messages to another user, e.g. a new application for an employer
+# - broadcasts: channel posts and group notifications
+PRIORITY_REPLY = 0
+PRIORITY_NOTIFICATION = 1
+PRIORITY_BROADCAST = 2
+
+# Chat buckets kept before the first sweep of the idle ones
+CHAT_SWEEP_MIN = 10_000
+
+LANES = {
+    PRIORITY_REPLY: "reply",
+    PRIORITY_NOTIFICATION: "notification",
+    PRIORITY_BROADCAST: "broadcast",
+}
+
+
+class TokenBucket:
+    """
+    Allows `rate` requests per second on average, with bursts of up to `capacity` requests.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """
+        Returns:
+            float: Seconds until a token is available, 0 if one is available now.
+        """
+
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def full(self) -> bool:
+        """
+        Returns:
+            bool: Whether the bucket has refilled to capacity, i.e. a new bucket would do.
+        """
+
+        self._refill()
+        return self.tokens >= self.capacity
+
+    def reserve(self) -> float:
+        """
+        Takes a token, borrowing it from the future if none is left.
+
+        Returns:
+            float: Seconds to wait before using the token.
+        """
+
+        self._refill()
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+
+class _PriorityGate:
+    """
+    A token bucket whose waiters are served by priority, then first come, first served.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.bucket = TokenBucket(rate, capacity)
+        self.paused_until = 0.0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._pump: asyncio.Task | None = None
+
+    def waiting(self) -> Counter:
+        return Counter(
+            priority for priority, _, future in self._waiters if not future.done()
+        )
+
+    async def acquire(self, priority: int) -> None:
+        if (
+            not self._waiters
+            and time.monotonic() >= self.paused_until
+            and self.bucket.delay() == 0
+        ):
+            self.bucket.take()
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), future))
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._serve())
+        await future
+
+    async def _serve(self) -> None:
+        while self._waiters:
+            wait = max(self.bucket.delay(), self.paused_until - time.monotonic())
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                # The caller was cancelled while waiting
+                continue
+            self.bucket.take()
+            future.set_result(None)
+
+    def close(self) -> None:
+        if self._pump is not None:
+            self._pump.cancel()
+        for _, _, future in self._waiters:
+            future.cancel()
+        self._waiters = []
+
+
+class OutboundRateLimiter(BaseRateLimiter[int]):
+    """
+    Keeps every request the bot sends to a chat within Telegram's limits: about 30 messages per
+    second overall, 1 per second in a private chat and 20 per minute in a group or channel.
+
+    Requests over the limits wait instead of failing. When the global bucket is the bottleneck,
+    replies to users go ahead of notifications, and notifications go ahead of broadcasts; pass
+    e.g. `rate_limit_args=PRIORITY_BROADCAST` to any bot method to pick the lane. If Telegram
+    still answers with RetryAfter, all requests pause for the time it asks and the request is
+    retried, up to `max_retries` times.
+
+    Requests without a chat (answering callback queries, setting the webhook...) are not
+    throttled.
+    """
+
+    def __init__(
+        self,
+        overall_rate: float = 30,
+        private_chat_rate: float = 1,
+        group_rate: float = 20 / 60,
+        chat_burst: float = 3,
+        max_retries: int = 3,
+    ):
+        """
+        Args:
+            overall_rate (float, optional): Requests per second across all chats. Defaults to 30.
+            private_chat_rate (float, optional): Requests per second to one private chat.
+                Defaults to 1.
+            group_rate (float, optional): Requests per second to one group or channel.
+                Defaults to 20 per minute.
+            chat_burst (float, optional): Requests one chat may receive at once before being
+                throttled. Defaults to 3.
+            max_retries (int, optional): Retries of a request Telegram answered with
+                RetryAfter. Defaults to 3.
+        """
+
+        self.overall_rate = overall_rate
+        self.private_chat_rate = private_chat_rate
+        self.group_rate = group_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._gate = _PriorityGate(overall_rate, overall_rate)
+        # Only full buckets are dropped, one still owing tokens coming back full would hand its
+        # chat a fresh burst. Full ones are swept whenever the dict doubles since the last sweep.
+        self._chats: dict[int | str, TokenBucket] = {}
+        self._sweep_at = CHAT_SWEEP_MIN
+        self.sent: Counter = Counter()
+        self.retried = 0
+        self.failed = 0
+        self.waited = 0.0
+
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self._sweep_at:
+                self._sweep()
+            # Group and channel IDs are negative, and channels can also be given by @username
+            private = isinstance(chat_id, int) and chat_id > 0
+            rate = self.private_chat_rate if private else self.group_rate
+            bucket = self._chats[chat_id] = TokenBucket(rate, self.chat_burst)
+        return bucket
+
+    def _sweep(self) -> None:
+        self._chats = {
+            chat_id: bucket
+            for chat_id, bucket in self._chats.items()
+            if not bucket.full()
+        }
+        self._sweep_at = max(CHAT_SWEEP_MIN, 2 * len(self._chats))
+
+    async def _throttle(self, chat_id: int | str, priority: int) -> None:
+        started = time.monotonic()
+        # Wait for the chat's turn first, so a throttled chat doesn't hold an overall token
+        delay = self._chat_bucket(chat_id).reserve()
+        if delay:
+            await asyncio.sleep(delay)
+        await self._gate.acquire(priority)
+        self.waited += time.monotonic() - started
+
+    def metrics(self) -> dict:
+        """
+        Returns:
+            dict: Requests sent and waiting per lane, RetryAfter retries, requests that failed
+            after all their retries, and the seconds spent throttled in total.
+        """
+
+        waiting = self._gate.waiting()
+        return {
+            "sent": {LANES.get(p, str(p)): n for p, n in self.sent.items()},
+            "waiting": {LANES.get(p, str(p)): n for p, n in waiting.items()},
+            "retried": self.retried,
+            "failed": self.failed,
+            "waited": round(self.waited, 3),
+        }
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        self._gate.close()
+        logger.info("Outbound requests: %s", self.metrics())
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Any]],
+        args: Any,
+        kwargs: dict[str, Any],
+        endpoint: str,
+        data: dict[str, Any],
+        rate_limit_args: int | None,
+    ) -> Any:
+        chat_id = data.get("chat_id")
+        priority = PRIORITY_REPLY if rate_limit_args is None else rate_limit_args
+
+        for attempt in range(self.max_retries + 1):
+            if chat_id is not None:
+                await self._throttle(chat_id, priority)
+            try:
+                result = await callback(*args, **kwargs)
+            except RetryAfter as e:
+                retry_after = e.retry_after
+                if isinstance(retry_after, datetime.timedelta):
+                    retry_after = retry_after.total_seconds()
+                if attempt == self.max_retries:
+                    self.failed += 1
+                    raise
+                self.retried += 1
+                logger.warning(
+                    "Flood control on %s to %s, retrying in %ss",
+                    endpoint,
+                    chat_id,
+                    retry_after,
+                )
+                # Telegram wants a break from everyone, not just this chat
+                self._gate.paused_until = max(
+                    self._gate.paused_until, time.monotonic() + retry_after
+                )
+                await asyncio.sleep(retry_after)
+            else:
+                self.sent[priority] += 1
+                return result
@@ -0,0 +1,82 @@
+import asyncio
+from typing import Any, Awaitable
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+def serialization_key(update: object) -> int | None:
+    """
+    Returns the ID whose updates must be processed one at a time: the chat's, else the user's.
+
+    Args:
+        update (object): The update, usually a telegram.Update.
+
+    Returns:
+        int | None: The chat ID, the user ID, or None if the update may run alongside any other.
+    """
+
+    if not isinstance(update, Update):
+        return None
+    if update.effective_chat:
+        return update.effective_chat.id
+    if update.effective_user:
+        return update.effective_user.id
+    return None
+
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """
+    Processes updates of different chats concurrently, up to `max_concurrent_updates`, and the
+    updates of a chat one at a time, in the order they arrived.
+
+    ConversationHandler states, `context.user_data` drafts and the list view navigation state
+    are all read and written per chat/user, so a user's second click must not start before the
+    first one's handler is done.
+
+    Updates wait for their chat's turn before taking a concurrency slot, so a chat flooding the
+    bot holds at most one slot and never keeps other chats waiting.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        """
+        Args:
+            max_concurrent_updates (int): The number of updates processed at the same time.
+        """
+
+        super().__init__(max_concurrent_updates)
+        # chat/user ID -> (lock, number of updates holding or waiting for it)
+        self._locks: dict[int, tuple[asyncio.Lock, int]] = {}
+
+    async def process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = serialization_key(update)
+        if key is None:
+            await super().process_update(update, coroutine)
+            return
+
+        lock, users = self._locks.get(key, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._locks[key] = (lock, users + 1)
+        try:
+            # asyncio.Lock wakes its waiters first in, first out, so the chat's updates keep
+            # their order. The slot is only taken once it's the update's turn.
+            async with lock:
+                await super().process_update(update, coroutine)
+        finally:
+            lock, users = self._locks[key]
+            if users == 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, users - 1)
+
+    async def do_process_update(
+        self, update: object, coroutine: Awaitable[Any]
+    ) -> None:
+        await coroutine
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
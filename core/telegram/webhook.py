@@ -0,0 +1,362 @@
+import asyncio
+import hmac
+import json
+import logging
+import math
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Response
+from redis.asyncio import Redis
+from telegram import Update
+from telegram.ext import Application
+
+from core.database.cache import RELEASE_LEASE, RENEW_LEASE, redis_pool
+
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def ordering_key(data: dict) -> int:
+    """
+    Returns the ID whose updates must be processed in order: the chat's, else the user's.
+
+    Reads the raw update, so the receiving worker doesn't have to build an Update object.
+
+    Args:
+        data (dict): The update as sent by Telegram.
+
+    Returns:
+        int: The chat ID, the user ID, or the update ID for updates with neither.
+    """
+
+    for value in data.values():
+        if not isinstance(value, dict):
+            continue
+        chat = value.get("chat") or (value.get("message") or {}).get("chat")
+        if chat:
+            return chat["id"]
+        user = value.get("from") or value.get("user")
+        if user:
+            return user["id"]
+    return data.get("update_id", 0)
+
+
+class PartitionedUpdateQueue:
+    """
+    Spreads incoming updates over Redis streams so several webhook workers can share one URL.
+
+    Any worker may receive an update. It appends the update to partition
+    `ordering_key(update) % partitions`. Every partition is leased to exactly one worker at a
+    time, and that worker feeds the partition's updates to its Application in stream order. All
+    updates of a chat thus reach the same worker, in the order Telegram sent them.
+
+    A partition's offset only moves past a batch of updates once the Application has processed
+    all of them, and a worker giving a partition up finishes the batch in hand first, so updates
+    are processed at least once and a chat's updates never run on two workers at the same time.
+
+    Workers heartbeat into a sorted set and each holds about `partitions / live workers`
+    leases. Leases expire if a worker dies, and the others pick its partitions up from the last
+    offset it processed. ConversationHandler states are loaded at startup only, so a chat
+    moved to another worker mid-conversation may have to start that conversation over.
+    """
+
+    def __init__(
+        self,
+        application: Application,
+        prefix: str,
+        partitions: int,
+        client: Redis | None = None,
+        lease_ttl: int = 30,
+        max_length: int = 10_000,
+    ):
+        """
+        Args:
+            application (Application): The Application to feed updates to.
+            prefix (str): Prepended to every key, e.g. "ptb:employer:".
+            partitions (int): The number of streams. Fixed for the lifetime of a deployment.
+            client (Redis, optional): The Redis client. Defaults to a client on `redis_pool`.
+            lease_ttl (int, optional): Seconds before a dead worker's leases expire.
+                Defaults to 30.
+            max_length (int, optional): Approximate number of updates kept per stream.
+                Defaults to 10,000.
+        """
+
+        self.application = application
+        self.prefix = prefix
+        self.partitions = partitions
+        self.r = client or Redis(connection_pool=redis_pool)
+        self.lease_ttl = lease_ttl
+        self.max_length = max_length
+        self.worker_id = uuid.uuid4().hex
+        self.owned: dict[int, bytes] = {}  # partition -> last stream ID processed
+        self._releasing: set[int] = set()  # owned partitions finishing their last batch
+        self._consumers: dict[int, asyncio.Task] = {}
+        self._balancer: asyncio.Task | None = None
+        self._stopping = False
+        self._renew_lease = self.r.register_script(RENEW_LEASE)
+        self._release_lease = self.r.register_script(RELEASE_LEASE)
+
+    def _stream(self, partition: int) -> str:
+        return f"{self.prefix}updates:{partition}"
+
+    def _lease(self, partition: int) -> str:
+        return f"{self.prefix}updates:{partition}:owner"
+
+    def _offset(self, partition: int) -> str:
+        return f"{self.prefix}updates:{partition}:offset"
+
+    async def put(self, data: dict) -> None:
+        """
+        Appends an update to its chat's partition.
+
+        Args:
+            data (dict): The update as sent by Telegram.
+        """
+
+        partition = ordering_key(data) % self.partitions
+        await self.r.xadd(
+            self._stream(partition),
+            {"update": json.dumps(data)},
+            maxlen=self.max_length,
+            approximate=True,
+        )
+
+    async def start(self) -> None:
+        await self._rebalance()
+        self._balancer = asyncio.create_task(self._keep_balanced())
+
+    async def stop(self) -> None:
+        if self._balancer is not None:
+            self._balancer.cancel()
+            await asyncio.gather(self._balancer, return_exceptions=True)
+            self._balancer = None
+
+        # Hand the partitions over right away instead of waiting for the leases to expire,
+        # once the updates in hand are processed and their chats' state is saved
+        self._stopping = True
+        self._releasing.update(self.owned)
+        await asyncio.gather(*self._consumers.values(), return_exceptions=True)
+        await self._save_persistence()
+        for partition in list(self.owned):
+            await self._release(partition)
+        await self.r.zrem(f"{self.prefix}workers", self.worker_id)
+
+    async def _rebalance(self) -> None:
+        workers = f"{self.prefix}workers"
+        now = time.time()
+        async with self.r.pipeline(transaction=False) as pipe:
+            pipe.zadd(workers, {self.worker_id: now})
+            pipe.zremrangebyscore(workers, 0, now - self.lease_ttl)
+            pipe.zcard(workers)
+            *_, live = await pipe.execute()
+        share = math.ceil(self.partitions / max(live, 1))
+
+        # Renew our leases, dropping any another worker took over after ours expired. Leases of
+        # partitions being given up are renewed too, until their last batch is processed.
+        for partition in list(self.owned):
+            renewed = await self._renew_lease(
+                keys=[self._lease(partition)], args=[self.worker_id, self.lease_ttl]
+            )
+            if not renewed:
+                self._drop(partition)
+                continue
+            if partition not in self._releasing and self._active() > share:
+                self._releasing.add(partition)
+
+        for partition in range(self.partitions):
+            if self._active() >= share:
+                break
+            if partition in self.owned:
+                continue
+            if await self.r.set(
+                self._lease(partition), self.worker_id, nx=True, ex=self.lease_ttl
+            ):
+                # No offset yet means nothing in the partition was processed so far
+                offset = await self.r.get(self._offset(partition))
+                self.owned[partition] = offset or b"0-0"
+                self._consumers[partition] = asyncio.create_task(
+                    self._consume(partition)
+                )
+                logger.info("Worker %s took partition %d", self.worker_id, partition)
+
+    def _active(self) -> int:
+        return len(self.owned) - len(self._releasing)
+
+    def _drop(self, partition: int) -> None:
+        # Another worker holds the partition now, stop feeding its updates right away
+        consumer = self._consumers.pop(partition, None)
+        if consumer is not None:
+            consumer.cancel()
+        self.owned.pop(partition, None)
+        self._releasing.discard(partition)
+        logger.info("Worker %s lost partition %d", self.worker_id, partition)
+
+    async def _save_persistence(self) -> None:
+        # RedisPersistence only flushes every update_interval. The next owner of a partition
+        # loads its chats' user_data and conversation states from there, so they must be
+        # current before the lease is handed over.
+        try:
+            await self.application.update_persistence()
+        except Exception as e:
+            logger.error("Failed to save persistence before a hand-over: %s", e)
+
+    async def _release(self, partition: int) -> None:
+        try:
+            await self._release_lease(
+                keys=[self._lease(partition)], args=[self.worker_id]
+            )
+        except Exception as e:
+            # The lease expires on its own
+            logger.error("Failed to release partition %d: %s", partition, e)
+        finally:
+            self.owned.pop(partition, None)
+            self._releasing.discard(partition)
+            logger.info("Worker %s released partition %d", self.worker_id, partition)
+
+    async def _keep_balanced(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                await self._rebalance()
+            except Exception as e:
+                logger.error("Failed to rebalance update partitions: %s", e)
+
+    async def _consume(self, partition: int) -> None:
+        stream = self._stream(partition)
+        try:
+            while partition not in self._releasing:
+                try:
+                    batches = await self.r.xread(
+                        {stream: self.owned[partition]}, count=100, block=1000
+                    )
+                except Exception as e:
+                    logger.error("Failed to read updates: %s", e)
+                    await asyncio.sleep(1)
+                    continue
+                if not batches or partition in self._releasing:
+                    # Whatever was just read is left to the partition's next owner
+                    continue
+
+                entries = batches[0][1]
+                await self._process(entries)
+                self.owned[partition] = entries[-1][0]
+                try:
+                    await self.r.set(self._offset(partition), entries[-1][0])
+                except Exception as e:
+                    # The next successful batch moves the offset past these too
+                    logger.error("Failed to save partition %d offset: %s", partition, e)
+
+            if not self._stopping:
+                # On stop, persistence is saved once for every partition instead
+                await self._save_persistence()
+                await self._release(partition)
+        finally:
+            if self._consumers.get(partition) is asyncio.current_task():
+                del self._consumers[partition]
+
+    async def _process(self, entries: list) -> None:
+        # Chats are processed concurrently, and each chat's updates one after the other
+        chats: dict[int, list[Update]] = {}
+        for _, fields in entries:
+            data = json.loads(fields[b"update"])
+            chats.setdefault(ordering_key(data), []).append(
+                Update.de_json(data, self.application.bot)
+            )
+
+        async def process_chat(updates: list[Update]) -> None:
+            for update in updates:
+                try:
+                    # What Application does with updates from its update_queue
+                    await self.application.update_processor.process_update(
+                        update, self.application.process_update(update)
+                    )
+                except Exception as e:
+                    logger.exception("Failed to process update %s: %s", update, e)
+
+        await asyncio.gather(*(process_chat(updates) for updates in chats.values()))
+
+
+def create_webhook_app(
+    application: Application,
+    secret_token: str,
+    url_path: str = "/telegram",
+    webhook_url: str | None = None,
+    partitions: int = 0,
+    prefix: str = "ptb:",
+) -> FastAPI:
+    """
+    Builds an ASGI app that receives the bot's updates over HTTP instead of long polling.
+
+    Requests must carry the secret token Telegram was given in `set_webhook`. Each update is
+    queued and acknowledged right away; the Application processes it in the background.
+
+    Args:
+        application (Application): The bot, with its handlers added.
+        secret_token (str): The secret Telegram sends in the X-Telegram-Bot-Api-Secret-Token
+            header.
+        url_path (str, optional): The path updates are posted to. Defaults to "/telegram".
+        webhook_url (str, optional): The public base URL. When set, the webhook is registered
+            with Telegram at startup. Defaults to None.
+        partitions (int, optional): 0 to feed updates straight to this process's Application
+            (a single worker), or the number of PartitionedUpdateQueue partitions to run
+            several workers. Defaults to 0.
+        prefix (str, optional): The Redis key prefix for the partitions. Defaults to "ptb:".
+
+    Returns:
+        FastAPI: The app, e.g. for `uvicorn ... --factory --workers 4`.
+    """
+
+    queue = (
+        PartitionedUpdateQueue(application, prefix, partitions) if partitions else None
+    )
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Same lifecycle, and hooks, as Application.run_polling
+        await application.initialize()
+        if application.post_init:
+            await application.post_init(application)
+        await application.start()
+        if queue:
+            await queue.start()
+        if webhook_url:
+            await application.bot.set_webhook(
+                url=webhook_url.rstrip("/") + url_path,
+                secret_token=secret_token,
+                allowed_updates=Update.ALL_TYPES,
+            )
+
+        yield
+
+        if queue:
+            await queue.stop()
+        await application.stop()
+        if application.post_stop:
+            await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.post(url_path)
+    async def receive_update(request: Request) -> Response:
+        token = request.headers.get(SECRET_TOKEN_HEADER, "")
+        if not hmac.compare_digest(token.encode(), secret_token.encode()):
+            return Response(status_code=403)
+
+        data = await request.json()
+        if queue:
+            await queue.put(data)
+        else:
+            await application.update_queue.put(Update.de_json(data, application.bot))
+        return Response(status_code=200)
+
+    @app.get("/healthz")
+    async def healthz() -> dict:
+        return {"ok": True}
+
+    return app
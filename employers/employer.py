@@ -3,6 +3,7 @@ import logging
 from telegram import Update
 from telegram.ext import (
     CommandHandler,
+    Application,
     ApplicationBuilder,
     CallbackQueryHandler,
     filters,
@@ -19,6 +20,7 @@ from employers.handlers.company import (
 )
 from employers.handlers.onboarding import onboarding_handler
 from employers.handlers.job import (
+    close_myjob,
     my_job_posts,
     next_myjob,
     view_applicants,
@@ -32,8 +34,13 @@ from employers.handlers.profile import (
     update_username,
     profile_handler,
 )
+from core.database.session import pool_stats
+from core.telegram.persistence import RedisPersistence
+from core.telegram.rate_limiter import OutboundRateLimiter
+from core.telegram.update_processor import PerChatUpdateProcessor
+from core.telegram.webhook import create_webhook_app
 from utils.helpers import view_employer_profile
-
+from utils.reference_data import reference_data
 
 # Logging
 logging.basicConfig(
@@ -65,13 +72,41 @@ async def main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Please use the buttons below to navigate.")
 
 
-def main():
+async def post_shutdown(application: Application) -> None:
+    await reference_data.stop(application)
+    logger.info("Database pool: %s", pool_stats())
+
+
+def build_application() -> Application:
+    """
+    Builds the Employer Bot with all of its handlers, ready to be run by polling or behind
+    a webhook.
+
+    Returns:
+        Application: The bot, not initialized yet.
+    """
+
     token = os.getenv("EMPLOYER_BOT_TOKEN")
     if not token:
         logger.error("EMPLOYER_BOT_TOKEN environment variable is not set.")
         raise ValueError("EMPLOYER_BOT_TOKEN environment variable is not set.")
 
-    app = ApplicationBuilder().token(token).build()
+    # Conversation states and drafts live in Redis, so restarts and replicas don't lose them.
+    # Categories and their keyboard are loaded once, before the first update is handled.
+    # Updates of different chats are handled concurrently, a chat's updates one at a time.
+    # Outgoing messages are throttled to Telegram's limits, replies first.
+    app = (
+        ApplicationBuilder()
+        .token(token)
+        .persistence(RedisPersistence("ptb:employer:"))
+        .rate_limiter(OutboundRateLimiter())
+        .concurrent_updates(
+            PerChatUpdateProcessor(int(os.getenv("MAX_CONCURRENT_UPDATES", "64")))
+        )
+        .post_init(reference_data.start)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
     # * For DEBUG purposes ONLY
     # app.add_handler(MessageHandler(filters.ALL, capture_group_topics))
@@ -80,6 +115,7 @@ def main():
     app.add_handler(CallbackQueryHandler(next_mycompany, pattern="^mycompany_.*"))
 
     app.add_handler(CallbackQueryHandler(my_job_posts, pattern="^my_job_posts$"))
+    app.add_handler(CallbackQueryHandler(close_myjob, pattern=r"^myjob_close_\d+$"))
     app.add_handler(CallbackQueryHandler(next_myjob, pattern="^myjob_.*"))
 
     app.add_handler(
@@ -113,6 +149,12 @@ def main():
     app.add_handler(CommandHandler("my_profile", employer_profile))
     app.add_handler(CommandHandler("my_companies", my_companies))
 
+    return app
+
+
+def main() -> None:
+    app = build_application()
+
     logger.info("Employer Bot running...")
 
     try:
@@ -127,5 +169,32 @@ def main():
         logger.error("A general error occurred: %s", e)
 
 
+def webhook_app():
+    """
+    Serves the Employer Bot behind a webhook instead of polling, e.g.:
+
+        uvicorn employers.employer:webhook_app --factory --workers 4
+
+    Set WEBHOOK_PARTITIONS when running more than one worker.
+
+    Returns:
+        FastAPI: The ASGI app.
+    """
+
+    secret_token = os.getenv("WEBHOOK_SECRET")
+    if not secret_token:
+        logger.error("WEBHOOK_SECRET environment variable is not set.")
+        raise ValueError("WEBHOOK_SECRET environment variable is not set.")
+
+    return create_webhook_app(
+        build_application(),
+        secret_token,
+        url_path=os.getenv("WEBHOOK_PATH", "/employer"),
+        webhook_url=os.getenv("WEBHOOK_URL"),
+        partitions=int(os.getenv("WEBHOOK_PARTITIONS", "0")),
+        prefix="ptb:employer:",
+    )
+
+
 if __name__ == "__main__":
     main()
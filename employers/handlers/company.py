@@ -20,23 +20,21 @@ from employers.states.all import (
     CONFIRM_COMPANY,
 )
 
-from utils.db import execute_query
-from utils.constants import (
-    CURRENT_COMPANY_INDEX,
-    TOTAL_COMPANIES,
-)
-
+from utils.db import execute_query_async
 from utils.helpers import get_companies, get_employer
+from utils.navigation import navigation, navigation_buttons
 
 
-async def my_companies(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    employer = get_employer(update, context)
+async def my_companies(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, index: int = 0
+):
+    employer = await get_employer(update, context)
 
     if not employer:
         await start_command(update, context)
         return
 
-    companies = get_companies(employer["user_id"])
+    companies = await get_companies(employer["user_id"])
 
     if not companies:
         keyboard = [
@@ -54,54 +52,23 @@ async def my_companies(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
         return
 
-    company_list = [job for job in companies]
-    # global CURRENT_COMPANY_INDEX
-    company = company_list[CURRENT_COMPANY_INDEX]
-    global TOTAL_COMPANIES
-    TOTAL_COMPANIES = len(company_list)
-    # CURRENT_COMPANY_INDEX = 0  # Reset index when starting
+    total = len(companies)
+    index = await navigation.set(update.effective_chat.id, "mycompany", index, total)
+    company = companies[index]
 
     company_details = (
-        f"Name: <b>\t{company["name"]}{' \t✅' if company["verified"] else ''}</b> \n\n"
-        f"Description: <b>\t{company["description"]}</b> \n\n"
-        f"Approval status: <b>\t{company["status"]}</b> \n\n"
-        # f"Verified: <b>\t{company["verified"]}</b> \n\n"
+        f"Name: <b>\t{company.name}{' \t✅' if company.verified else ''}</b> \n\n"
+        f"Description: <b>\t{company.description}</b> \n\n"
+        f"Approval status: <b>\t{company.status}</b> \n\n"
+        # f"Verified: <b>\t{company.verified}</b> \n\n"
     )
 
-    keyboard = []
-    if TOTAL_COMPANIES > 1:
-        if CURRENT_COMPANY_INDEX > 0:
-            keyboard = [
-                [InlineKeyboardButton("Add Company", callback_data="create_company")],
-                [
-                    InlineKeyboardButton(
-                        "Previous", callback_data="mycompany_previous"
-                    ),
-                    InlineKeyboardButton("Next", callback_data="mycompany_next"),
-                ],
-            ]
-            if TOTAL_COMPANIES == CURRENT_COMPANY_INDEX + 1:
-                keyboard = [
-                    [
-                        InlineKeyboardButton(
-                            "Add Company", callback_data="create_company"
-                        )
-                    ],
-                    [
-                        InlineKeyboardButton(
-                            "Previous", callback_data="mycompany_previous"
-                        ),
-                    ],
-                ]
-        else:
-            keyboard = [
-                [InlineKeyboardButton("Add Company", callback_data="create_company")],
-                [InlineKeyboardButton("Next", callback_data="mycompany_next")],
-            ]
-    else:
-        keyboard = [
-            [InlineKeyboardButton("Add Company", callback_data="create_company")],
-        ]
+    keyboard = [
+        [InlineKeyboardButton("Add Company", callback_data="create_company")],
+    ]
+    navigation_row = navigation_buttons("mycompany", index, total)
+    if navigation_row:
+        keyboard.append(navigation_row)
 
     if update.callback_query:
         await update.callback_query.edit_message_text(
@@ -118,16 +85,16 @@ async def my_companies(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def next_mycompany(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    global CURRENT_COMPANY_INDEX
     query = update.callback_query
     await query.answer()  # Acknowledge the callback
 
+    index = await navigation.get(update.effective_chat.id, "mycompany")
     if query.data == "mycompany_next":
-        CURRENT_COMPANY_INDEX += 1
+        index += 1
     elif query.data == "mycompany_previous":
-        CURRENT_COMPANY_INDEX -= 1
+        index -= 1
 
-    await my_companies(update, context)
+    await my_companies(update, context, index)
 
 
 async def create_company_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -700,13 +667,13 @@ async def confirm_company(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.answer()
         data = context.user_data
 
-        employer = get_employer(update, context)
+        employer = await get_employer(update, context)
 
         if not employer:
             await start_command(update, context)
             return
 
-        response = execute_query(
+        response = await execute_query_async(
             "INSERT INTO companies (user_id, type, startup_type, name, trade_license, employer_photo, created_by) VALUES (%s, %s, %s, %s, %s, %s, %s)",
             (
                 employer["user_id"],
@@ -788,4 +755,6 @@ company_creation_handler = ConversationHandler(
         ],
     },
     fallbacks=[CommandHandler("cancel", cancel_company_creation)],
+    name="company_creation",
+    persistent=True,
 )
@@ -30,7 +30,7 @@ async def start_command(
         return value as the function interacts with the user via messages.
     """
 
-    employer = get_employer(update, context)
+    employer = await get_employer(update, context)
 
     if not employer:
         keyboard = [[InlineKeyboardButton("Register", callback_data="register")]]
@@ -1,4 +1,7 @@
 import os
+import datetime
+import html
+from redis.exceptions import RedisError
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (
     filters,
@@ -30,34 +33,48 @@ from employers.states.all import (
     CONFIRM_JOB,
 )
 
-from utils.db import execute_query
+from core.telegram.rate_limiter import PRIORITY_BROADCAST
+from modules.employer.domain.entities import ApplicantCard
+from utils.db import execute_query_async
 from utils.helpers import (
-    format_date,
     get_all_cities,
-    get_categories,
     get_companies,
     get_employer,
+    get_job,
     get_jobs,
+    invalidate_job,
     is_isalnum_w_space,
     is_valid_date_format,
 )
-from utils.constants import (
-    CURRENT_APPLICANT_INDEX,
-    TOTAL_APPLICANTS,
-    CURRENT_MYJOB_INDEX,
-    TOTAL_MYJOBS,
-    ROLE_APPLICANT,
+from utils.constants import ROLE_APPLICANT
+from utils.job_alerts import job_alerts
+from utils.job_cards import render_job_card
+from utils.navigation import navigation, navigation_buttons
+from utils.reference_data import (
+    EDUCATION_KEYBOARD,
+    EXPERIENCE_KEYBOARD,
+    GENDER_PREFERENCE_KEYBOARD,
+    reference_data,
+)
+
+# EXPLAINed by tests/test_query_plans.py
+APPLICANTS_QUERY = (
+    "SELECT u.name, u.email, u.phone, a.cover_letter, a.cv, a.portfolio "
+    "FROM applications a JOIN users u ON a.user_id = u.user_id "
+    "WHERE a.job_id = %s AND u.role_id = %s ORDER BY a.created_at ASC LIMIT 50"
 )
 
 
-async def my_job_posts(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    employer = get_employer(update, context)
+async def my_job_posts(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, index: int = 0
+):
+    employer = await get_employer(update, context)
 
     if not employer:
         await start_command(update, context)
         return
 
-    myjobs = get_jobs(employer["user_id"])
+    myjobs = await get_jobs(employer["user_id"])
 
     if not myjobs:
         keyboard = [[InlineKeyboardButton("Post a Job", callback_data="post_a_job")]]
@@ -69,71 +86,17 @@ async def my_job_posts(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("You haven't posted a job yet")
         return
 
-    myjobs_list = [job for job in myjobs]
-    # global CURRENT_MYJOB_INDEX
-    myjob = myjobs_list[CURRENT_MYJOB_INDEX]
-    global TOTAL_MYJOBS
-    TOTAL_MYJOBS = len(myjobs_list)
-    # CURRENT_MYJOB_INDEX = 0  # Reset index when starting
-
-    myjob_details = (
-        f"Job Title: <b>\t{myjob["job_title"]}</b> \n\n"
-        f"Job Type: <b>\t{myjob["job_site"]} - {myjob["job_type"]}</b> \n\n"
-        f"Work Location: <b>\t{myjob["job_city"]}, {myjob["job_country"]}</b> \n\n"
-        f"Applicants Needed: <b>\t{myjob["gender_preference"]}</b> \n\n"
-        f"Salary: <b>\t{myjob["salary_amount"]} {myjob["salary_currency"]}, {myjob["salary_type"]}</b> \n\n"
-        f"Deadline: <b>\t{format_date(myjob["job_deadline"])}</b> \n\n"
-        f"<b>Description</b>: \t{myjob["job_description"]} \n\n"
-        f"<b>Requirements</b>: \t{myjob["job_requirements"]} \n\n"
-    )
+    total = len(myjobs)
+    index = await navigation.set(update.effective_chat.id, "myjob", index, total)
+    myjob = myjobs[index]
+
+    myjob_details, actions = render_job_card(myjob, "employer")
 
     keyboard = []
-    if TOTAL_MYJOBS > 1:
-        if CURRENT_MYJOB_INDEX > 0:
-            keyboard = [
-                [
-                    InlineKeyboardButton("Previous", callback_data="myjob_previous"),
-                    InlineKeyboardButton("Next", callback_data="myjob_next"),
-                ],
-                [
-                    InlineKeyboardButton("Edit", callback_data="myjob_edit"),
-                    InlineKeyboardButton("Close", callback_data="myjob_close"),
-                ],
-                [
-                    InlineKeyboardButton(
-                        "View Applicants",
-                        callback_data=f"view_applicants_{myjob["job_id"]}",
-                    )
-                ],
-            ]
-            if TOTAL_MYJOBS == CURRENT_MYJOB_INDEX + 1:
-                keyboard = [
-                    [InlineKeyboardButton("Previous", callback_data="myjob_previous")],
-                    [
-                        InlineKeyboardButton("Edit", callback_data="myjob_edit"),
-                        InlineKeyboardButton("Close", callback_data="myjob_close"),
-                    ],
-                    [
-                        InlineKeyboardButton(
-                            "View Applicants",
-                            callback_data=f"view_applicants_{myjob["job_id"]}",
-                        )
-                    ],
-                ]
-        else:
-            keyboard = [
-                [InlineKeyboardButton("Next", callback_data="myjob_next")],
-                [
-                    InlineKeyboardButton("Edit", callback_data="myjob_edit"),
-                    InlineKeyboardButton("Close", callback_data="myjob_close"),
-                ],
-                [
-                    InlineKeyboardButton(
-                        "View Applicants",
-                        callback_data=f"view_applicants_{myjob["job_id"]}",
-                    )
-                ],
-            ]
+    navigation_row = navigation_buttons("myjob", index, total)
+    if navigation_row:
+        keyboard.append(navigation_row)
+    keyboard += actions
 
     if update.callback_query:
         await update.callback_query.edit_message_text(
@@ -150,26 +113,68 @@ async def my_job_posts(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def next_myjob(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    global CURRENT_MYJOB_INDEX
     query = update.callback_query
     await query.answer()
 
+    index = await navigation.get(update.effective_chat.id, "myjob")
     if query.data == "myjob_next":
-        CURRENT_MYJOB_INDEX += 1
+        index += 1
     elif query.data == "myjob_previous":
-        CURRENT_MYJOB_INDEX -= 1
+        index -= 1
 
-    await my_job_posts(update, context)
+    await my_job_posts(update, context, index)
 
 
-async def view_applicants(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def close_myjob(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
-    job_id = int(query.data.split("_")[-1])
+    employer = await get_employer(update, context)
 
-    applicants = execute_query(
-        "SELECT u.*, a.* FROM applications a JOIN users u ON a.user_id = u.user_id WHERE a.job_id = %s AND u.role_id = %s ORDER BY a.created_at ASC LIMIT 50",
+    if not employer:
+        await start_command(update, context)
+        return
+
+    job_id = int(query.data.rsplit("_", 1)[1])
+    try:
+        # Scoped by the employer, so no one closes a job by forging the callback data
+        closed = await execute_query_async(
+            "UPDATE jobs SET job_status = 'closed', updated_at = now() "
+            "WHERE job_id = %s AND user_id = %s RETURNING job_title",
+            (job_id, employer["user_id"]),
+        )
+    except Exception as e:
+        print(f"Error in close_myjob: {e}")
+        await query.edit_message_text("Couldn't close the job, please try again")
+        return
+
+    if not closed:
+        await query.edit_message_text("Job not found")
+        return
+
+    # Otherwise the cached job and its cards keep being served
+    await invalidate_job(job_id)
+
+    await query.edit_message_text(
+        f"<b>{html.escape(str(closed[0]['job_title']))}</b> is closed",
+        parse_mode="HTML",
+    )
+
+
+async def view_applicants(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    job_id: int | None = None,
+    index: int = 0,
+):
+    query = update.callback_query
+    if job_id is None:
+        await query.answer()
+        job_id = int(query.data.split("_")[-1])
+
+    applicants = await execute_query_async(
+        APPLICANTS_QUERY,
         (job_id, ROLE_APPLICANT),
+        row_type=ApplicantCard,
     )
 
     if not applicants:
@@ -180,52 +185,28 @@ async def view_applicants(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
 
-    applicants_list = [job for job in applicants]
-    # global CURRENT_APPLICANT_INDEX
-    applicant = applicants_list[CURRENT_APPLICANT_INDEX]
-    global TOTAL_APPLICANTS
-    TOTAL_APPLICANTS = len(applicants_list)
-    # CURRENT_APPLICANT_INDEX = 0  # Reset index when starting
+    total = len(applicants)
+    index = await navigation.set(
+        update.effective_chat.id, f"applicant:{job_id}", index, total
+    )
+    applicant = applicants[index]
 
     applicant_details = (
-        f"Name: <b>\t{applicant["name"]}</b> \n"
-        f"Email: <b>\t{applicant["email"]}</b> \n"
-        f"Phone: <b>\t{applicant["phone"]}</b> \n\n"
-        f"<b>Cover Letter:</b> \n{applicant["cover_letter"]} \n\n"
-        f"<b>CV:</b> \n{applicant["cv"]} \n\n"
-        f"<b>Portfolio:</b> \n{applicant["portfolio"]} \n\n"
+        f"Name: <b>\t{applicant.name}</b> \n"
+        f"Email: <b>\t{applicant.email}</b> \n"
+        f"Phone: <b>\t{applicant.phone}</b> \n\n"
+        f"<b>Cover Letter:</b> \n{applicant.cover_letter} \n\n"
+        f"<b>CV:</b> \n{applicant.cv} \n\n"
+        f"<b>Portfolio:</b> \n{applicant.portfolio} \n\n"
     )
 
-    keyboard = [[InlineKeyboardButton("Back to My Jobs", callback_data="my_job_posts")]]
-    if TOTAL_APPLICANTS > 1:
-        if CURRENT_APPLICANT_INDEX > 0:
-            keyboard = [
-                [
-                    InlineKeyboardButton(
-                        "Previous", callback_data="applicant_previous"
-                    ),
-                    InlineKeyboardButton("Next", callback_data="applicant_next"),
-                ],
-                [InlineKeyboardButton("Back to My Jobs", callback_data="my_job_posts")],
-            ]
-            if TOTAL_APPLICANTS == CURRENT_APPLICANT_INDEX + 1:
-                keyboard = [
-                    [
-                        InlineKeyboardButton(
-                            "Previous", callback_data="applicant_previous"
-                        )
-                    ],
-                    [
-                        InlineKeyboardButton(
-                            "Back to My Jobs", callback_data="my_job_posts"
-                        )
-                    ],
-                ]
-        else:
-            keyboard = [
-                [InlineKeyboardButton("Next", callback_data="applicant_next")],
-                [InlineKeyboardButton("Back to My Jobs", callback_data="my_job_posts")],
-            ]
+    keyboard = []
+    navigation_row = navigation_buttons("applicant", index, total, f"_{job_id}")
+    if navigation_row:
+        keyboard.append(navigation_row)
+    keyboard.append(
+        [InlineKeyboardButton("Back to My Jobs", callback_data="my_job_posts")]
+    )
 
     if update.callback_query:
         await update.callback_query.edit_message_text(
@@ -242,16 +223,24 @@ async def view_applicants(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def next_applicant(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    global CURRENT_APPLICANT_INDEX
     query = update.callback_query
     await query.answer()
 
-    if query.data == "applicant_next":
-        CURRENT_APPLICANT_INDEX += 1
-    elif query.data == "applicant_previous":
-        CURRENT_APPLICANT_INDEX -= 1
+    # Callback data is applicant_<direction>_<job_id>
+    parts = query.data.split("_", 2)
+    if len(parts) < 3 or not parts[2].isdigit():
+        await my_job_posts(update, context)
+        return
+    _, direction, job_id = parts
+    job_id = int(job_id)
+
+    index = await navigation.get(update.effective_chat.id, f"applicant:{job_id}")
+    if direction == "next":
+        index += 1
+    elif direction == "previous":
+        index -= 1
 
-    await view_applicants(update, context)
+    await view_applicants(update, context, job_id, index)
 
 
 async def post_job_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -275,13 +264,13 @@ async def post_job_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
 
     try:
-        employer = get_employer(update, context)
+        employer = await get_employer(update, context)
 
         if not employer:
             await start_command(update, context)
             return
 
-        companies = get_companies(employer["user_id"])
+        companies = await get_companies(employer["user_id"])
         if not companies:
             keyboard = [
                 [InlineKeyboardButton("Add Company", callback_data="create_company")],
@@ -301,8 +290,8 @@ async def post_job_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         buttons = [
             InlineKeyboardButton(
-                company["name"],
-                callback_data=f"company_{company["company_id"]}",
+                company.name,
+                callback_data=f"company_{company.company_id}",
             )
             for company in companies
         ]
@@ -498,31 +487,9 @@ async def job_type(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.answer()
 
         context.user_data["job_type"] = query.data
-        categories = get_categories()
-        buttons = [
-            InlineKeyboardButton(
-                category["name"],
-                callback_data=f"{category["name"]}_{category["category_id"]}",
-            )
-            for category in categories
-        ]
-
-        keyboard = [
-            buttons[i : i + 2] for i in range(0, len(buttons), 2)
-        ]  # Group buttons into rows
-
-        # def get_all_cities():
-        #     buttons = [InlineKeyboardButton(city, callback_data=f"{city}") for city in CITIES]
-
-        #     # Organize buttons into 2-column rows
-        #     keyboard = [buttons[i:i + 2] for i in range(0, len(buttons), 2)]  # Group buttons into rows
-        #     keyboard.append([InlineKeyboardButton("Others", callback_data="Others")]),
-
-        #     return InlineKeyboardMarkup(keyboard)
-
         await query.edit_message_text(
             "<b>Choose a job sector</b>",
-            reply_markup=InlineKeyboardMarkup(keyboard),
+            reply_markup=await reference_data.get_category_keyboard(),
             parse_mode="HTML",
         )
         return JOB_SECTOR
@@ -556,31 +523,9 @@ async def job_sector(update: Update, context: ContextTypes.DEFAULT_TYPE):
         context.user_data["category_id"] = int(query.data.split("_")[1])
         context.user_data["job_sector"] = query.data.split("_")[0]
 
-        keyboard = [
-            [
-                InlineKeyboardButton(
-                    "Secondary School", callback_data="Secondary School"
-                ),
-                InlineKeyboardButton("Certificate", callback_data="Certificate"),
-            ],
-            [
-                InlineKeyboardButton("TVET", callback_data="TVET"),
-                InlineKeyboardButton("Diploma", callback_data="Diploma"),
-            ],
-            [
-                InlineKeyboardButton(
-                    "Bachelors Degree", callback_data="Bachelors Degree"
-                ),
-                InlineKeyboardButton("Masters Degree", callback_data="Masters Degree"),
-            ],
-            [
-                InlineKeyboardButton("Phd", callback_data="Phd"),
-                InlineKeyboardButton("Not Required", callback_data="Not Required"),
-            ],
-        ]
         await query.edit_message_text(
             "<b>Educational Qualification</b>",
-            reply_markup=InlineKeyboardMarkup(keyboard),
+            reply_markup=EDUCATION_KEYBOARD,
             parse_mode="HTML",
         )
         return EDUCATION_QUALIFICATION
@@ -615,23 +560,9 @@ async def education_qualification(update: Update, context: ContextTypes.DEFAULT_
 
         context.user_data["education"] = query.data
 
-        keyboard = [
-            [
-                InlineKeyboardButton("Entry", callback_data="Entry"),
-                InlineKeyboardButton("Junior", callback_data="Junior"),
-            ],
-            [
-                InlineKeyboardButton("Intermediate", callback_data="Intermediate"),
-                InlineKeyboardButton("Senior", callback_data="Senior"),
-            ],
-            [
-                InlineKeyboardButton("Expert", callback_data="Expert"),
-                InlineKeyboardButton("Not Required", callback_data="Not Required"),
-            ],
-        ]
         await query.edit_message_text(
             "<b>Experience Level</b>",
-            reply_markup=InlineKeyboardMarkup(keyboard),
+            reply_markup=EXPERIENCE_KEYBOARD,
             parse_mode="HTML",
         )
         return EXPERIENCE_LEVEL
@@ -666,16 +597,9 @@ async def experience_level(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         context.user_data["experience"] = query.data
 
-        keyboard = [
-            [
-                InlineKeyboardButton("Male", callback_data="Male"),
-                InlineKeyboardButton("Female", callback_data="Female"),
-            ],
-            [InlineKeyboardButton("Both", callback_data="Both")],
-        ]
         await query.edit_message_text(
             "<b>Gender Preferred</b>",
-            reply_markup=InlineKeyboardMarkup(keyboard),
+            reply_markup=GENDER_PREFERENCE_KEYBOARD,
             parse_mode="HTML",
         )
         return GENDER_PREFERENCE
@@ -1136,21 +1060,21 @@ async def skip_salary_amount(update: Update, context: ContextTypes.DEFAULT_TYPE)
 async def confirm_job(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
-    employer = get_employer(update, context)
+    employer = await get_employer(update, context)
 
     if not employer:
         await start_command(update, context)
         return
 
     data = context.user_data
-    response = execute_query(
+    response = await execute_query_async(
         """
-        INSERT INTO jobs (company_id, user_id, category_id, job_title, job_type, job_site, job_sector, education_qualification, experience_level, gender_preference, job_deadline, vacancies, job_description, job_city, job_country, salary_type, salary_amount, salary_currency)        
+        INSERT INTO jobs (company_id, user_id, category_id, job_title, job_type, job_site, job_sector, education_qualification, experience_level, gender_preference, job_deadline, vacancies, job_description, job_city, job_country, salary_type, salary_amount, salary_currency)
         VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         RETURNING job_id
         """,
         (
-            data["company_id"],
+            int(data["company_id"]),
             employer["user_id"],
             data["category_id"],
             data["job_title"],
@@ -1160,13 +1084,13 @@ async def confirm_job(update: Update, context: ContextTypes.DEFAULT_TYPE):
             data["education"],
             data["experience"],
             data["gender"],
-            data["deadline"],
-            data["vacancies"],
+            datetime.datetime.strptime(data["deadline"], "%Y-%m-%d").date(),
+            int(data["vacancies"]),
             data["description"],
             data["job_city"],
             data["job_country"],
             data["salary_type"],
-            data["salary_amount"],
+            int(data["salary_amount"]) if data["salary_amount"] else None,
             data["salary_currency"],
         ),
     )
@@ -1174,21 +1098,19 @@ async def confirm_job(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # # Notify the group about the new job
     # notify_group_on_job_post(update, context, job_id)
 
-    job = execute_query(
-        "SELECT j.*, c.* FROM jobs j JOIN companies c ON j.company_id = c.company_id WHERE j.user_id = %s ORDER BY j.created_at LIMIT 1",
-        (employer["user_id"],),
-    )[0]
-
-    job_details = (
-        f"Job Title: <b>\t{job["job_title"]}</b> \n\n"
-        f"Job Type: <b>\t{job["job_site"]} - {job["job_type"]}</b> \n\n"
-        f"Work Location: <b>\t{job["job_city"]}, {job["job_country"]}</b> \n\n"
-        f"Applicants Needed: <b>\t{job["gender_preference"]}</b> \n\n"
-        f"Salary: <b>\t{job["salary_amount"]} {job["salary_currency"]}, {job["salary_type"]}</b> \n\n"
-        f"Deadline: <b>\t{format_date(job["job_deadline"])}</b> \n\n"
-        f"<b>Description</b>: \t{job["job_description"]} \n\n"
-        f"<b>Requirements</b>: \t{job["job_requirements"]} \n\n"
-    )
+    # Loading the new job through get_job also caches it, so the burst of applicants
+    # following the channel post's deep link is served from the cache
+    job = await get_job(response[0]["job_id"])
+
+    # The Applicant Bot sends it to the matching alert subscribers
+    try:
+        await job_alerts.enqueue(
+            job.job_id, data["category_id"], data["job_city"], data["job_type"]
+        )
+    except RedisError as e:
+        print(f"Error in confirm_job: {e}")
+
+    job_details, actions = render_job_card(job, "channel")
 
     # job_message = (
     #     f"📌 \t**Job Title:** \t{job['title']} \n\n"
@@ -1201,12 +1123,8 @@ async def confirm_job(update: Update, context: ContextTypes.DEFAULT_TYPE):
     #     # f"📅 \t**Deadline:** \t{job['deadline']} \n\n"
     # )
 
-    # Generate a deep link to the Applicant Bot
-    deep_link_url = f"https://t.me/HulumJobsApplicantBot?start=apply_{job["job_id"]}"
-
-    # Create an InlineKeyboardButton with a URL
-    apply_button = InlineKeyboardButton("Apply", url=deep_link_url)
-    reply_markup = InlineKeyboardMarkup([[apply_button]])
+    # The card carries the Apply button, a deep link to the Applicant Bot
+    reply_markup = InlineKeyboardMarkup(actions)
 
     # Add an "Apply" button
     # apply_button = InlineKeyboardMarkup(
@@ -1214,11 +1132,17 @@ async def confirm_job(update: Update, context: ContextTypes.DEFAULT_TYPE):
     #     # [[InlineKeyboardButton("Apply", callback_data=f"apply_{job_id}")]]
     # )
 
-    await context.bot.send_message(
-        chat_id=os.getenv("HULUMJOBS_ETHIOIPA_CHANNEL_ID"),
-        text=job_details,
-        reply_markup=reply_markup,
-        parse_mode="HTML",
+    # The channel takes 20 posts a minute, post in the background so a burst of new jobs
+    # doesn't keep employers waiting
+    context.application.create_task(
+        context.bot.send_message(
+            chat_id=os.getenv("HULUMJOBS_ETHIOIPA_CHANNEL_ID"),
+            text=job_details,
+            reply_markup=reply_markup,
+            parse_mode="HTML",
+            rate_limit_args=PRIORITY_BROADCAST,
+        ),
+        update=update,
     )
 
     await query.edit_message_text("<b>Job posted successfully</b>", parse_mode="HTML")
@@ -1283,4 +1207,6 @@ post_job_handler = ConversationHandler(
         ],
     },
     fallbacks=[CommandHandler("cancel", cancel_job)],
+    name="post_job",
+    persistent=True,
 )
@@ -27,8 +27,8 @@ from employers.states.all import (
     REGISTER_COUNTRY,
 )
 from utils.constants import ROLE_EMPLOYER
-from utils.db import execute_query
-from utils.helpers import get_all_cities, is_valid_email
+from utils.db import execute_query_async
+from utils.helpers import get_all_cities, invalidate_employer, is_valid_email
 
 
 async def onboarding_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -436,7 +436,7 @@ async def confirm_registration(update: Update, context: ContextTypes.DEFAULT_TYP
             user_data["telegram_id"] = update.effective_user.id
             username = update.effective_user.username
 
-            response = execute_query(
+            response = await execute_query_async(
                 "INSERT INTO users (telegram_id, role_id, name, username, email, phone, gender, dob, country, city) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
                 (
                     user_data["telegram_id"],
@@ -453,6 +453,8 @@ async def confirm_registration(update: Update, context: ContextTypes.DEFAULT_TYP
             )
 
             if response:
+                # Drop the cached "unregistered" entry from before registration
+                await invalidate_employer(user_data["telegram_id"])
                 await query.edit_message_text(
                     "Registered successfully \t 🎉",
                     parse_mode="HTML",
@@ -542,4 +544,6 @@ onboarding_handler = ConversationHandler(
         CONFIRMATION: [CallbackQueryHandler(confirm_registration)],
     },
     fallbacks=[CommandHandler("cancel", onboarding_cancel)],
+    name="employer_onboarding",
+    persistent=True,
 )
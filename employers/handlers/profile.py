@@ -23,8 +23,13 @@ from employers.states.all import (
     EDIT_USERNAME,
 )
 from utils.constants import ROLE_EMPLOYER
-from utils.db import execute_query, redis_client
-from utils.helpers import get_all_cities, get_employer, is_valid_email
+from utils.db import execute_query_async
+from utils.helpers import (
+    get_all_cities,
+    get_employer,
+    invalidate_employer,
+    is_valid_email,
+)
 
 
 async def employer_profile(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -45,7 +50,7 @@ async def employer_profile(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         context (ContextTypes.DEFAULT_TYPE): The context object containing user data and state.
     """
 
-    employer = get_employer(update, context)
+    employer = await get_employer(update, context)
 
     if not employer:
         await start_command(update, context)
@@ -283,11 +288,11 @@ async def edit_name(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     name = update.message.text.strip()
     telegram_id = update.effective_user.id
 
-    response = execute_query(
+    response = await execute_query_async(
         "UPDATE users SET name = %s WHERE telegram_id = %s AND role_id = %s",
         (name, telegram_id, ROLE_EMPLOYER),
     )
-    redis_client.delete(f"employer:{telegram_id}")
+    await invalidate_employer(telegram_id)
 
     keyboard = [
         [InlineKeyboardButton("Back to Profile", callback_data="employer_profile")]
@@ -322,11 +327,11 @@ async def update_username(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     query = update.callback_query
     await query.answer()
 
-    response = execute_query(
+    response = await execute_query_async(
         "UPDATE users SET username = %s WHERE telegram_id = %s AND role_id = %s",
         (username, telegram_id, ROLE_EMPLOYER),
     )
-    redis_client.delete(f"employer:{telegram_id}")
+    await invalidate_employer(telegram_id)
 
     keyboard = [
         [InlineKeyboardButton("Back to Profile", callback_data="employer_profile")]
@@ -361,11 +366,11 @@ async def edit_gender(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
         await query.answer()
         telegram_id = update.effective_user.id
 
-        response = execute_query(
+        response = await execute_query_async(
             "UPDATE users SET gender = %s WHERE telegram_id = %s AND role_id = %s",
             (query.data, telegram_id, ROLE_EMPLOYER),
         )
-        redis_client.delete(f"employer:{telegram_id}")
+        await invalidate_employer(telegram_id)
 
         keyboard = [
             [InlineKeyboardButton("Back to Profile", callback_data="employer_profile")]
@@ -429,11 +434,11 @@ async def edit_dob(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
 
                 telegram_id = update.effective_user.id
 
-                response = execute_query(
+                response = await execute_query_async(
                     "UPDATE users SET dob = %s WHERE telegram_id = %s AND role_id = %s",
-                    (dob, telegram_id, ROLE_EMPLOYER),
+                    (age, telegram_id, ROLE_EMPLOYER),
                 )
-                redis_client.delete(f"employer:{telegram_id}")
+                await invalidate_employer(telegram_id)
 
                 await update.message.reply_text(
                     text="Age updated successfully!",
@@ -481,11 +486,11 @@ async def edit_country(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
         await query.answer()
         telegram_id = update.effective_user.id
 
-        response = execute_query(
+        response = await execute_query_async(
             "UPDATE users SET country = %s WHERE telegram_id = %s AND role_id = %s",
             (query.data, telegram_id, ROLE_EMPLOYER),
         )
-        redis_client.delete(f"employer:{telegram_id}")
+        await invalidate_employer(telegram_id)
 
         keyboard = [
             [InlineKeyboardButton("Back to Profile", callback_data="employer_profile")]
@@ -525,11 +530,11 @@ async def edit_city(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         await query.answer()
         telegram_id = update.effective_user.id
 
-        response = execute_query(
+        response = await execute_query_async(
             "UPDATE users SET city = %s WHERE telegram_id = %s AND role_id = %s",
             (query.data, telegram_id, ROLE_EMPLOYER),
         )
-        redis_client.delete(f"employer:{telegram_id}")
+        await invalidate_employer(telegram_id)
 
         keyboard = [
             [InlineKeyboardButton("Back to Profile", callback_data="employer_profile")]
@@ -576,11 +581,11 @@ async def edit_email(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
             )
             return EDIT_EMAIL
 
-        response = execute_query(
+        response = await execute_query_async(
             "UPDATE users SET email = %s WHERE telegram_id = %s AND role_id = %s",
             (email, telegram_id, ROLE_EMPLOYER),
         )
-        redis_client.delete(f"employer:{telegram_id}")
+        await invalidate_employer(telegram_id)
 
         keyboard = [
             [InlineKeyboardButton("Back to Profile", callback_data="employer_profile")]
@@ -627,11 +632,11 @@ async def edit_phone(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
             )
             return EDIT_PHONE
 
-        response = execute_query(
+        response = await execute_query_async(
             "UPDATE users SET phone = %s WHERE telegram_id = %s AND role_id = %s",
             (phone, telegram_id, ROLE_EMPLOYER),
         )
-        redis_client.delete(f"employer:{telegram_id}")
+        await invalidate_employer(telegram_id)
 
         keyboard = [
             [InlineKeyboardButton("Back to Profile", callback_data="employer_profile")]
@@ -667,4 +672,6 @@ profile_handler = ConversationHandler(
         EDIT_PHONE: [MessageHandler(filters.TEXT & ~filters.COMMAND, edit_phone)],
     },
     fallbacks=[CommandHandler("cancel", cancel_profile)],
+    name="employer_profile",
+    persistent=True,
 )
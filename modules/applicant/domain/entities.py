@@ -0,0 +1,17 @@
+from modules.employer.domain.entities import JobCard
+
+
+class FeedJobCard(JobCard):
+    """
+    A job card in the job feed, with the creation time used as the keyset cursor.
+    """
+
+    __slots__ = ("created_at",)
+
+
+class ApplicationCard(JobCard):
+    """
+    A job card in My Applications, with the status of the applicant's application.
+    """
+
+    __slots__ = ("status",)
@@ -0,0 +1,43 @@
+from core.database.rows import Row
+
+
+class JobCard(Row):
+    """
+    The job fields rendered on a job card (feed, saved jobs, my job posts), plus the posting
+    employer's user_id, the job's status and when the job was last changed.
+    """
+
+    __slots__ = (
+        "job_id",
+        "job_title",
+        "job_site",
+        "job_type",
+        "job_city",
+        "job_country",
+        "gender_preference",
+        "salary_amount",
+        "salary_currency",
+        "salary_type",
+        "job_deadline",
+        "job_description",
+        "job_requirements",
+        "user_id",
+        "job_status",
+        "updated_at",
+    )
+
+
+class CompanyCard(Row):
+    """
+    The company fields rendered in My Companies and the company picker.
+    """
+
+    __slots__ = ("company_id", "name", "description", "status", "verified")
+
+
+class ApplicantCard(Row):
+    """
+    An application to one of the employer's jobs, with the applicant's contact details.
+    """
+
+    __slots__ = ("name", "email", "phone", "cover_letter", "cv", "portfolio")
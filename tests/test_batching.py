@@ -0,0 +1,98 @@
+import asyncio
+
+from core.ai.batching import MicroBatcher
+
+
+def test_concurrent_requests_share_a_batch():
+    batches = []
+
+    async def run_batch(requests):
+        batches.append(requests)
+        return [request * 10 for request in requests]
+
+    batcher = MicroBatcher(run_batch, max_batch=3, max_wait=0.01)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert asyncio.run(scenario()) == [0, 10, 20, 30, 40]
+    # A full batch goes right away, the rest waits for max_wait
+    assert batches == [[0, 1, 2], [3, 4]]
+    metrics = batcher.metrics()
+    assert metrics["batches"] == 2 and metrics["requests"] == 5
+    assert metrics["mean_batch_size"] == 2.5 and metrics["largest_batch"] == 3
+
+
+def test_errors_reach_every_caller_of_the_batch():
+    async def run_batch(requests):
+        raise ValueError("model failed")
+
+    batcher = MicroBatcher(run_batch)
+
+    async def scenario():
+        return await asyncio.gather(
+            batcher.submit(1), batcher.submit(2), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_batch_is_cancelled_once_every_caller_gave_up():
+    started, cancelled = asyncio.Event(), []
+
+    async def run_batch(requests):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(requests)
+            raise
+
+    batcher = MicroBatcher(run_batch, max_wait=0)
+
+    async def scenario():
+        first = asyncio.create_task(batcher.submit(1))
+        second = asyncio.create_task(batcher.submit(2))
+        await started.wait()
+        first.cancel()
+        await asyncio.sleep(0)
+        assert not cancelled
+        second.cancel()
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert cancelled == [[1, 2]]
+
+
+def test_tokens_per_second():
+    batcher = MicroBatcher(None)
+    batcher.record_generation(300, 2.0)
+    batcher.record_generation(100, 2.0)
+    assert batcher.metrics()["tokens_per_second"] == 100.0
+
+
+def test_queue_grows_while_every_worker_is_busy():
+    batches = []
+    release = asyncio.Event()
+
+    async def run_batch(requests):
+        batches.append(requests)
+        await release.wait()
+        return requests
+
+    batcher = MicroBatcher(run_batch, max_batch=4, max_wait=0, max_in_flight=1)
+
+    async def scenario():
+        first = asyncio.create_task(batcher.submit(0))
+        await asyncio.sleep(0.01)
+        # The only worker is busy, these queue up instead of going out one by one
+        rest = [asyncio.create_task(batcher.submit(i)) for i in range(1, 6)]
+        await asyncio.sleep(0.01)
+        assert batches == [[0]]
+        release.set()
+        return await asyncio.gather(first, *rest)
+
+    assert asyncio.run(scenario()) == [0, 1, 2, 3, 4, 5]
+    assert batches == [[0], [1, 2, 3, 4], [5]]
+    assert batcher.in_flight == 0
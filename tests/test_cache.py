@@ -0,0 +1,156 @@
+import asyncio
+import datetime
+
+from core.database.cache import LocalCache, RedisCache
+from core.database.serializers import MsgpackSerializer
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def set(self, key, value, ex=None):
+        self.commands.append((key, value))
+
+    async def execute(self):
+        self.redis.round_trips += 1
+        for key, value in self.commands:
+            self.redis.data[key] = value
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.round_trips = 0
+
+    async def get(self, key):
+        self.round_trips += 1
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.round_trips += 1
+        self.data[key] = value
+
+    async def mget(self, keys):
+        self.round_trips += 1
+        return [self.data.get(key) for key in keys]
+
+    async def delete(self, *keys):
+        self.round_trips += 1
+        for key in keys:
+            self.data.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+def test_set_many_and_get_many_use_one_round_trip_each():
+    redis = FakeRedis()
+    cache = RedisCache(redis)
+
+    async def scenario():
+        await cache.set_jobs({1: {"job_title": "A"}, 2: {"job_title": "B"}})
+        return await cache.get_jobs([2, 3, 1])
+
+    assert asyncio.run(scenario()) == [{"job_title": "B"}, None, {"job_title": "A"}]
+    assert redis.round_trips == 2
+
+
+def test_dates_are_stored_as_iso_strings():
+    cache = RedisCache(FakeRedis())
+
+    async def scenario():
+        await cache.set("job:1", {"job_deadline": datetime.date(2030, 1, 31)})
+        return await cache.get("job:1")
+
+    assert asyncio.run(scenario()) == {"job_deadline": "2030-01-31"}
+
+
+def test_msgpack_round_trips_dates_under_its_own_keys():
+    redis = FakeRedis()
+    cache = RedisCache(redis, serializer=MsgpackSerializer())
+    job = {
+        "job_deadline": datetime.date(2030, 1, 31),
+        "created_at": datetime.datetime(2025, 3, 1, 9, 30, 15, 250),
+        "updated_at": datetime.datetime(
+            2025, 3, 1, 9, 30, tzinfo=datetime.timezone.utc
+        ),
+    }
+
+    async def scenario():
+        await cache.set("job:1", job)
+        return await cache.get("job:1")
+
+    assert asyncio.run(scenario()) == job
+    assert list(redis.data) == ["v1:msgpack:job:1"]
+    assert RedisCache(redis).prefix == "v1:json:"
+
+
+def test_local_tier_serves_repeat_reads_until_invalidated():
+    redis = FakeRedis()
+    redis.data["v1:json:applicant:7"] = b'["Abebe", "1995-01-01"]'
+    cache = RedisCache(redis, local=LocalCache(maxsize=10, ttl=60))
+
+    async def scenario():
+        first = await cache.get("applicant:7")
+        second = await cache.get("applicant:7")
+        await cache.delete("applicant:7")
+        third = await cache.get("applicant:7")
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert first == second == ["Abebe", "1995-01-01"]
+    assert third is None
+    # get, delete and the get after it; the second read never left the process
+    assert redis.round_trips == 3
+
+
+def test_local_tier_is_bounded_and_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("core.database.cache.time.monotonic", lambda: now[0])
+    local = LocalCache(maxsize=2, ttl=30)
+
+    local.set("a", 1)
+    local.set("b", 2)
+    local.get("a")
+    local.set("c", 3)
+    assert local.get("b", None) is None
+    assert local.get("a") == 1
+
+    now[0] += 31
+    assert local.get("a", None) is None
+
+
+def test_unregistered_users_are_cached_until_registration(monkeypatch):
+    from types import SimpleNamespace
+
+    import utils.helpers as helpers
+
+    queries = []
+    registered = []
+
+    async def execute_query_async(query, params=None, row_type=None):
+        queries.append(params)
+        return list(registered)
+
+    monkeypatch.setattr(helpers, "cache", RedisCache(FakeRedis()))
+    monkeypatch.setattr(helpers, "execute_query_async", execute_query_async)
+    update = SimpleNamespace(effective_user=SimpleNamespace(id=7))
+
+    async def scenario():
+        before = [await helpers.get_applicant(update, None) for _ in range(3)]
+        registered.append({"user_id": 1, "name": "Abebe"})
+        await helpers.invalidate_applicant(7)
+        return before, await helpers.get_applicant(update, None)
+
+    before, after = asyncio.run(scenario())
+    assert before == [None, None, None]
+    assert after == {"user_id": 1, "name": "Abebe"}
+    assert len(queries) == 2
@@ -0,0 +1,155 @@
+import asyncio
+
+from redis.exceptions import ConnectionError
+
+import core.ai.cover_letter as cover_letter_module
+from core.ai.cover_letter import draft_cover_letters
+
+JOB = (7, "Backend Developer", "Acme", "Build APIs")
+
+
+class FakeCache:
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ttl=3600):
+        self.values[key] = value
+
+
+def test_drafts_are_generated_once_per_job_and_profile(monkeypatch):
+    generated = []
+
+    async def submit(request):
+        generated.append(request["skills"])
+        await asyncio.sleep(0.01)
+        return [f"letter {len(generated)}.{i}" for i in range(3)]
+
+    monkeypatch.setattr(cover_letter_module, "cache", FakeCache())
+    monkeypatch.setattr(cover_letter_module.drafts, "submit", submit)
+
+    async def scenario():
+        # Concurrent misses share one generation
+        first, second = await asyncio.gather(
+            draft_cover_letters(*JOB, "Python", "5 years"),
+            draft_cover_letters(*JOB, "Python", "5 years"),
+        )
+        cached = await draft_cover_letters(*JOB, "Python", "5 years")
+        other_profile = await draft_cover_letters(*JOB, "Go", "5 years")
+        refreshed = await draft_cover_letters(*JOB, "Python", "5 years", refresh=True)
+        return first, second, cached, other_profile, refreshed
+
+    first, second, cached, other_profile, refreshed = asyncio.run(scenario())
+    assert first == second
+    assert cached == (first[0], first[1], False)
+    assert first[1:] == (["letter 1.0", "letter 1.1", "letter 1.2"], True)
+    assert other_profile[0] != first[0]
+    assert refreshed == (first[0], ["letter 3.0", "letter 3.1", "letter 3.2"], True)
+    assert generated == ["Python", "Go", "Python"]
+
+
+def test_stopped_generations_are_not_cached(monkeypatch):
+    fake_cache = FakeCache()
+
+    async def submit(request):
+        return []
+
+    monkeypatch.setattr(cover_letter_module, "cache", fake_cache)
+    monkeypatch.setattr(cover_letter_module.drafts, "submit", submit)
+
+    assert asyncio.run(draft_cover_letters(*JOB, "Python", "5 years"))[1] == []
+    assert fake_cache.values == {}
+
+
+class FakeService:
+    def __init__(self):
+        self.published = {}
+
+    def progress(self, key):
+        return self.published.get(key)
+
+    def clear_progress(self, key):
+        self.published.pop(key, None)
+
+
+def test_new_drafts_are_streamed(monkeypatch):
+    service = FakeService()
+
+    async def submit(request):
+        for text in ("Dear", "Dear hiring manager,"):
+            service.published[request["stream"]] = text
+            await asyncio.sleep(0.2)
+        return ["Dear hiring manager, ...", "To whom it may concern, ..."]
+
+    monkeypatch.setattr(cover_letter_module, "cache", FakeCache())
+    monkeypatch.setattr(cover_letter_module, "cover_letters", service)
+    monkeypatch.setattr(cover_letter_module.drafts, "submit", submit)
+    monkeypatch.setattr(cover_letter_module, "STREAM_INTERVAL", 0.01)
+    monkeypatch.setattr(cover_letter_module, "STREAM_EDIT_INTERVAL", 0.1)
+    shown = []
+
+    async def on_text(text):
+        shown.append(text)
+
+    async def scenario():
+        drafted = await draft_cover_letters(*JOB, "Python", "5 years", on_text=on_text)
+        # Cached drafts are shown right away, nothing to stream
+        cached = await draft_cover_letters(*JOB, "Python", "5 years", on_text=on_text)
+        return drafted, cached
+
+    drafted, cached = asyncio.run(scenario())
+    assert shown == ["Dear", "Dear hiring manager,"]
+    assert drafted[:2] == cached[:2]
+    assert service.published == {}
+
+
+class BrokenCache:
+    async def get(self, key):
+        raise ConnectionError("Redis is down")
+
+    async def set(self, key, value, ttl=3600):
+        raise ConnectionError("Redis is down")
+
+
+def test_drafts_are_written_when_redis_is_down(monkeypatch):
+    async def submit(request):
+        return ["Dear hiring manager, ..."]
+
+    monkeypatch.setattr(cover_letter_module, "cache", BrokenCache())
+    monkeypatch.setattr(cover_letter_module.drafts, "submit", submit)
+
+    _, candidates, generated = asyncio.run(
+        draft_cover_letters(*JOB, "Python", "5 years")
+    )
+    assert candidates == ["Dear hiring manager, ..."]
+    assert generated
+
+
+def test_jsonb_profile_fields_are_drafted_as_text(monkeypatch):
+    from applicants.handlers.application import profile_text
+
+    requests = []
+
+    async def submit(request):
+        requests.append(request)
+        return ["letter"]
+
+    monkeypatch.setattr(cover_letter_module, "cache", FakeCache())
+    monkeypatch.setattr(cover_letter_module.drafts, "submit", submit)
+
+    experience = {"years": 5, "roles": ["Backend Developer"]}
+    assert profile_text(None) == ""
+    assert profile_text(["Python", "SQL"]) == "Python, SQL"
+    assert profile_text(experience) == profile_text(dict(reversed(experience.items())))
+
+    async def scenario():
+        return await draft_cover_letters(
+            *JOB, profile_text(["Python"]), profile_text(experience)
+        )
+
+    key, candidates, generated = asyncio.run(scenario())
+    assert (candidates, generated) == (["letter"], True)
+    assert requests[0]["skills"] == "Python"
+    assert '"years": 5' in requests[0]["experience"]
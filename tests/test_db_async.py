@@ -0,0 +1,26 @@
+import pytest
+
+from utils.db import _to_text
+
+
+def test_placeholders_become_named_binds():
+    statement, params = _to_text(
+        "SELECT * FROM users WHERE telegram_id = %s AND role_id = %s", (42, 1)
+    )
+
+    assert str(statement) == (
+        "SELECT * FROM users WHERE telegram_id = :p0 AND role_id = :p1"
+    )
+    assert params == {"p0": 42, "p1": 1}
+
+
+def test_query_without_params_is_left_untouched():
+    statement, params = _to_text("SELECT * FROM categories")
+
+    assert str(statement) == "SELECT * FROM categories"
+    assert params == {}
+
+
+def test_placeholder_count_must_match_params():
+    with pytest.raises(ValueError):
+        _to_text("SELECT * FROM jobs WHERE job_id = %s", (1, 2))
@@ -0,0 +1,113 @@
+import threading
+
+import pytest
+from psycopg2 import extensions
+
+from core.database.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool():
+    return ConnectionPool(FakeConnection, minconn=1, maxconn=2, timeout=0.05)
+
+
+def test_reuses_returned_connection(pool):
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+
+    assert first is second
+    assert pool.stats()["created"] == 1
+    assert pool.stats()["checkouts"] == 2
+
+
+def test_times_out_when_exhausted(pool):
+    a = pool.getconn()
+    b = pool.getconn()
+
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+
+    pool.putconn(a)
+    pool.putconn(b)
+    assert pool.stats()["timeouts"] == 1
+    assert pool.stats()["in_use"] == 0
+
+
+def test_waiter_gets_connection_when_released(pool):
+    a = pool.getconn()
+    b = pool.getconn()
+    got = []
+
+    waiter = threading.Thread(target=lambda: got.append(pool.getconn(timeout=1)))
+    waiter.start()
+    pool.putconn(a)
+    waiter.join()
+
+    assert got == [a]
+    pool.putconn(b)
+    pool.putconn(a)
+
+
+def test_rolls_back_open_transaction_on_return(pool):
+    with pool.connection() as conn:
+        conn.status = extensions.TRANSACTION_STATUS_INTRANS
+
+    assert conn.rollbacks == 1
+    assert pool.stats()["idle"] == 1
+
+
+def test_discards_closed_connection_on_checkout(pool):
+    with pool.connection() as conn:
+        pass
+    conn.closed = True
+
+    with pool.connection() as fresh:
+        pass
+
+    assert fresh is not conn
+    assert pool.stats()["health_check_failures"] == 1
+    assert pool.stats()["discarded"] == 1
+
+
+def test_slow_connect_does_not_block_other_checkouts():
+    connecting, release = threading.Event(), threading.Event()
+    calls = []
+
+    def connect():
+        calls.append(1)
+        if len(calls) == 2:
+            connecting.set()
+            release.wait(5)
+        return FakeConnection()
+
+    pool = ConnectionPool(connect, minconn=0, maxconn=2, timeout=1)
+    first = pool.getconn()
+    slow = threading.Thread(target=pool.getconn)
+    slow.start()
+    connecting.wait(1)
+
+    # Returning and checking out again go through while the other thread is connecting
+    pool.putconn(first)
+    assert pool.getconn(timeout=0.1) is first
+    release.set()
+    slow.join(1)
+    assert pool.stats()["created"] == 2
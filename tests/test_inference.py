@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+import pytest
+
+from core.ai.inference import InferenceService, InferenceTimeout, publish
+from core.ai.models import models
+
+_factor = None
+
+
+def load(factor):
+    global _factor
+    _factor = models.get("factor", lambda: factor)
+
+
+def run(payload, should_stop):
+    if payload == "wait":
+        # Runs until abandoned, or for a long time
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline and not should_stop():
+            time.sleep(0.01)
+        return "stopped"
+    if payload == "publish":
+        publish("progress", "partial")
+        return "done"
+    return payload * _factor
+
+
+@pytest.fixture
+def service():
+    service = InferenceService(load, run, load_args=(2,), workers=1, timeout=10)
+    yield service
+    service.stop()
+
+
+def test_requests_run_in_the_workers(service):
+    async def scenario():
+        return await asyncio.gather(service.submit(1), service.submit(21))
+
+    assert asyncio.run(scenario()) == [2, 42]
+
+
+def test_timed_out_requests_stop_and_free_their_worker(service):
+    async def scenario():
+        with pytest.raises(InferenceTimeout):
+            await service.submit("wait", timeout=1)
+        # The only worker is free again well before the abandoned request would have ended
+        return await service.submit(5, timeout=5)
+
+    assert asyncio.run(scenario()) == 10
+
+
+def test_cancelled_requests_stop(service):
+    async def scenario():
+        task = asyncio.create_task(service.submit("wait"))
+        await asyncio.sleep(1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return await service.submit(3, timeout=5)
+
+    assert asyncio.run(scenario()) == 6
+
+
+def test_preload_loads_the_workers_models(service):
+    async def scenario():
+        return await service.preload()
+
+    [loaded] = asyncio.run(scenario())
+    assert set(loaded) == {"factor"}
+    assert loaded["factor"]["size_mb"] == 0
+
+
+def test_partial_results_are_shared_with_the_main_process(service):
+    async def scenario():
+        return await service.submit("publish")
+
+    assert asyncio.run(scenario()) == "done"
+    assert service.progress("progress") == "partial"
+    service.clear_progress("progress")
+    assert service.progress("progress") is None
@@ -0,0 +1,279 @@
+import asyncio
+import datetime
+import json
+from types import SimpleNamespace
+
+import utils.job_alerts as job_alerts_module
+from core.database.cache import RELEASE_LEASE
+from modules.employer.domain.entities import JobCard
+from utils.job_alerts import (
+    DIGEST,
+    JobAlerts,
+    alert_keys,
+    matches,
+    render_digest,
+)
+
+KEYS = alert_keys(3, "Adama", "Full Time")
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    async def execute(self):
+        for name, args, kwargs in self.commands:
+            getattr(self.redis, f"_{name}")(*args, **kwargs)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+        self.pending = {}
+        self.values = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def register_script(self, script):
+        async def run(keys, args):
+            if self.values.get(keys[0]) != args[0]:
+                return 0
+            if script == RELEASE_LEASE:
+                del self.values[keys[0]]
+            return 1
+
+        return run
+
+    def _hset(self, key, field=None, value=None, mapping=None):
+        fields = mapping or {field: value}
+        self.hashes.setdefault(key, {}).update(
+            {name.encode(): str(value).encode() for name, value in fields.items()}
+        )
+
+    def _hdel(self, key, *fields):
+        for field in fields:
+            self.hashes.get(key, {}).pop(field.encode(), None)
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        self._hset(key, field, value, mapping)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def delete(self, *keys):
+        self._delete(*keys)
+
+    def _hincrby(self, key, field, amount):
+        current = int(self.hashes[key].get(field.encode(), b"0"))
+        self.hashes[key][field.encode()] = str(current + amount).encode()
+
+    def _hincrbyfloat(self, key, field, amount):
+        current = float(self.hashes[key].get(field.encode(), b"0"))
+        self.hashes[key][field.encode()] = str(current + amount).encode()
+
+    def _zadd(self, key, mapping):
+        self.pending.update(mapping)
+
+    def _zrem(self, key, member):
+        self.pending.pop(member, None)
+
+    def _delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+            self.values.pop(key, None)
+
+    def _expire(self, key, ttl):
+        pass
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, **kwargs):
+        self.sent.append(chat_id)
+
+
+def test_matches_every_field_the_subscriber_picked():
+    assert matches(["category:3"], KEYS)
+    assert matches(["category:3", "city:Adama", "city:Hawassa"], KEYS)
+    assert not matches(["category:3", "city:Hawassa"], KEYS)
+    assert not matches(["type:Part Time"], KEYS)
+    assert not matches([], KEYS)
+    assert not matches(None, KEYS)
+
+
+def test_fan_out_resumes_from_the_checkpoint(monkeypatch):
+    users = [
+        {"user_id": 1, "telegram_id": 101, "subscribed_alerts": ["category:3"]},
+        {"user_id": 2, "telegram_id": 102, "subscribed_alerts": ["city:Adama"]},
+        {"user_id": 3, "telegram_id": 103, "subscribed_alerts": ["city:Hawassa"]},
+        {"user_id": 4, "telegram_id": 104, "subscribed_alerts": ["type:Full Time"]},
+    ]
+
+    async def subscribers(self, keys, after):
+        return [user for user in users if user["user_id"] > after][:2]
+
+    async def get_job(job_id):
+        row = {column: "x" for column in JobCard.__slots__}
+        return JobCard.from_row(row | {"job_id": job_id, "job_deadline": "2030-01-01"})
+
+    monkeypatch.setattr(JobAlerts, "_subscribers", subscribers)
+    monkeypatch.setattr(job_alerts_module, "get_job", get_job)
+    redis, bot = FakeRedis(), FakeBot()
+    alerts = JobAlerts(client=redis)
+
+    async def scenario():
+        await alerts.enqueue(7, 3, "Adama", "Full Time")
+        # A previous run got through the first chunk before it crashed
+        redis._hset("job_alerts:7", "cursor", 2)
+        await redis.set("job_alerts:7:owner", alerts._id, nx=True)
+        await alerts.fan_out(bot, 7)
+
+    asyncio.run(scenario())
+    assert bot.sent == [104]
+    assert redis.pending == {}
+    assert redis.hashes == {}
+
+
+def test_fan_out_stops_when_another_worker_took_the_lease(monkeypatch):
+    users = [
+        {"user_id": i, "telegram_id": 100 + i, "subscribed_alerts": ["category:3"]}
+        for i in (1, 2, 3)
+    ]
+
+    async def subscribers(self, keys, after):
+        return [user for user in users if user["user_id"] > after][:1]
+
+    async def get_job(job_id):
+        row = {column: "x" for column in JobCard.__slots__}
+        return JobCard.from_row(row | {"job_id": job_id, "job_deadline": "2030-01-01"})
+
+    monkeypatch.setattr(JobAlerts, "_subscribers", subscribers)
+    monkeypatch.setattr(job_alerts_module, "get_job", get_job)
+    redis, bot = FakeRedis(), FakeBot()
+    alerts = JobAlerts(client=redis)
+
+    async def scenario():
+        await alerts.enqueue(7, 3, "Adama", "Full Time")
+        # Our lease expired while we were stalled, and another worker took it over
+        await redis.set("job_alerts:7:owner", "other worker")
+        await alerts.fan_out(bot, 7)
+        await alerts._release("job_alerts:7:owner")
+
+    asyncio.run(scenario())
+    # The chunk in hand went out, then the fan-out was left to the new owner untouched
+    assert bot.sent == [101]
+    assert redis.hashes["job_alerts:7"][b"cursor"] == b"0"
+    assert redis.values["job_alerts:7:owner"] == "other worker"
+    assert 7 in redis.pending
+
+
+def test_fan_out_keeps_the_checkpoint_on_database_errors(monkeypatch):
+    async def execute_query_async(query, params=None, row_type=None):
+        raise Exception("Database error occurred: connection refused")
+
+    async def get_job(job_id):
+        row = {column: "x" for column in JobCard.__slots__}
+        return JobCard.from_row(row | {"job_id": job_id, "job_deadline": "2030-01-01"})
+
+    monkeypatch.setattr(job_alerts_module, "execute_query_async", execute_query_async)
+    monkeypatch.setattr(job_alerts_module, "get_job", get_job)
+    redis, bot = FakeRedis(), FakeBot()
+    alerts = JobAlerts(client=redis)
+
+    async def scenario():
+        await alerts.enqueue(7, 3, "Adama", "Full Time")
+        await alerts.fan_out(bot, 7)
+
+    asyncio.run(scenario())
+    assert bot.sent == []
+    assert 7 in redis.pending
+    assert redis.hashes["job_alerts:7"][b"cursor"] == b"0"
+
+
+def test_render_digest_lists_the_newest_jobs():
+    jobs = [
+        {
+            "job_id": i,
+            "job_title": f"Job <{i}>",
+            "job_city": "Adama",
+            "job_type": "Remote",
+        }
+        for i in range(12)
+    ]
+    text, reply_markup = render_digest(jobs)
+    assert text.startswith("🔔 <b>12 new jobs matching your alerts</b>")
+    assert "Job &lt;0&gt;" in text and "Job &lt;10&gt;" not in text
+    assert "and 2 more" in text
+    assert [row[0].callback_data for row in reply_markup.inline_keyboard] == [
+        f"apply_{i}" for i in range(10)
+    ]
+
+
+def test_digests_are_sent_once_per_period(monkeypatch):
+    queries = []
+
+    async def execute_query_async(query, params=None, row_type=None):
+        queries.append(params)
+        jobs = [{"job_id": 1, "job_title": "A", "job_city": "B", "job_type": "C"}]
+        return [
+            {"user_id": 5, "telegram_id": 105, "jobs": json.dumps(jobs)},
+            {"user_id": 6, "telegram_id": 106, "jobs": json.dumps(jobs * 2)},
+        ]
+
+    monkeypatch.setattr(job_alerts_module, "execute_query_async", execute_query_async)
+    redis, bot = FakeRedis(), FakeBot()
+    alerts = JobAlerts(client=redis)
+    last = datetime.datetime.now() - datetime.timedelta(days=1, minutes=1)
+    redis._hset(DIGEST, "since", last.isoformat())
+
+    async def scenario():
+        context = SimpleNamespace(bot=bot)
+        await alerts.send_digests(context)
+        # The next check falls in the new period, nothing to send yet
+        await alerts.send_digests(context)
+
+    asyncio.run(scenario())
+    assert bot.sent == [105, 106]
+    assert len(queries) == 1 and queries[0][0] == last
+    assert set(redis.hashes[DIGEST]) == {b"since"}
+
+
+def test_closed_jobs_are_not_sent(monkeypatch):
+    async def subscribers(self, keys, after):
+        return [{"user_id": 1, "telegram_id": 101, "subscribed_alerts": ["category:3"]}]
+
+    async def get_job(job_id):
+        row = {column: "x" for column in JobCard.__slots__}
+        return JobCard.from_row(row | {"job_id": job_id, "job_status": "closed"})
+
+    monkeypatch.setattr(JobAlerts, "_subscribers", subscribers)
+    monkeypatch.setattr(job_alerts_module, "get_job", get_job)
+    redis, bot = FakeRedis(), FakeBot()
+    alerts = JobAlerts(client=redis)
+
+    async def scenario():
+        await alerts.enqueue(7, 3, "Adama", "Full Time")
+        await alerts.fan_out(bot, 7)
+
+    asyncio.run(scenario())
+    assert bot.sent == []
+    assert redis.pending == {}
@@ -0,0 +1,129 @@
+import datetime
+
+from modules.employer.domain.entities import JobCard
+from utils.job_cards import (
+    CARD_LIMIT,
+    fit_text,
+    invalidate_job_card,
+    render_job_card,
+)
+
+
+def make_job(**fields):
+    job = {
+        "job_id": 1,
+        "job_title": "Backend Engineer",
+        "job_site": "Remote",
+        "job_type": "Full Time",
+        "job_city": "Addis Ababa",
+        "job_country": "Ethiopia",
+        "gender_preference": "Both",
+        "salary_amount": 50000,
+        "salary_currency": "ETB",
+        "salary_type": "Monthly",
+        "job_deadline": datetime.date(2030, 1, 31),
+        "job_description": "Build services.",
+        "job_requirements": "Python & SQL <3 years>",
+        "user_id": 10,
+        "job_status": "open",
+        "updated_at": None,
+    }
+    job.update(fields)
+    return JobCard(**job)
+
+
+def test_cards_are_escaped_and_rendered_once_per_audience():
+    job = make_job(job_id=101)
+
+    text, actions = render_job_card(job, "applicant")
+    assert "Python &amp; SQL &lt;3 years&gt;" in text
+    assert "January 31, 2030" in text
+    assert [button.callback_data for button in actions[0]] == ["save_101", "apply_101"]
+    assert render_job_card(job, "applicant")[0] is text
+
+    channel_text, channel_actions = render_job_card(job, "channel")
+    assert channel_actions[0][0].url.endswith("?start=apply_101")
+    # Close acts on the job the card shows, not on wherever the employer navigated since
+    _, employer_actions = render_job_card(job, "employer")
+    assert employer_actions[0][1].callback_data == "myjob_close_101"
+
+    # An edit shows up as soon as the new row is read, even if this process missed the
+    # invalidation
+    edited = make_job(
+        job_id=101,
+        job_title="Lead Engineer",
+        updated_at=datetime.datetime(2030, 1, 1, 12, 0),
+    )
+    edited_text = render_job_card(edited, "applicant")[0]
+    assert "Lead Engineer" in edited_text
+    assert "Lead Engineer" in render_job_card(edited, "channel")[0]
+    assert render_job_card(edited, "applicant")[0] is edited_text
+
+    # The JSON cache serializer reads updated_at back as a string, still the same version
+    from_json = make_job(
+        job_id=101, job_title="Lead Engineer", updated_at="2030-01-01T12:00:00"
+    )
+    assert render_job_card(from_json, "applicant")[0] is edited_text
+
+    invalidate_job_card(101)
+    assert render_job_card(edited, "applicant")[0] is not edited_text
+
+
+def test_row_types_of_one_job_share_its_cards():
+    from modules.applicant.domain.entities import ApplicationCard, FeedJobCard
+
+    job = make_job(job_id=104)
+    fields = job.as_dict()
+    feed = FeedJobCard(**fields, created_at=datetime.datetime(2030, 1, 1))
+    accepted = ApplicationCard(**fields, status="accepted")
+    rejected = ApplicationCard(**fields, status="rejected")
+
+    text = render_job_card(job, "applicant")[0]
+    assert render_job_card(feed, "applicant")[0] is text
+    assert render_job_card(job, "applicant")[0] is text
+
+    text = render_job_card(accepted, "application")[0]
+    assert render_job_card(rejected, "application")[0] is text
+
+
+def test_long_cards_are_truncated_below_the_message_limit():
+    job = make_job(
+        job_id=102,
+        job_description="<tag> & " * 2000,
+        job_requirements="Requirement. " * 50,
+    )
+
+    text, _ = render_job_card(job, "saved")
+    assert len(text) <= CARD_LIMIT
+    assert "…" in text
+    # Short requirements are kept whole, the description gets the rest
+    assert "Requirement. " * 49 in text
+
+
+def test_fit_text_never_splits_an_entity():
+    fitted = fit_text("a&b" * 10, 12)
+    assert len(fitted) <= 12
+    assert fitted.endswith("…")
+    assert fitted.count("&") == fitted.count("&amp;")
+
+
+def test_application_summary_fits_a_long_cover_letter():
+    from applicants.handlers.application import _application_summary
+    from utils.job_cards import MESSAGE_LIMIT
+
+    job_details, _ = render_job_card(
+        make_job(job_id=103, job_description="x" * 5000), "application"
+    )
+    summary = _application_summary(
+        job_details,
+        {
+            "cover_letter": "Dear <team> & co, " * 500,
+            "new_cv": "file-id",
+            "portfolio": ["https://example.com/me"],
+        },
+    )
+
+    assert len(summary) <= MESSAGE_LIMIT
+    assert "Dear &lt;team&gt; &amp; co" in summary
+    assert "https://example.com/me" in summary
+    assert summary.endswith("<b>Apply for the job?</b>")
@@ -0,0 +1,84 @@
+import threading
+import time
+
+from core.ai.models import ModelRegistry
+
+
+def test_models_load_once_on_first_use():
+    registry, loads = ModelRegistry(), []
+
+    def load():
+        loads.append(1)
+        time.sleep(0.1)
+        return object()
+
+    assert not registry.loaded("model")
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(registry.get("model", load)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert len(set(map(id, results))) == 1
+    assert registry.stats()["model"]["load_seconds"] >= 0.1
+
+
+def test_preload_loads_in_the_background():
+    registry, release = ModelRegistry(), threading.Event()
+
+    def load():
+        release.wait(5)
+        return "model"
+
+    thread = registry.preload("model", load)
+    assert not registry.loaded("model")
+    release.set()
+    thread.join(5)
+    assert registry.loaded("model")
+    # Already loaded, the second loader is never called
+    assert registry.get("model", lambda: 1 / 0) == "model"
+
+
+def test_failed_preloads_are_retried_on_first_use():
+    registry = ModelRegistry()
+    registry.preload("model", lambda: 1 / 0).join(5)
+    assert not registry.loaded("model")
+    assert registry.get("model", lambda: "model") == "model"
+
+
+def test_text_generation_shares_the_causal_lm(monkeypatch):
+    import sys
+    import types
+
+    import core.ai.models as models_module
+
+    loads = []
+
+    class Model:
+        def eval(self):
+            pass
+
+    def from_pretrained(name):
+        loads.append(name)
+        return Model()
+
+    transformers = types.SimpleNamespace(
+        AutoModelForCausalLM=types.SimpleNamespace(from_pretrained=from_pretrained),
+        AutoTokenizer=types.SimpleNamespace(from_pretrained=lambda name: "tokenizer"),
+        pipeline=lambda task, model, tokenizer: (task, model, tokenizer),
+    )
+    monkeypatch.setitem(sys.modules, "transformers", transformers)
+    monkeypatch.setattr(models_module, "models", ModelRegistry())
+
+    tokenizer, model = models_module.causal_lm("gpt2")
+    assert models_module.text_generation("gpt2") == (
+        "text-generation",
+        model,
+        tokenizer,
+    )
+    assert loads == ["gpt2"]
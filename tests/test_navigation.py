@@ -0,0 +1,63 @@
+import asyncio
+
+from utils.navigation import (
+    MemoryNavigationBackend,
+    NavigationStore,
+    navigation_buttons,
+)
+
+
+def test_positions_are_per_chat():
+    store = NavigationStore(MemoryNavigationBackend(ttl=60))
+
+    async def scenario():
+        await store.set(1, "savedjob", 3, total=10)
+        await store.set(2, "savedjob", 7, total=10)
+        return await store.get(1, "savedjob"), await store.get(2, "savedjob")
+
+    assert asyncio.run(scenario()) == (3, 7)
+
+
+def test_set_clamps_to_list_bounds():
+    store = NavigationStore(MemoryNavigationBackend(ttl=60))
+
+    async def scenario():
+        return (
+            await store.set(1, "myjob", -1, total=4),
+            await store.set(1, "myjob", 9, total=4),
+        )
+
+    assert asyncio.run(scenario()) == (0, 3)
+
+
+def test_expired_and_evicted_entries_are_forgotten():
+    backend = MemoryNavigationBackend(ttl=0)
+    store = NavigationStore(backend)
+
+    async def expired():
+        await store.set(1, "application", 2, total=5)
+        return await store.get(1, "application")
+
+    assert asyncio.run(expired()) == 0
+
+    backend = MemoryNavigationBackend(ttl=60, max_entries=2)
+    store = NavigationStore(backend)
+
+    async def evicted():
+        for chat_id in (1, 2, 3):
+            await store.set(chat_id, "mycompany", 1, total=5)
+        return [await store.get(chat_id, "mycompany") for chat_id in (1, 2, 3)]
+
+    assert asyncio.run(evicted()) == [0, 1, 1]
+
+
+def test_navigation_buttons():
+    first = navigation_buttons("applicant", 0, 3, "_42")
+    middle = navigation_buttons("applicant", 1, 3, "_42")
+
+    assert [b.callback_data for b in first] == ["applicant_next_42"]
+    assert [b.callback_data for b in middle] == [
+        "applicant_previous_42",
+        "applicant_next_42",
+    ]
+    assert navigation_buttons("myjob", 0, 1) == []
@@ -0,0 +1,41 @@
+import datetime
+
+import pytest
+
+from utils.pagination import decode_cursor, encode_cursor
+
+
+def test_round_trips_naive_timestamp():
+    created_at = datetime.datetime(2025, 3, 1, 12, 30, 45, 123456)
+
+    assert decode_cursor(encode_cursor(created_at, 4821)) == (created_at, 4821)
+
+
+def test_round_trips_aware_timestamp_as_utc():
+    tz = datetime.timezone(datetime.timedelta(hours=3))
+    created_at = datetime.datetime(2025, 3, 1, 15, 30, tzinfo=tz)
+
+    decoded, job_id = decode_cursor(encode_cursor(created_at, 7))
+
+    assert decoded == created_at
+    assert decoded.tzinfo == datetime.timezone.utc
+    assert job_id == 7
+
+
+def test_callback_data_fits_telegram_limit():
+    created_at = datetime.datetime(2099, 12, 31, 23, 59, 59, 999999)
+    data = f"job_previous_{encode_cursor(created_at, 2**31 - 1)}"
+
+    assert len(data.encode()) <= 64
+
+
+def test_rejects_malformed_cursor():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_rejects_tampered_cursor_out_of_range():
+    with pytest.raises(ValueError):
+        decode_cursor(f"{'f' * 40}.1")
+    with pytest.raises(ValueError):
+        decode_cursor(f"0.{'f' * 40}")
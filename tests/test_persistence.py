@@ -0,0 +1,132 @@
+import asyncio
+import fnmatch
+
+from core.telegram.persistence import RedisPersistence
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    async def execute(self):
+        self.redis.round_trips += 1
+        for name, args in self.commands:
+            getattr(self.redis, f"_{name}")(*args)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.round_trips = 0
+
+    def _set(self, key, value):
+        self.data[key] = value
+
+    def _delete(self, key):
+        self.data.pop(key, None)
+
+    def _hset(self, key, field, value):
+        self.data.setdefault(key, {})[field.encode()] = value
+
+    def _hdel(self, key, field):
+        self.data.get(key, {}).pop(field.encode(), None)
+
+    async def get(self, key):
+        self.round_trips += 1
+        return self.data.get(key)
+
+    async def set(self, key, value):
+        self.round_trips += 1
+        self._set(key, value)
+
+    async def mget(self, keys):
+        self.round_trips += 1
+        return [self.data.get(key.decode()) for key in keys]
+
+    async def hgetall(self, key):
+        self.round_trips += 1
+        return dict(self.data.get(key, {}))
+
+    async def scan_iter(self, match):
+        for key in list(self.data):
+            if fnmatch.fnmatch(key, match):
+                yield key.encode()
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+def test_writes_are_coalesced_and_unchanged_data_is_skipped():
+    redis = FakeRedis()
+    persistence = RedisPersistence("ptb:test:", client=redis)
+
+    async def flush_cycle(users):
+        await asyncio.gather(
+            *(persistence.update_user_data(uid, data) for uid, data in users.items()),
+            persistence.update_conversation("apply_job", (1, 1), 2),
+        )
+
+    async def scenario():
+        await flush_cycle({1: {"job_id": 7}, 2: {"job_id": 8}})
+        after_first = redis.round_trips
+        # Only user 2's draft changed
+        await flush_cycle({1: {"job_id": 7}, 2: {"job_id": 9}})
+        return after_first, redis.round_trips
+
+    after_first, after_second = asyncio.run(scenario())
+    assert after_first == 1
+    assert after_second == 2
+
+    restarted = RedisPersistence("ptb:test:", client=redis)
+
+    async def load():
+        return (
+            await restarted.get_user_data(),
+            await restarted.get_conversations("apply_job"),
+        )
+
+    user_data, conversations = asyncio.run(load())
+    assert user_data == {1: {"job_id": 7}, 2: {"job_id": 9}}
+    assert conversations == {(1, 1): 2}
+
+
+def test_ended_conversations_and_dropped_users_are_removed():
+    redis = FakeRedis()
+    persistence = RedisPersistence("ptb:test:", client=redis)
+
+    async def scenario():
+        await persistence.update_conversation("post_job", (5, 5), 3)
+        await persistence.update_user_data(5, {"job_title": "Cook"})
+        await persistence.update_conversation("post_job", (5, 5), None)
+        await persistence.drop_user_data(5)
+        return (
+            await persistence.get_conversations("post_job"),
+            await persistence.get_user_data(),
+        )
+
+    assert asyncio.run(scenario()) == ({}, {})
+
+
+def test_refresh_picks_up_data_written_by_another_replica():
+    redis = FakeRedis()
+    first = RedisPersistence("ptb:test:", client=redis)
+    second = RedisPersistence("ptb:test:", client=redis)
+
+    async def scenario():
+        user_data = {"step": 1}
+        await first.update_user_data(3, user_data)
+        await second.update_user_data(3, {"step": 2})
+        await first.refresh_user_data(3, user_data)
+        return user_data
+
+    assert asyncio.run(scenario()) == {"step": 2}
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from telegram.error import RetryAfter
+
+from core.telegram.rate_limiter import (
+    PRIORITY_BROADCAST,
+    PRIORITY_REPLY,
+    OutboundRateLimiter,
+    TokenBucket,
+)
+
+
+def test_token_bucket_reserves_future_tokens():
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    # The third request waits for a token to refill, the fourth for two
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def test_replies_go_ahead_of_broadcasts():
+    limiter = OutboundRateLimiter(overall_rate=50, chat_burst=100)
+    limiter._gate.bucket.tokens = 0
+    order = []
+
+    async def send(name):
+        order.append(name)
+        return name
+
+    async def request(name, chat_id, priority):
+        return await limiter.process_request(
+            send, (name,), {}, "sendMessage", {"chat_id": chat_id}, priority
+        )
+
+    async def scenario():
+        broadcasts = [
+            asyncio.create_task(request(f"post{i}", -100, PRIORITY_BROADCAST))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0)
+        reply = asyncio.create_task(request("reply", 42, None))
+        await asyncio.gather(reply, *broadcasts)
+
+    asyncio.run(scenario())
+    assert order == ["reply", "post0", "post1", "post2"]
+    assert limiter.metrics()["sent"] == {"reply": 1, "broadcast": 3}
+
+
+def test_retry_after_pauses_and_retries():
+    limiter = OutboundRateLimiter(max_retries=1)
+    calls = []
+
+    async def flaky():
+        calls.append(asyncio.get_running_loop().time())
+        if len(calls) == 1:
+            raise RetryAfter(0)
+        return True
+
+    async def always_flooded():
+        raise RetryAfter(0)
+
+    async def scenario():
+        assert await limiter.process_request(
+            flaky, (), {}, "sendMessage", {"chat_id": 1}, None
+        )
+        with pytest.raises(RetryAfter):
+            await limiter.process_request(
+                always_flooded, (), {}, "sendMessage", {"chat_id": 2}, PRIORITY_REPLY
+            )
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+    assert limiter.retried == 2
+    assert limiter.failed == 1
+
+
+def test_only_idle_chat_buckets_are_dropped(monkeypatch):
+    monkeypatch.setattr("core.telegram.rate_limiter.CHAT_SWEEP_MIN", 2)
+    limiter = OutboundRateLimiter(private_chat_rate=1, chat_burst=2)
+
+    busy = limiter._chat_bucket(1)
+    busy.reserve()
+    busy.reserve()
+    limiter._chat_bucket(2)
+    # The third chat triggers a sweep: the untouched bucket goes, the drained one stays
+    limiter._chat_bucket(3)
+
+    assert set(limiter._chats) == {1, 3}
+    assert limiter._chat_bucket(1) is busy
+    assert limiter._chat_bucket(1).reserve() > 0
@@ -0,0 +1,97 @@
+import asyncio
+
+import utils.reference_data as reference_data_module
+from utils.helpers import get_all_cities
+from utils.reference_data import CITIES_KEYBOARD, ReferenceData
+
+
+def test_static_keyboards_are_built_once():
+    assert get_all_cities() is get_all_cities() is CITIES_KEYBOARD
+    assert CITIES_KEYBOARD.inline_keyboard[-1][0].callback_data == "Others"
+
+
+def test_categories_are_loaded_once_and_kept_when_a_reload_fails(monkeypatch):
+    results = [
+        [
+            {"category_id": 1, "name": "Engineering"},
+            {"category_id": 2, "name": "Finance"},
+            {"category_id": 3, "name": "Health"},
+        ],
+        Exception("Database error occurred: connection refused"),
+    ]
+    queries = []
+
+    async def execute_query_async(query, params=None, row_type=None):
+        queries.append(query)
+        result = results[len(queries) - 1]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(
+        reference_data_module, "execute_query_async", execute_query_async
+    )
+    data = ReferenceData(client=object())
+
+    async def scenario():
+        first = await data.get_category_keyboard()
+        second = await data.get_category_keyboard()
+        await data.load_categories()
+        return first, second, await data.get_category_keyboard()
+
+    first, second, after_failure = asyncio.run(scenario())
+    assert first is second is after_failure
+    assert [len(row) for row in first.inline_keyboard] == [2, 1]
+    assert first.inline_keyboard[1][0].callback_data == "Health_3"
+    assert len(queries) == 2
+
+
+class FakePubSub:
+    def __init__(self, messages):
+        self.messages = messages
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def subscribe(self, channel):
+        pass
+
+    async def listen(self):
+        for message in self.messages:
+            yield message
+
+
+class FakeClient:
+    def __init__(self):
+        self.subscriptions = 0
+
+    def pubsub(self):
+        self.subscriptions += 1
+        return FakePubSub([{"type": "subscribe"}, {"type": "message"}])
+
+
+def test_listener_survives_a_failed_reload(monkeypatch):
+    monkeypatch.setattr(reference_data_module, "RESUBSCRIBE_DELAY", 0)
+    client = FakeClient()
+    data = ReferenceData(client=client)
+    reloads = []
+
+    async def load_categories():
+        reloads.append(len(reloads))
+        if len(reloads) == 1:
+            raise RuntimeError("reload failed")
+
+    data.load_categories = load_categories
+
+    async def scenario():
+        listener = asyncio.create_task(data._listen())
+        while len(reloads) < 3:
+            await asyncio.sleep(0)
+        listener.cancel()
+
+    asyncio.run(scenario())
+    # Resubscribed after the failure, and reloaded again on resubscribing
+    assert client.subscriptions >= 2
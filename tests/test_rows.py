@@ -0,0 +1,35 @@
+import pytest
+
+from modules.applicant.domain.entities import ApplicationCard
+from modules.employer.domain.entities import CompanyCard, JobCard
+
+
+def test_from_row_keeps_only_declared_fields():
+    row = {name: name.upper() for name in ApplicationCard._fields}
+    row["salary_range"] = {"min": 1, "max": 2}
+
+    card = ApplicationCard.from_row(row)
+
+    assert card.job_title == "JOB_TITLE"
+    assert card.status == "STATUS"
+    assert not hasattr(card, "__dict__")
+    assert "salary_range" not in card.as_dict()
+
+
+def test_subclass_fields_extend_base_fields():
+    assert ApplicationCard._fields == JobCard._fields + ("status",)
+
+
+def test_columns_projection():
+    assert CompanyCard.columns() == "company_id, name, description, status, verified"
+    assert JobCard.columns("j").startswith("j.job_id, j.job_title, ")
+
+
+def test_cards_are_read_only():
+    card = CompanyCard(
+        company_id=1, name="Acme", description=None, status="approved", verified=True
+    )
+
+    with pytest.raises(AttributeError):
+        card.name = "Other"
+    assert card == CompanyCard.from_row(card.as_dict())
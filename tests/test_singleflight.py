@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_for_a_key_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def load(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return f"job {key}"
+
+    async def scenario():
+        return await asyncio.gather(
+            *(flight.do(1, lambda: load(1)) for _ in range(50)),
+            flight.do(2, lambda: load(2)),
+        )
+
+    results = asyncio.run(scenario())
+    assert results == ["job 1"] * 50 + ["job 2"]
+    assert calls == [1, 2]
+    assert flight.in_flight() == 0
+
+
+def test_errors_reach_every_caller_and_are_not_remembered():
+    flight = SingleFlight()
+    attempts = []
+
+    async def load():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        if len(attempts) == 1:
+            raise RuntimeError("database unavailable")
+        return "job"
+
+    async def scenario():
+        first = await asyncio.gather(
+            flight.do(1, load), flight.do(1, load), return_exceptions=True
+        )
+        return first, await flight.do(1, load)
+
+    first, second = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in first)
+    assert second == "job"
+    assert len(attempts) == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.01)
+        return "job"
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.do(1, load))
+        follower = asyncio.ensure_future(flight.do(1, load))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "job"
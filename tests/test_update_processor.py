@@ -0,0 +1,78 @@
+import asyncio
+
+from telegram import Chat, Message, Update
+
+from core.telegram.update_processor import PerChatUpdateProcessor, serialization_key
+
+
+def make_update(update_id, chat_id):
+    message = Message(
+        message_id=update_id, date=None, chat=Chat(chat_id, Chat.PRIVATE), text="hi"
+    )
+    return Update(update_id, message=message)
+
+
+def test_serialization_key():
+    assert serialization_key(make_update(1, 42)) == 42
+    assert serialization_key(Update(2)) is None
+    assert serialization_key("not an update") is None
+
+
+def test_chats_run_concurrently_in_order():
+    processor = PerChatUpdateProcessor(8)
+    events = []
+    running = 0
+    most_running = 0
+
+    async def handle(update):
+        nonlocal running, most_running
+        running += 1
+        most_running = max(most_running, running)
+        events.append(("start", update.update_id))
+        await asyncio.sleep(0.01)
+        events.append(("end", update.update_id))
+        running -= 1
+
+    updates = [make_update(i, 1 if i % 2 else 2) for i in range(6)]
+
+    async def scenario():
+        await asyncio.gather(
+            *(processor.process_update(update, handle(update)) for update in updates)
+        )
+
+    asyncio.run(scenario())
+
+    # Both chats ran side by side, each one update at a time, in order
+    assert most_running == 2
+    for chat in (1, 2):
+        ids = [(kind, i) for kind, i in events if updates[i].effective_chat.id == chat]
+        expected = [i for i in range(6) if updates[i].effective_chat.id == chat]
+        assert ids == [(kind, i) for i in expected for kind in ("start", "end")]
+    assert processor._locks == {}
+
+
+def test_waiting_updates_do_not_hold_a_slot():
+    processor = PerChatUpdateProcessor(2)
+    done = []
+
+    async def handle(update, delay):
+        await asyncio.sleep(delay)
+        done.append(update.update_id)
+
+    # Chat 1 floods the bot with slow updates, chat 2's one update must not wait behind them
+    flood = [make_update(i, 1) for i in range(5)]
+    other = make_update(5, 2)
+
+    async def scenario():
+        tasks = [
+            asyncio.create_task(processor.process_update(update, handle(update, 0.05)))
+            for update in flood
+        ]
+        await asyncio.sleep(0)
+        await processor.process_update(other, handle(other, 0))
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+    assert done[0] == 5
+    assert done[1:] == [0, 1, 2, 3, 4]
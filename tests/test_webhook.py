@@ -0,0 +1,254 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from core.database.cache import RELEASE_LEASE
+from core.telegram.webhook import (
+    SECRET_TOKEN_HEADER,
+    PartitionedUpdateQueue,
+    create_webhook_app,
+    ordering_key,
+)
+
+MESSAGE = {
+    "update_id": 7,
+    "message": {
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": 42, "type": "private"},
+        "from": {"id": 42, "is_bot": False, "first_name": "Abebe"},
+        "text": "hi",
+    },
+}
+
+
+class FakeApplication:
+    def __init__(self):
+        self.update_queue = asyncio.Queue()
+        self.bot = None
+
+
+def test_ordering_key():
+    assert ordering_key(MESSAGE) == 42
+    callback = {
+        "update_id": 8,
+        "callback_query": {
+            "id": "1",
+            "from": {"id": 5},
+            "message": {"chat": {"id": -100}},
+        },
+    }
+    assert ordering_key(callback) == -100
+    assert ordering_key({"update_id": 9, "inline_query": {"from": {"id": 5}}}) == 5
+    assert ordering_key({"update_id": 10}) == 10
+
+
+def test_webhook_checks_secret_token():
+    application = FakeApplication()
+    # Without the context manager, the lifespan (and the Telegram calls) doesn't run
+    client = TestClient(create_webhook_app(application, "s3cret"))
+
+    response = client.post("/telegram", json=MESSAGE)
+    assert response.status_code == 403
+    response = client.post(
+        "/telegram", json=MESSAGE, headers={SECRET_TOKEN_HEADER: "wrong"}
+    )
+    assert response.status_code == 403
+    assert application.update_queue.empty()
+
+    response = client.post(
+        "/telegram", json=MESSAGE, headers={SECRET_TOKEN_HEADER: "s3cret"}
+    )
+    assert response.status_code == 200
+    assert application.update_queue.get_nowait().update_id == 7
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.results = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def zadd(self, key, mapping):
+        self.results.append(None)
+
+    def zremrangebyscore(self, key, low, high):
+        self.results.append(None)
+
+    def zcard(self, key):
+        self.results.append(self.redis.live)
+
+    async def execute(self):
+        return self.results
+
+
+class FakeRedis:
+    def __init__(self, streams):
+        self.live = 1
+        self.values = {}
+        self.streams = streams  # stream -> [(entry ID, update)], in stream order
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def register_script(self, script):
+        async def run(keys, args):
+            if self.values.get(keys[0]) != args[0].encode():
+                return 0
+            if script == RELEASE_LEASE:
+                del self.values[keys[0]]
+            return 1
+
+        return run
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value.encode() if isinstance(value, str) else value
+        return True
+
+    async def expire(self, key, ttl):
+        pass
+
+    async def zrem(self, key, member):
+        pass
+
+    async def xread(self, streams, count, block):
+        ((stream, offset),) = streams.items()
+        entries = [
+            (entry_id, {b"update": json.dumps(data).encode()})
+            for entry_id, data in self.streams.get(stream, [])
+            if entry_id > offset
+        ][:count]
+        if not entries:
+            await asyncio.sleep(0.01)
+            return []
+        return [[stream.encode(), entries]]
+
+
+class FakeUpdateProcessor:
+    async def process_update(self, update, coroutine):
+        await coroutine
+
+
+class SlowApplication:
+    def __init__(self, redis):
+        self.bot = None
+        self.update_processor = FakeUpdateProcessor()
+        self.redis = redis
+        self.processed = []
+        self.offsets_seen = []
+        self.saved = []
+
+    async def update_persistence(self):
+        # Which leases were still held when persistence was saved
+        self.saved.append(
+            sorted(key for key in self.redis.values if key.endswith(":owner"))
+        )
+
+    async def process_update(self, update):
+        # The offset must not move before the update is processed
+        self.offsets_seen.append(self.redis.values.get("ptb:updates:0:offset"))
+        await asyncio.sleep(0.01)
+        self.processed.append(update.update_id)
+
+
+def message(update_id, chat_id):
+    data = json.loads(json.dumps(MESSAGE))
+    data["update_id"] = update_id
+    data["message"]["chat"]["id"] = chat_id
+    return data
+
+
+def test_partition_offsets_move_only_after_processing_and_drain_on_release():
+    redis = FakeRedis(
+        {
+            "ptb:updates:0": [
+                (b"1-0", message(1, 42)),
+                (b"2-0", message(2, 43)),
+                (b"3-0", message(3, 42)),
+            ]
+        }
+    )
+    application = SlowApplication(redis)
+    queue = PartitionedUpdateQueue(application, "ptb:", 1, client=redis)
+
+    async def scenario():
+        await queue.start()
+        while len(application.processed) < 3:
+            await asyncio.sleep(0.005)
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+    assert application.offsets_seen == [None, None, None]
+    assert application.processed.index(1) < application.processed.index(3)
+    assert redis.values["ptb:updates:0:offset"] == b"3-0"
+    # The lease was handed over after the batch was processed and persistence saved
+    assert "ptb:updates:0:owner" not in redis.values
+    assert application.saved == [["ptb:updates:0:owner"]]
+    assert queue.owned == {}
+
+
+def test_partition_given_up_finishes_its_batch_before_releasing_the_lease():
+    redis = FakeRedis({"ptb:updates:0": [(b"1-0", message(1, 43))]})
+    application = SlowApplication(redis)
+    queue = PartitionedUpdateQueue(application, "ptb:", 2, client=redis)
+    leases = []
+
+    async def process_update(update):
+        # A second worker joins while the update is being processed
+        redis.live = 2
+        await queue._rebalance()
+        leases.append(redis.values.get("ptb:updates:0:owner"))
+        await asyncio.sleep(0.01)
+        application.processed.append(update.update_id)
+
+    application.process_update = process_update
+
+    async def scenario():
+        await queue._rebalance()
+        while 0 in queue.owned:
+            await asyncio.sleep(0.005)
+        owned = dict(queue.owned)
+        await queue.stop()
+        return owned
+
+    owned = asyncio.run(scenario())
+
+    assert leases == [queue.worker_id.encode()]
+    assert application.processed == [1]
+    assert redis.values["ptb:updates:0:offset"] == b"1-0"
+    assert "ptb:updates:0:owner" not in redis.values
+    # Persistence was saved while the given up lease was still held
+    assert "ptb:updates:0:owner" in application.saved[0]
+    assert list(owned) == [1]
+
+
+def test_lease_taken_over_by_another_worker_is_not_renewed():
+    redis = FakeRedis({})
+    application = SlowApplication(redis)
+    queue = PartitionedUpdateQueue(application, "ptb:", 1, client=redis)
+
+    async def scenario():
+        await queue._rebalance()
+        assert list(queue.owned) == [0]
+        # Our lease expired and another worker took the partition
+        redis.values["ptb:updates:0:owner"] = b"other"
+        await queue._rebalance()
+        await asyncio.sleep(0)
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+    assert queue.owned == {}
+    assert redis.values["ptb:updates:0:owner"] == b"other"
@@ -1,10 +1,18 @@
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from core.ai.models import causal_lm
 
 
 class CoverLetterGenerator:
     def __init__(self, model_name: str):
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForCausalLM.from_pretrained(model_name)
+        # Loaded on first use, and shared by every generator of the same model
+        self.model_name = model_name
+
+    @property
+    def tokenizer(self):
+        return causal_lm(self.model_name)[0]
+
+    @property
+    def model(self):
+        return causal_lm(self.model_name)[1]
 
     def generate_text(self, prompt: str, max_length: int = 300) -> str:
         """
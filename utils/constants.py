@@ -82,18 +82,3 @@ CITIES = sorted(
         "Ziway",
     ]
 )
-
-
-CURRENT_JOB_INDEX = 0
-TOTAL_JOBS = 0
-CURRENT_APPLICATION_INDEX = 0
-TOTAL_APPLICATIONS = 0
-CURRENT_SAVEDJOB_INDEX = 0
-TOTAL_SAVEDJOBS = 0
-
-CURRENT_COMPANY_INDEX = 0
-TOTAL_COMPANIES = 0
-CURRENT_MYJOB_INDEX = 0
-TOTAL_MYJOBS = 0
-CURRENT_APPLICANT_INDEX = 0
-TOTAL_APPLICANTS = 0
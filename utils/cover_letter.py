@@ -1,13 +1,18 @@
 """
-    * Use a pipeline as a high-level helper
+* Use a pipeline as a high-level helper
 """
 
-from transformers import pipeline
+from core.ai.models import text_generation
 
 
 class CoverLetterGenerator:
     def __init__(self, model_name):
-        self.generator = pipeline("text-generation", model=model_name)
+        # Loaded on first use, and shared by every generator of the same model
+        self.model_name = model_name
+
+    @property
+    def generator(self):
+        return text_generation(self.model_name)
 
     async def generate_cover_letter(self, job_title, skills, company):
         # prompt = f"Write a professional cover letter for the position of {job_title} for someone who has the following experience {skills} at {company} company."
@@ -2,6 +2,11 @@ from typing import Any
 import redis
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from core.database.pool import db_pool
+from core.database.session import engine
 
 # Connect to PostgreSQL
 # conn = psycopg2.connect(
@@ -12,13 +17,10 @@ from psycopg2.extras import RealDictCursor
 #     port="5432",
 # )
 
-# Connect to Redis
-redis_client = redis.StrictRedis(host="localhost", port=6379, decode_responses=True)
-
 
 def execute_query(query, params=None) -> list[tuple[Any, ...]] | None:
     """
-    Execute a query on the PostgreSQL database.
+    Execute a query on the PostgreSQL database using a connection from the shared pool.
 
     Args:
         query (str): The SQL query to execute.
@@ -29,32 +31,23 @@ def execute_query(query, params=None) -> list[tuple[Any, ...]] | None:
     """
 
     try:
-        # Establish a connection to the database
-        conn = psycopg2.connect(
-            host="localhost",
-            database="hulumjobs",
-            user="postgres",
-            password="postgres",
-            port="5432",
-        )
-
-        # Create a cursor object
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-        # Execute the query
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
+        # Check out a pooled connection; it is returned to the pool on exit
+        with db_pool.connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                # Execute the query
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
 
-        # Commit the transaction if it's a write operation
-        if query.strip().lower().startswith(("insert", "update", "delete")):
-            conn.commit()
-            return True
+                # Commit the transaction if it's a write operation
+                if query.strip().lower().startswith(("insert", "update", "delete")):
+                    conn.commit()
+                    return True
 
-        # Fetch results if it's a read operation
-        if query.strip().lower().startswith("select"):
-            return cursor.fetchall()
+                # Fetch results if it's a read operation
+                if query.strip().lower().startswith("select"):
+                    return cursor.fetchall()
     except psycopg2.DatabaseError as db_error:
         raise Exception(f"Database error occurred: {db_error}") from db_error
     except psycopg2.Error as db_error:
@@ -63,11 +56,81 @@ def execute_query(query, params=None) -> list[tuple[Any, ...]] | None:
         raise Exception(f"Redis error occurred: {redis_error}") from redis_error
     except Exception as e:
         raise Exception(f"An unexpected error occurred: {e}") from e
-    finally:
-        # Close the cursor and connection
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+
+    return None
+
+
+def _to_text(query, params=None):
+    """
+    Convert a psycopg2-style query using `%s` placeholders into a SQLAlchemy text clause with
+    named bind parameters, so the same SQL can be run by `execute_query` and `execute_query_async`.
+
+    Args:
+        query (str): The SQL query with `%s` placeholders.
+        params (tuple, optional): The positional parameters for the placeholders. Defaults to None.
+
+    Returns:
+        tuple: The text clause and the dictionary of bind parameters.
+    """
+
+    if not params:
+        return text(query), {}
+
+    parts = query.split("%s")
+    if len(parts) - 1 != len(params):
+        raise ValueError(
+            f"Query has {len(parts) - 1} placeholders but {len(params)} parameters were given"
+        )
+
+    sql = parts[0] + "".join(f":p{i}{part}" for i, part in enumerate(parts[1:]))
+    return text(sql), {f"p{i}": value for i, value in enumerate(params)}
+
+
+def _rows(result, row_type=None) -> list[Any]:
+    if row_type is None:
+        return [dict(row) for row in result.mappings()]
+    # Hydrate straight from the row mapping, without an intermediate dict per row
+    return [row_type.from_row(row._mapping) for row in result]
+
+
+async def execute_query_async(
+    query, params=None, row_type=None
+) -> list[Any] | bool | None:
+    """
+    Execute a query on the PostgreSQL database without blocking the event loop.
+
+    Runs on the pooled async engine from `core.database.session`, so concurrent handlers get
+    concurrent queries. Parameters use the same `%s` placeholders as `execute_query`, but asyncpg
+    is strict about types: pass ints, dates and so on rather than their string forms.
+
+    Args:
+        query (str): The SQL query to execute.
+        params (tuple, optional): The parameters to pass to the query. Defaults to None.
+        row_type (type[Row], optional): A `core.database.rows.Row` subclass to hydrate each
+            row into instead of a dict. Defaults to None.
+
+    Returns:
+        list[Any] | bool | None: The rows of a read (or of a write with a RETURNING clause),
+        True for any other write operation.
+    """
+
+    statement, bind_params = _to_text(query, params)
+    is_write = query.strip().lower().startswith(("insert", "update", "delete"))
+
+    try:
+        if is_write:
+            # Commits on exit of the block
+            async with engine.begin() as conn:
+                result = await conn.execute(statement, bind_params)
+                if result.returns_rows:
+                    return _rows(result, row_type)
+                return True
+
+        async with engine.connect() as conn:
+            result = await conn.execute(statement, bind_params)
+            if result.returns_rows:
+                return _rows(result, row_type)
+    except SQLAlchemyError as db_error:
+        raise Exception(f"Database error occurred: {db_error}") from db_error
 
     return None
@@ -1,7 +1,6 @@
 import logging
 import os
 import re
-import json
 import datetime
 from typing import Any
 
@@ -10,26 +9,70 @@ from telegram.ext import (
     ContextTypes,
 )
 from utils.constants import (
-    CITIES,
     GROUP_TOPIC_NEW_EMPLOYER_REGISTRATION_ID,
     ROLE_APPLICANT,
     GROUP_TOPIC_NEW_APPLICANT_REGISTRATION_ID,
     ROLE_EMPLOYER,
 )
-from utils.db import execute_query, redis_client
+from modules.applicant.domain.entities import FeedJobCard
+from modules.employer.domain.entities import CompanyCard, JobCard
+from core.database.cache import cache
+from core.telegram.rate_limiter import PRIORITY_BROADCAST
+from utils.db import execute_query_async
+from utils.reference_data import CITIES_KEYBOARD, reference_data
+from utils.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Coalesces concurrent cache misses for the same job into one query
+_job_loads = SingleFlight()
 
-def get_applicant(
+# Cached in place of a user's details when they have not registered, so repeat lookups from
+# unregistered users don't reach the database. Cleared by onboarding on registration.
+UNREGISTERED = "unregistered"
+UNREGISTERED_TTL = int(os.getenv("UNREGISTERED_CACHE_TTL", "60"))
+
+# Hot queries, module-level so tests/test_query_plans.py can EXPLAIN exactly what runs
+USER_QUERY = (
+    "SELECT user_id, telegram_id, role_id, name, username, email, phone, gender, dob, "
+    "country, city, education, experience, cv, skills, portfolios, subscribed_alerts, "
+    "preferences FROM users WHERE telegram_id = %s AND role_id = %s"
+)
+TELEGRAM_ID_QUERY = "SELECT telegram_id FROM users WHERE user_id = %s"
+JOB_QUERY = f"SELECT {JobCard.columns()} FROM jobs WHERE job_id = %s"
+JOBS_QUERY = f"SELECT {JobCard.columns()} FROM jobs WHERE job_id = ANY(%s)"
+# The feed only lists open jobs, matching the partial ix_jobs_open_created_at_id index
+FEED_FIRST_QUERY = (
+    f"SELECT {FeedJobCard.columns()} FROM jobs "
+    "WHERE job_status IS DISTINCT FROM 'closed' "
+    "ORDER BY created_at DESC, job_id DESC LIMIT %s"
+)
+FEED_PREVIOUS_QUERY = (
+    f"SELECT {FeedJobCard.columns()} FROM jobs "
+    "WHERE job_status IS DISTINCT FROM 'closed' AND (created_at, job_id) > (%s, %s) "
+    "ORDER BY created_at ASC, job_id ASC LIMIT %s"
+)
+FEED_NEXT_QUERY = (
+    f"SELECT {FeedJobCard.columns()} FROM jobs "
+    "WHERE job_status IS DISTINCT FROM 'closed' AND (created_at, job_id) < (%s, %s) "
+    "ORDER BY created_at DESC, job_id DESC LIMIT %s"
+)
+COMPANIES_QUERY = f"SELECT {CompanyCard.columns()} FROM companies WHERE user_id = %s ORDER BY company_id"
+EMPLOYER_JOBS_QUERY = (
+    f"SELECT {JobCard.columns()} FROM jobs WHERE user_id = %s ORDER BY created_at DESC"
+)
+
+
+async def get_applicant(
     update: Update, context: ContextTypes.DEFAULT_TYPE
 ) -> tuple[Any, ...] | list[tuple[Any, ...]] | list[Any] | None:
     """
     Retrieve an applicant's information based on their Telegram ID. The function first attempts
     to get the applicant's data from the cache. If not found in the cache (cache miss), it queries
     the database for the user details and caches the result. The cached data is set with an
-    expiration time of one hour. Returns a tuple or list containing the user's details, or None
-    if the user is not found.
+    expiration time of one hour. Unregistered users are cached too, for UNREGISTERED_TTL seconds,
+    until onboarding clears the entry. Returns a tuple or list containing the user's details, or
+    None if the user is not found.
 
     Args:
         update (Update): The update object containing the effective user details.
@@ -40,21 +83,27 @@ def get_applicant(
     """
 
     telegram_id = update.effective_user.id
-    # redis_client.delete(f"applicant:{telegram_id}")
-    cached_applicant = redis_client.get(f"applicant:{telegram_id}")
+    applicant = await cache.get(f"applicant:{telegram_id}")
+
+    if applicant == UNREGISTERED:
+        logger.info("cache hit - unregistered applicant")
+        return None
 
-    if not cached_applicant:
+    if not applicant:
         logger.info("cache miss - applicant")
-        applicant = execute_query(
-            "SELECT user_id, telegram_id, role_id, name, username, email, phone, gender, dob, country, city, education, experience, cv, skills, portfolios, subscribed_alerts, preferences FROM users WHERE telegram_id = %s AND role_id = %s",
+        applicant = await execute_query_async(
+            USER_QUERY,
             (telegram_id, ROLE_APPLICANT),
         )
         if isinstance(applicant, list) and len(applicant) > 0:
             applicant = applicant[0]
-            redis_client.set(f"applicant:{telegram_id}", json.dumps(applicant), ex=3600)
+            await cache.set(f"applicant:{telegram_id}", applicant, ttl=3600)
+        elif isinstance(applicant, list):
+            await cache.set(
+                f"applicant:{telegram_id}", UNREGISTERED, ttl=UNREGISTERED_TTL
+            )
     else:
         logger.info("cache hit - applicant")
-        applicant = json.loads(cached_applicant)
 
     if not applicant:
         return None
@@ -62,15 +111,16 @@ def get_applicant(
     return applicant
 
 
-def get_employer(
+async def get_employer(
     update: Update, context: ContextTypes.DEFAULT_TYPE
 ) -> tuple[Any, ...] | list[tuple[Any, ...]] | list[Any] | None:
     """
     Retrieve an employer's information based on their Telegram ID. The function first attempts
     to get the employer's data from the cache. If not found in the cache (cache miss), it queries
     the database for the user details and caches the result. The cached data is set with an
-    expiration time of one hour. Returns a tuple or list containing the user's details, or None
-    if the user is not found.
+    expiration time of one hour. Unregistered users are cached too, for UNREGISTERED_TTL seconds,
+    until onboarding clears the entry. Returns a tuple or list containing the user's details, or
+    None if the user is not found.
 
     Args:
         update (Update): The update object containing the effective user details.
@@ -81,21 +131,27 @@ def get_employer(
     """
 
     telegram_id = update.effective_user.id
-    # redis_client.delete(f"applicant:{telegram_id}")
-    cached_employer = redis_client.get(f"employer:{telegram_id}")
+    employer = await cache.get(f"employer:{telegram_id}")
 
-    if not cached_employer:
+    if employer == UNREGISTERED:
+        logger.info("cache hit - unregistered employer")
+        return None
+
+    if not employer:
         logger.info("cache miss - employer")
-        employer = execute_query(
-            "SELECT user_id, telegram_id, role_id, name, username, email, phone, gender, dob, country, city, education, experience, cv, skills, portfolios, subscribed_alerts, preferences FROM users WHERE telegram_id = %s AND role_id = %s",
+        employer = await execute_query_async(
+            USER_QUERY,
             (telegram_id, ROLE_EMPLOYER),
         )
         if isinstance(employer, list) and len(employer) > 0:
             employer = employer[0]
-            redis_client.set(f"employer:{telegram_id}", json.dumps(employer), ex=3600)
+            await cache.set(f"employer:{telegram_id}", employer, ttl=3600)
+        elif isinstance(employer, list):
+            await cache.set(
+                f"employer:{telegram_id}", UNREGISTERED, ttl=UNREGISTERED_TTL
+            )
     else:
         logger.info("cache hit - employer")
-        employer = json.loads(cached_employer)
 
     if not employer:
         return None
@@ -103,6 +159,46 @@ def get_employer(
     return employer
 
 
+async def invalidate_applicant(telegram_id: int):
+    """
+    Drops an applicant's cached details from both the in-process and the Redis cache. Call this
+    after any INSERT or UPDATE of the applicant's row so the next `get_applicant` reads it again.
+
+    Args:
+        telegram_id (int): The Telegram ID of the applicant.
+    """
+
+    await cache.delete(f"applicant:{telegram_id}")
+
+
+async def invalidate_employer(telegram_id: int):
+    """
+    Drops an employer's cached details from both the in-process and the Redis cache. Call this
+    after any INSERT or UPDATE of the employer's row so the next `get_employer` reads it again.
+
+    Args:
+        telegram_id (int): The Telegram ID of the employer.
+    """
+
+    await cache.delete(f"employer:{telegram_id}")
+
+
+async def invalidate_job(job_id: int):
+    """
+    Drops a job's cached details and its rendered cards. Call this after any UPDATE or DELETE of
+    the job's row (e.g. when the employer edits or closes it).
+
+    Args:
+        job_id (int): The ID of the job.
+    """
+
+    # Imported here, utils.job_cards builds on this module
+    from utils.job_cards import invalidate_job_card
+
+    await cache.invalidate_job(job_id)
+    invalidate_job_card(job_id)
+
+
 # def register_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
 #     tg_user = update.effective_user
 #     last_name = update.effective_user.last_name if update._effective_user.last_name else None
@@ -111,7 +207,7 @@ def get_employer(
 #     return execute_query("INSERT INTO users (telegram_id, first_name, last_name, username) VALUES (%s, %s, %s, %s)", (tg_user.id, tg_user.first_name, last_name, username))
 
 
-def get_telegram_id(user_id):
+async def get_telegram_id(user_id):
     """
     Retrieve a user's Telegram ID from the database using their user ID.
 
@@ -122,9 +218,7 @@ def get_telegram_id(user_id):
         str | None: The Telegram ID of the user, or None if the user does not exist in the database.
     """
 
-    telegram_id = execute_query(
-        "SELECT telegram_id FROM users WHERE user_id = %s", (user_id,)
-    )
+    telegram_id = await execute_query_async(TELEGRAM_ID_QUERY, (user_id,))
 
     if not telegram_id:
         return None
@@ -132,7 +226,7 @@ def get_telegram_id(user_id):
     return telegram_id[0]["telegram_id"]
 
 
-def get_user(telegram_id, role_id):
+async def get_user(telegram_id, role_id):
     """
     Retrieves a user's details from the database using their Telegram ID and role ID.
 
@@ -144,7 +238,7 @@ def get_user(telegram_id, role_id):
         int | None: The user's ID or None if the user does not exist in the database.
     """
 
-    user = execute_query(
+    user = await execute_query_async(
         "SELECT * FROM users WHERE telegram_id = %s AND role_id = %s",
         (telegram_id, role_id),
     )
@@ -155,26 +249,127 @@ def get_user(telegram_id, role_id):
     return user[0]
 
 
-def get_job(job_id) -> list[tuple[Any, ...]] | None:
+async def get_job(job_id) -> JobCard | None:
     """
-    Retrieves a job from the database by its job_id.
+    Retrieves a job by its job_id, from the cache where possible.
+
+    On a cache miss the job is loaded from the database and cached. Concurrent misses for the
+    same job (e.g. everyone tapping a freshly posted job's deep link) share a single query.
 
     Args:
         job_id (int): The ID of the job to retrieve.
 
     Returns:
-        tuple[Any, ...] | list[tuple[Any, ...]] | list[Any] | None: The job's details or None
-        if the job does not exist in the database.
+        JobCard | None: The job or None if the job does not exist in the database.
     """
 
-    job = execute_query("SELECT * FROM jobs WHERE job_id = %s", (job_id,))
+    job_id = int(job_id)
+    cached = await cache.get_job(job_id)
+    if cached:
+        return JobCard.from_row(cached)
+
+    logger.info("cache miss - job")
+    return await _job_loads.do(job_id, lambda: _load_job(job_id))
+
+
+async def _load_job(job_id: int) -> JobCard | None:
+    job = await execute_query_async(
+        JOB_QUERY,
+        (job_id,),
+        row_type=JobCard,
+    )
 
     if not job:
         return None
 
+    await cache.set_job(job_id, job[0].as_dict())
     return job[0]
 
 
+async def get_job_cards(job_ids: list[int]) -> dict[int, JobCard]:
+    """
+    Retrieves the cards of several jobs, from the cache where possible.
+
+    Cached cards are fetched with a single MGET. Jobs missing from the cache are loaded with one
+    query and written back in one pipelined round trip.
+
+    Args:
+        job_ids (list[int]): The IDs of the jobs to retrieve.
+
+    Returns:
+        dict[int, JobCard]: The job cards by job ID. Jobs that no longer exist are left out.
+    """
+
+    cards = {
+        job_id: JobCard.from_row(cached)
+        for job_id, cached in zip(job_ids, await cache.get_jobs(job_ids))
+        if cached is not None
+    }
+
+    missing = [job_id for job_id in job_ids if job_id not in cards]
+    if missing:
+        jobs = await execute_query_async(
+            JOBS_QUERY,
+            (missing,),
+            row_type=JobCard,
+        )
+        await cache.set_jobs({job.job_id: job.as_dict() for job in jobs})
+        cards.update((job.job_id, job) for job in jobs)
+
+    return cards
+
+
+async def get_job_feed(
+    cursor: tuple[datetime.datetime, int] | None = None,
+    direction: str = "next",
+    limit: int = 1,
+) -> tuple[list[FeedJobCard], bool]:
+    """
+    Retrieves a page of the job feed, newest first, using keyset pagination on
+    `(created_at, job_id)`.
+
+    One extra row is requested as a lookahead so the caller knows whether another page exists
+    in the same direction without running a separate COUNT query.
+
+    Args:
+        cursor (tuple[datetime.datetime, int] | None): The `(created_at, job_id)` position to
+            page from, or None for the newest jobs.
+        direction (str): "next" for older jobs, "previous" for newer jobs. Defaults to "next".
+        limit (int): The number of jobs in a page. Defaults to 1.
+
+    Returns:
+        tuple[list[FeedJobCard], bool]: The jobs in feed order, and whether more jobs exist
+        beyond them in the requested direction.
+    """
+
+    if cursor is None:
+        jobs = await execute_query_async(
+            FEED_FIRST_QUERY,
+            (limit + 1,),
+            row_type=FeedJobCard,
+        )
+    elif direction == "previous":
+        jobs = await execute_query_async(
+            FEED_PREVIOUS_QUERY,
+            (*cursor, limit + 1),
+            row_type=FeedJobCard,
+        )
+    else:
+        jobs = await execute_query_async(
+            FEED_NEXT_QUERY,
+            (*cursor, limit + 1),
+            row_type=FeedJobCard,
+        )
+
+    has_more = len(jobs) > limit
+    jobs = jobs[:limit]
+
+    if cursor is not None and direction == "previous":
+        jobs.reverse()
+
+    return jobs, has_more
+
+
 async def show_job(
     update: Update, context: ContextTypes.DEFAULT_TYPE, job_id: str
 ) -> None:
@@ -190,7 +385,10 @@ async def show_job(
         None
     """
 
-    job = get_job(job_id)
+    # Imported here, utils.job_cards builds on this module
+    from utils.job_cards import render_job_card
+
+    job = await get_job(job_id)
 
     if not job:
         if update.callback_query:
@@ -199,23 +397,7 @@ async def show_job(
             await update.message.reply_text("Job not found.")
         return
 
-    job_details = (
-        f"Job Title: <b>\t{job["job_title"]}</b> \n\n"
-        f"Job Type: <b>\t{job["job_site"]} - {job["job_type"]}</b> \n\n"
-        f"Work Location: <b>\t{job["job_city"]}, {job["job_country"]}</b> \n\n"
-        f"Applicants Needed: <b>\t{job["gender_preference"]}</b> \n\n"
-        f"Salary: <b>\t{job["salary_amount"]} {job["salary_currency"]}, {job["salary_type"]}</b> \n\n"
-        f"Deadline: <b>\t{format_date(job["job_deadline"])}</b> \n\n"
-        f"<b>Description</b>: \t{job["job_description"]} \n\n"
-        f"<b>Requirements</b>: \t{job["job_requirements"]} \n\n"
-    )
-
-    keyboard = [
-        [
-            InlineKeyboardButton("Save", callback_data=f"save_{job["job_id"]}"),
-            InlineKeyboardButton("Apply", callback_data=f"apply_{job["job_id"]}"),
-        ],
-    ]
+    job_details, keyboard = render_job_card(job, "applicant")
 
     if update.callback_query:
         await update.callback_query.edit_message_text(
@@ -231,7 +413,7 @@ async def show_job(
         )
 
 
-def get_companies(user_id):
+async def get_companies(user_id):
     """
     Retrieves a list of companies from the database belonging to the user with the given user_id.
 
@@ -239,11 +421,15 @@ def get_companies(user_id):
         user_id (int): The ID of the user whose companies are to be retrieved.
 
     Returns:
-        list[tuple[Any, ...]] | None: A list of tuples containing the company details, or None
-        if the user does not have any companies.
+        list[CompanyCard] | None: The user's companies, oldest first, or None if the user
+        does not have any companies.
     """
 
-    companies = execute_query("SELECT * FROM companies WHERE user_id = %s", (user_id,))
+    companies = await execute_query_async(
+        COMPANIES_QUERY,
+        (user_id,),
+        row_type=CompanyCard,
+    )
 
     if not companies:
         return None
@@ -251,8 +437,23 @@ def get_companies(user_id):
     return companies
 
 
-def get_jobs(user_id):
-    jobs = execute_query("SELECT * FROM jobs WHERE user_id = %s", (user_id,))
+async def get_jobs(user_id):
+    """
+    Retrieves the jobs posted by the user with the given user_id.
+
+    Args:
+        user_id (int): The ID of the employer whose jobs are to be retrieved.
+
+    Returns:
+        list[JobCard] | None: The user's jobs, newest first, or None if the user has not
+        posted any jobs.
+    """
+
+    jobs = await execute_query_async(
+        EMPLOYER_JOBS_QUERY,
+        (user_id,),
+        row_type=JobCard,
+    )
 
     if not jobs:
         return None
@@ -260,39 +461,32 @@ def get_jobs(user_id):
     return jobs
 
 
-def get_categories():
+async def get_categories():
     """
-    Retrieves all categories from the database.
+    Retrieves all categories, from the in-memory reference data loaded at startup.
 
     Returns:
-        list[tuple[int, str]] | None: A list of tuples containing the category_id and name of each category, or None
-        if no categories are found in the database.
+        list[dict] | None: The category_id and name of each category, or None if no categories
+        are found in the database.
     """
 
-    categories = execute_query("SELECT * FROM categories")
+    if not reference_data.categories:
+        await reference_data.load_categories()
 
-    if not categories:
+    if not reference_data.categories:
         return None
 
-    return categories
+    return list(reference_data.categories)
 
 
 def get_all_cities():
     """
     Returns an InlineKeyboardMarkup containing all cities in the CITIES tuple.
     The cities are organized into 2-column rows, with the last row containing an
-    "Others" button.
+    "Others" button. The markup is built once at import and shared.
     """
 
-    buttons = [InlineKeyboardButton(city, callback_data=f"{city}") for city in CITIES]
-
-    # Organize buttons into 2-column rows
-    keyboard = [
-        buttons[i : i + 2] for i in range(0, len(buttons), 2)
-    ]  # Group buttons into rows
-    keyboard.append([InlineKeyboardButton("Others", callback_data="Others")])
-
-    return InlineKeyboardMarkup(keyboard)
+    return CITIES_KEYBOARD
 
 
 async def notify_group():
@@ -320,12 +514,15 @@ async def notify_group_on_registration(
         f"<b>City</b>: {user_data['city']}\n\n"
     )
 
+    # The legacy bots have no rate limiter, and python-telegram-bot refuses rate_limit_args then
+    lane = {"rate_limit_args": PRIORITY_BROADCAST} if context.bot.rate_limiter else {}
     await context.bot.send_message(
         chat_id=os.getenv("HULUMJOBS_GROUP_ID"),
         text=message,
         reply_markup=InlineKeyboardMarkup(view_keyboard),
         parse_mode="HTML",
         message_thread_id=topic_id,
+        **lane,
     )
     return
 
@@ -342,7 +539,7 @@ async def view_applicant_profile(
     query = update.callback_query
     await query.answer()
     telegram_id = int(query.data.split("_")[-1])
-    user = get_user(telegram_id, ROLE_APPLICANT)
+    user = await get_user(telegram_id, ROLE_APPLICANT)
 
     if not user:
         await context.bot.send_message(
@@ -380,7 +577,7 @@ async def view_employer_profile(
     query = update.callback_query
     await query.answer()
     telegram_id = int(query.data.split("_")[-1])
-    user = get_user(telegram_id, ROLE_EMPLOYER)
+    user = await get_user(telegram_id, ROLE_EMPLOYER)
 
     if not user:
         await context.bot.send_message(
@@ -427,30 +624,35 @@ def format_date(date):
     Format a date object into a human-readable string.
 
     Args:
-        date (datetime.date): The date object to format.
+        date (datetime.date | str): The date object to format, or its ISO 8601 string as
+            stored in the cache.
 
     Returns:
         str: The formatted date string in the format "Month Day, Year" (e.g., "January 01, 2023").
     """
 
+    if isinstance(date, str):
+        date = datetime.date.fromisoformat(date[:10])
+
     return date.strftime("%B %d, %Y")
 
 
 def convert_datetime(obj):
     """
-    Convert a datetime object to its ISO 8601 string representation.
+    Convert a datetime or date object to its ISO 8601 string representation.
 
     Args:
-        obj (Any): The object to convert. Expected to be of type `datetime.datetime`.
+        obj (Any): The object to convert. Expected to be of type `datetime.datetime` or
+            `datetime.date`.
 
     Returns:
-        str: The ISO 8601 formatted string if the object is a datetime instance.
+        str: The ISO 8601 formatted string if the object is a datetime or date instance.
 
     Raises:
-        TypeError: If the object is not of type `datetime.datetime`.
+        TypeError: If the object is not of type `datetime.datetime` or `datetime.date`.
     """
 
-    if isinstance(obj, datetime.datetime):
+    if isinstance(obj, (datetime.datetime, datetime.date)):
         return obj.isoformat()  # or obj.strftime('%Y-%m-%d %H:%M:%S') for a d/t format
     raise TypeError("Type not serializable")
 
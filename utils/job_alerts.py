@@ -0,0 +1,487 @@
+import asyncio
+import datetime
+import html
+import json
+import logging
+import os
+import time
+
+from redis.asyncio import Redis
+from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import Forbidden, TelegramError
+
+from core.database.cache import RELEASE_LEASE, RENEW_LEASE, redis_pool
+from core.telegram.rate_limiter import PRIORITY_BROADCAST, TokenBucket
+from utils.constants import ROLE_APPLICANT
+from utils.db import execute_query_async
+from utils.helpers import get_job
+from utils.job_cards import render_job_card
+
+logger = logging.getLogger(__name__)
+
+# Subscribers per query and per saved checkpoint. A crash resends at most one chunk.
+CHUNK_SIZE = int(os.getenv("JOB_ALERTS_CHUNK_SIZE", "200"))
+
+# Alerts per second. Telegram allows about 30 messages a second overall, keep the rest for
+# replies to users.
+SEND_RATE = float(os.getenv("JOB_ALERTS_RATE", "20"))
+
+# Seconds between checks for posted jobs, and before another worker may take over a fan-out
+# whose worker stopped
+POLL_INTERVAL = 5
+LEASE_TTL = 60
+
+# Subscribers with {"alert_mode": "digest"} in `users.preferences` get one message per
+# DIGEST_INTERVAL seconds listing the jobs posted since the last one, instead of one per job
+DIGEST_INTERVAL = int(os.getenv("JOB_ALERTS_DIGEST_INTERVAL", str(24 * 3600)))
+DIGEST_CHECK_INTERVAL = 300
+DIGEST_MAX_JOBS = 10
+
+# Keys
+PENDING = "job_alerts:pending"  # Sorted set of job IDs to fan out, by posting time
+DIGEST = (
+    "job_alerts:digest"  # Hash: since, until and cursor of the current digest period
+)
+DIGEST_LEASE = "job_alerts:digest:owner"
+
+# A chunk of the instant alert subscribers whose alerts share a key with the job, `matches`
+# then drops those for which some other field doesn't match
+SUBSCRIBERS_QUERY = (
+    "SELECT user_id, telegram_id, subscribed_alerts FROM users "
+    "WHERE role_id = %s AND subscribed_alerts && CAST(%s AS VARCHAR[]) "
+    "AND preferences->>'alert_mode' IS DISTINCT FROM 'digest' "
+    "AND user_id > %s ORDER BY user_id LIMIT %s"
+)
+
+# Every digest subscriber with the jobs of the period that match their alerts, in one pass.
+# The NOT EXISTS is `matches`: no field the subscriber picked values for may miss the job's.
+DIGEST_QUERY = """
+    SELECT u.user_id, u.telegram_id,
+        json_agg(
+            json_build_object(
+                'job_id', j.job_id,
+                'job_title', j.job_title,
+                'job_city', j.job_city,
+                'job_type', j.job_type
+            )
+            ORDER BY j.created_at DESC
+        )::text AS jobs
+    FROM jobs j
+    CROSS JOIN LATERAL (
+        SELECT CAST(
+            ARRAY['category:' || j.category_id, 'city:' || j.job_city, 'type:' || j.job_type]
+            AS VARCHAR[]
+        ) AS keys
+    ) k
+    JOIN users u ON u.subscribed_alerts && k.keys
+    WHERE j.created_at > %s AND j.created_at <= %s
+        AND j.job_status IS DISTINCT FROM 'closed'
+        AND u.role_id = %s
+        AND u.preferences->>'alert_mode' = 'digest'
+        AND u.user_id > %s
+        AND NOT EXISTS (
+            SELECT 1 FROM unnest(u.subscribed_alerts) AS a(alert)
+            WHERE split_part(a.alert, ':', 1) IN ('category', 'city', 'type')
+            GROUP BY split_part(a.alert, ':', 1)
+            HAVING NOT bool_or(a.alert = ANY(k.keys))
+        )
+    GROUP BY u.user_id, u.telegram_id
+    ORDER BY u.user_id
+"""
+
+
+def _state(job_id: int) -> str:
+    return f"job_alerts:{job_id}"
+
+
+def _lease(job_id: int) -> str:
+    return f"job_alerts:{job_id}:owner"
+
+
+def alert_keys(category_id, job_city, job_type) -> list[str]:
+    """
+    Returns the subscription entries a job matches, in the `users.subscribed_alerts` format.
+
+    A subscriber's entries are "category:<category_id>", "city:<city>" and "type:<job type>".
+    A job matches a subscriber if, for each of those fields the subscriber picked values for,
+    the job has one of them: ["category:3", "city:Adama", "city:Hawassa"] means any job of
+    category 3 in Adama or Hawassa.
+
+    Args:
+        category_id (int): The job's category.
+        job_city (str): The job's city.
+        job_type (str): The job's type, e.g. "Full Time".
+
+    Returns:
+        list[str]: The entries, one per field.
+    """
+
+    return [f"category:{category_id}", f"city:{job_city}", f"type:{job_type}"]
+
+
+def matches(alerts: list[str] | None, keys: list[str]) -> bool:
+    """
+    Tells whether a subscriber's alerts match a job's alert keys. See `alert_keys`.
+
+    Args:
+        alerts (list[str] | None): The subscriber's `subscribed_alerts`.
+        keys (list[str]): The job's `alert_keys`.
+
+    Returns:
+        bool: True if the subscriber should be notified.
+    """
+
+    if not alerts:
+        return False
+    wanted: dict[str, set[str]] = {}
+    for alert in alerts:
+        field, _, value = alert.partition(":")
+        wanted.setdefault(field, set()).add(value)
+    job = dict(key.partition(":")[::2] for key in keys)
+    # Entries for fields jobs don't have (e.g. left over from an older format) are ignored
+    return any(field in job for field in wanted) and all(
+        job[field] in values for field, values in wanted.items() if field in job
+    )
+
+
+def render_digest(jobs: list[dict]) -> tuple[str, InlineKeyboardMarkup]:
+    """
+    Renders a digest message listing the newest DIGEST_MAX_JOBS jobs, with an Apply button for
+    each.
+
+    Args:
+        jobs (list[dict]): The period's matching jobs, newest first, with their job_id,
+            job_title, job_city and job_type.
+
+    Returns:
+        tuple[str, InlineKeyboardMarkup]: The text, for parse_mode="HTML", and the buttons.
+    """
+
+    shown = jobs[:DIGEST_MAX_JOBS]
+    lines = [
+        f"• <b>{html.escape(job['job_title'])}</b> - "
+        f"{html.escape(job['job_city'])}, {html.escape(job['job_type'])}"
+        for job in shown
+    ]
+    if len(jobs) > len(shown):
+        lines.append(f"\n<i>and {len(jobs) - len(shown)} more in Browse Jobs</i>")
+    text = (
+        f"🔔 <b>{len(jobs)} new job{'s' if len(jobs) > 1 else ''} matching your alerts</b>"
+        "\n\n" + "\n".join(lines)
+    )
+    buttons = [
+        [
+            InlineKeyboardButton(
+                f"Apply: {job['job_title']}"[:64],
+                callback_data=f"apply_{job['job_id']}",
+            )
+        ]
+        for job in shown
+    ]
+    return text, InlineKeyboardMarkup(buttons)
+
+
+class JobAlerts:
+    """
+    Sends every new job to the applicants whose `subscribed_alerts` match it.
+
+    The Employer Bot queues each posted job with `enqueue`. The Applicant Bot runs the fan-out,
+    since subscribers have only started that bot: it pages through the matching subscribers
+    in chunks of CHUNK_SIZE (the GIN index on `users.subscribed_alerts` finds them), and sends
+    the job card at SEND_RATE, on the rate limiter's broadcast lane.
+
+    Progress is checkpointed in Redis after every chunk and each fan-out is leased to one
+    worker, so after a crash or restart any Applicant Bot replica resumes where it stopped.
+
+    Subscribers who chose the digest mode are skipped here and get `send_digests` instead.
+    """
+
+    def __init__(self, client: Redis | None = None):
+        self.r = client or Redis(connection_pool=redis_pool)
+        self._worker: asyncio.Task | None = None
+        self._id = os.urandom(8).hex()
+        self._renew_lease = self.r.register_script(RENEW_LEASE)
+        self._release_lease = self.r.register_script(RELEASE_LEASE)
+
+    async def _renew(self, lease: str) -> bool:
+        return bool(await self._renew_lease(keys=[lease], args=[self._id, LEASE_TTL]))
+
+    async def _release(self, lease: str) -> None:
+        await self._release_lease(keys=[lease], args=[self._id])
+
+    async def enqueue(self, job_id: int, category_id, job_city, job_type) -> None:
+        """
+        Queues a posted job for the fan-out.
+
+        Args:
+            job_id (int): The ID of the job.
+            category_id (int): The job's category.
+            job_city (str): The job's city.
+            job_type (str): The job's type.
+        """
+
+        async with self.r.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                _state(job_id),
+                mapping={
+                    "keys": json.dumps(alert_keys(category_id, job_city, job_type)),
+                    "cursor": 0,
+                    "sent": 0,
+                    "blocked": 0,
+                    "failed": 0,
+                    "seconds": 0,
+                },
+            )
+            pipe.zadd(PENDING, {job_id: time.time()})
+            await pipe.execute()
+
+    async def _subscribers(self, keys: list[str], after: int) -> list[dict]:
+        return await execute_query_async(
+            SUBSCRIBERS_QUERY, (ROLE_APPLICANT, keys, after, CHUNK_SIZE)
+        )
+
+    async def _send(self, bot: Bot, chat_id: int, text: str, reply_markup) -> str:
+        try:
+            await bot.send_message(
+                chat_id=chat_id,
+                text=text,
+                reply_markup=reply_markup,
+                parse_mode="HTML",
+                rate_limit_args=PRIORITY_BROADCAST,
+            )
+            return "sent"
+        except Forbidden:
+            # The subscriber blocked the bot
+            return "blocked"
+        except TelegramError as e:
+            logger.error("Failed to send job alert to %s: %s", chat_id, e)
+            return "failed"
+
+    async def fan_out(self, bot: Bot, job_id: int) -> None:
+        """
+        Sends a queued job to its remaining subscribers, then takes it off the queue.
+
+        Args:
+            bot (Bot): The Applicant Bot, with an OutboundRateLimiter.
+            job_id (int): The ID of the job.
+        """
+
+        state = await self.r.hgetall(_state(job_id))
+        job = await get_job(job_id)
+        if not state or job is None or job.job_status == "closed":
+            await self._finish(job_id)
+            return
+
+        card, actions = render_job_card(job, "applicant")
+        text = f"🔔 <b>New job matching your alerts</b>\n\n{card}"
+        reply_markup = InlineKeyboardMarkup(actions)
+        keys = json.loads(state[b"keys"])
+        cursor = int(state[b"cursor"])
+        pace = TokenBucket(SEND_RATE, SEND_RATE)
+
+        while True:
+            started = time.monotonic()
+            try:
+                subscribers = await self._subscribers(keys, cursor)
+            except Exception as e:
+                # Keep the checkpoint and retry on the next poll
+                logger.error("Failed to load job %s alert subscribers: %s", job_id, e)
+                return
+            if not subscribers:
+                break
+
+            sends = []
+            for subscriber in subscribers:
+                if not matches(subscriber["subscribed_alerts"], keys):
+                    continue
+                delay = pace.reserve()
+                if delay:
+                    await asyncio.sleep(delay)
+                sends.append(
+                    asyncio.create_task(
+                        self._send(bot, subscriber["telegram_id"], text, reply_markup)
+                    )
+                )
+            results = await asyncio.gather(*sends)
+
+            if not await self._renew(_lease(job_id)):
+                # Another worker took the fan-out over and resumes from the last checkpoint
+                logger.warning("Lost the lease on job %s alerts", job_id)
+                return
+
+            cursor = subscribers[-1]["user_id"]
+            elapsed = time.monotonic() - started
+            async with self.r.pipeline(transaction=True) as pipe:
+                pipe.hset(_state(job_id), "cursor", cursor)
+                for outcome in ("sent", "blocked", "failed"):
+                    pipe.hincrby(_state(job_id), outcome, results.count(outcome))
+                pipe.hincrbyfloat(_state(job_id), "seconds", elapsed)
+                await pipe.execute()
+            logger.info(
+                "Job %s alerts: %d sent in %.1fs (%.1f/s)",
+                job_id,
+                results.count("sent"),
+                elapsed,
+                len(results) / elapsed if elapsed else 0,
+            )
+
+        report = await self.r.hgetall(_state(job_id))
+        seconds = float(report[b"seconds"])
+        sent = int(report[b"sent"])
+        logger.info(
+            "Job %s alerts done: %d sent, %s blocked, %s failed in %.1fs (%.1f/s)",
+            job_id,
+            sent,
+            report[b"blocked"].decode(),
+            report[b"failed"].decode(),
+            seconds,
+            sent / seconds if seconds else 0,
+        )
+        await self._finish(job_id)
+
+    async def _finish(self, job_id: int) -> None:
+        async with self.r.pipeline(transaction=True) as pipe:
+            pipe.zrem(PENDING, job_id)
+            pipe.delete(_state(job_id))
+            await pipe.execute()
+
+    async def send_digests(self, context) -> None:
+        """
+        Sends each digest subscriber the jobs posted in the last period, once the period is
+        over. A python-telegram-bot JobQueue callback, run every DIGEST_CHECK_INTERVAL seconds.
+
+        The period's subscribers and jobs come from a single query. Progress is checkpointed
+        like the per-job fan-out, so an interrupted period is finished by the next run.
+
+        Args:
+            context (CallbackContext): The JobQueue callback context.
+        """
+
+        if not await self.r.set(DIGEST_LEASE, self._id, nx=True, ex=LEASE_TTL):
+            return
+        try:
+            await self._send_digests(context.bot)
+        finally:
+            await self._release(DIGEST_LEASE)
+
+    async def _send_digests(self, bot: Bot) -> None:
+        now = datetime.datetime.now()
+        state = await self.r.hgetall(DIGEST)
+        if b"until" in state:
+            # Finish the period a previous run was interrupted in
+            since = datetime.datetime.fromisoformat(state[b"since"].decode())
+            until = datetime.datetime.fromisoformat(state[b"until"].decode())
+            cursor = int(state[b"cursor"])
+        else:
+            since = (
+                datetime.datetime.fromisoformat(state[b"since"].decode())
+                if b"since" in state
+                else now - datetime.timedelta(seconds=DIGEST_INTERVAL)
+            )
+            if now < since + datetime.timedelta(seconds=DIGEST_INTERVAL):
+                return
+            until, cursor = now, 0
+            await self.r.hset(
+                DIGEST,
+                mapping={
+                    "since": since.isoformat(),
+                    "until": until.isoformat(),
+                    "cursor": 0,
+                },
+            )
+
+        started = time.monotonic()
+        try:
+            digests = await execute_query_async(
+                DIGEST_QUERY, (since, until, ROLE_APPLICANT, cursor)
+            )
+        except Exception as e:
+            # The next run retries the period
+            logger.error("Failed to load job alert digests: %s", e)
+            return
+
+        pace = TokenBucket(SEND_RATE, SEND_RATE)
+        results = []
+        for start in range(0, len(digests), CHUNK_SIZE):
+            chunk = digests[start : start + CHUNK_SIZE]
+            sends = []
+            for digest in chunk:
+                text, reply_markup = render_digest(json.loads(digest["jobs"]))
+                delay = pace.reserve()
+                if delay:
+                    await asyncio.sleep(delay)
+                sends.append(
+                    asyncio.create_task(
+                        self._send(bot, digest["telegram_id"], text, reply_markup)
+                    )
+                )
+            results += await asyncio.gather(*sends)
+            if not await self._renew(DIGEST_LEASE):
+                logger.warning("Lost the lease on the job alert digests")
+                return
+            await self.r.hset(DIGEST, "cursor", chunk[-1]["user_id"])
+
+        elapsed = time.monotonic() - started
+        logger.info(
+            "Job alert digests done: %d sent, %d blocked, %d failed in %.1fs (%.1f/s)",
+            results.count("sent"),
+            results.count("blocked"),
+            results.count("failed"),
+            elapsed,
+            len(results) / elapsed if elapsed else 0,
+        )
+        async with self.r.pipeline(transaction=True) as pipe:
+            pipe.hdel(DIGEST, "until", "cursor")
+            pipe.hset(DIGEST, "since", until.isoformat())
+            await pipe.execute()
+
+    async def _run(self, bot: Bot) -> None:
+        while True:
+            try:
+                for job_id in await self.r.zrange(PENDING, 0, -1):
+                    job_id = int(job_id)
+                    if await self.r.set(
+                        _lease(job_id), self._id, nx=True, ex=LEASE_TTL
+                    ):
+                        try:
+                            await self.fan_out(bot, job_id)
+                        finally:
+                            await self._release(_lease(job_id))
+            except Exception as e:
+                logger.error("Job alerts worker failed: %s", e)
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def start(self, application) -> None:
+        """
+        Starts sending queued jobs, resuming any fan-out a previous run left unfinished.
+        Usable as a python-telegram-bot `post_init` callback.
+        """
+
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run(application.bot))
+
+        if application.job_queue is None:
+            logger.warning(
+                "No JobQueue, job alert digests are disabled. Install "
+                "python-telegram-bot[job-queue]."
+            )
+        elif not application.job_queue.get_jobs_by_name("job_alert_digests"):
+            application.job_queue.run_repeating(
+                self.send_digests,
+                interval=DIGEST_CHECK_INTERVAL,
+                first=DIGEST_CHECK_INTERVAL,
+                name="job_alert_digests",
+            )
+
+    async def stop(self, application=None) -> None:
+        """
+        Stops the fan-out; the next start resumes it from the last checkpoint. Usable as a
+        python-telegram-bot `post_shutdown` callback.
+        """
+
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+
+job_alerts = JobAlerts()
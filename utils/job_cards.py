@@ -0,0 +1,190 @@
+import html
+import os
+
+from telegram import InlineKeyboardButton
+
+from core.database.cache import LocalCache
+from modules.employer.domain.entities import JobCard
+from utils.helpers import format_date
+
+# Bump whenever the card text or buttons change, so cards rendered by the old template are
+# never served
+TEMPLATE_VERSION = 2
+
+# Telegram rejects messages over 4096 characters. Cards stay below that with room for the
+# footers handlers append (application status, navigation...).
+MESSAGE_LIMIT = 4096
+FOOTER_RESERVE = 512
+CARD_LIMIT = MESSAGE_LIMIT - FOOTER_RESERVE
+
+APPLICANT_BOT_URL = "https://t.me/HulumJobsApplicantBot"
+
+# The action buttons below the card, by who is looking at it
+AUDIENCES = ("applicant", "saved", "application", "employer", "channel")
+
+_cards = LocalCache(
+    maxsize=int(os.getenv("JOB_CARD_CACHE_MAXSIZE", "5000")),
+    ttl=float(os.getenv("JOB_CARD_CACHE_TTL", "600")),
+)
+
+
+def _key(job_id: int, audience: str) -> str:
+    return f"{job_id}:{TEMPLATE_VERSION}:{audience}"
+
+
+def _version(job: JobCard):
+    # Cards are stored along with the job's updated_at, so a job changed by another process
+    # (e.g. closed in the employer bot) is rendered again as soon as its new row is read,
+    # without waiting for an invalidation or the TTL. Every UPDATE of a job must set it.
+    # The JSON cache serializer reads datetimes back as ISO strings.
+    updated_at = job.updated_at
+    return updated_at.isoformat() if hasattr(updated_at, "isoformat") else updated_at
+
+
+def fit_text(text, limit: int) -> str:
+    """
+    HTML-escapes a value and truncates it with an ellipsis so the escaped result fits `limit`.
+
+    Args:
+        text (Any): The value to render, e.g. a job description.
+        limit (int): The maximum length of the escaped result.
+
+    Returns:
+        str: The escaped, possibly truncated, text.
+    """
+
+    text = str(text)
+    escaped = html.escape(text)
+    if len(escaped) <= limit:
+        return escaped
+
+    # Cut the raw text, not the escaped one, so no entity is split in half
+    cut = limit - 1
+    while cut > 0:
+        escaped = html.escape(text[:cut]).rstrip() + "…"
+        if len(escaped) <= limit:
+            return escaped
+        cut -= len(escaped) - limit
+    return "…"
+
+
+def render_job_card_text(job: JobCard) -> str:
+    """
+    Renders the HTML text of a job card, truncating the description and requirements so the
+    card never exceeds CARD_LIMIT.
+
+    Args:
+        job (JobCard): The job to render.
+
+    Returns:
+        str: The card text, for parse_mode="HTML".
+    """
+
+    def field(value):
+        return html.escape(str(value))
+
+    header = (
+        f"Job Title: <b>\t{field(job.job_title)}</b> \n\n"
+        f"Job Type: <b>\t{field(job.job_site)} - {field(job.job_type)}</b> \n\n"
+        f"Work Location: <b>\t{field(job.job_city)}, {field(job.job_country)}</b> \n\n"
+        f"Applicants Needed: <b>\t{field(job.gender_preference)}</b> \n\n"
+        f"Salary: <b>\t{field(job.salary_amount)} {field(job.salary_currency)}, {field(job.salary_type)}</b> \n\n"
+        f"Deadline: <b>\t{format_date(job.job_deadline)}</b> \n\n"
+    )
+    description_label = "<b>Description</b>: \t"
+    requirements_label = "<b>Requirements</b>: \t"
+    fixed = len(header) + len(description_label) + len(requirements_label) + 6
+
+    # Requirements are usually the shorter of the two, give them up to half the room left
+    budget = max(CARD_LIMIT - fixed, 0)
+    requirements = fit_text(job.job_requirements, budget // 2)
+    description = fit_text(job.job_description, budget - len(requirements))
+    if len(requirements) < len(html.escape(str(job.job_requirements))):
+        # The description didn't use all of its half, hand the rest to the requirements
+        requirements = fit_text(job.job_requirements, budget - len(description))
+
+    return (
+        f"{header}"
+        f"{description_label}{description} \n\n"
+        f"{requirements_label}{requirements} \n\n"
+    )
+
+
+def _render_actions(job: JobCard, audience: str) -> list[list[InlineKeyboardButton]]:
+    if audience == "applicant":
+        return [
+            [
+                InlineKeyboardButton("Save", callback_data=f"save_{job.job_id}"),
+                InlineKeyboardButton("Apply", callback_data=f"apply_{job.job_id}"),
+            ]
+        ]
+    if audience == "saved":
+        return [[InlineKeyboardButton("Apply", callback_data=f"apply_{job.job_id}")]]
+    if audience == "employer":
+        return [
+            [
+                InlineKeyboardButton("Edit", callback_data="myjob_edit"),
+                InlineKeyboardButton(
+                    "Close", callback_data=f"myjob_close_{job.job_id}"
+                ),
+            ],
+            [
+                InlineKeyboardButton(
+                    "View Applicants", callback_data=f"view_applicants_{job.job_id}"
+                )
+            ],
+        ]
+    if audience == "channel":
+        # Deep link to the Applicant Bot
+        return [
+            [
+                InlineKeyboardButton(
+                    "Apply", url=f"{APPLICANT_BOT_URL}?start=apply_{job.job_id}"
+                )
+            ]
+        ]
+    if audience == "application":
+        return []
+    raise ValueError(f"Unknown job card audience {audience!r}")
+
+
+def render_job_card(
+    job: JobCard, audience: str
+) -> tuple[str, list[list[InlineKeyboardButton]]]:
+    """
+    Returns the rendered text and action buttons of a job card, rendering them only once per
+    job, template version and audience, and again whenever the job's updated_at changes.
+
+    Callers add their own rows (e.g. Previous/Next) around the returned ones, and may append a
+    footer of up to FOOTER_RESERVE characters to the text.
+
+    Args:
+        job (JobCard): The job to render.
+        audience (str): Who the card is for, one of AUDIENCES.
+
+    Returns:
+        tuple[str, list[list[InlineKeyboardButton]]]: The card text, for parse_mode="HTML",
+        and its action rows. The rows are shared, copy the list before changing it.
+    """
+
+    key = _key(job.job_id, audience)
+    version = _version(job)
+    entry = _cards.get(key, None)
+    if entry is None or entry[0] != version:
+        entry = (
+            version,
+            (render_job_card_text(job), _render_actions(job, audience)),
+        )
+        _cards.set(key, entry)
+    return entry[1]
+
+
+def invalidate_job_card(job_id: int) -> None:
+    """
+    Drops every rendered card of a job, e.g. after the job was edited or closed.
+
+    Args:
+        job_id (int): The ID of the job.
+    """
+
+    _cards.delete(*(_key(job_id, audience) for audience in AUDIENCES))
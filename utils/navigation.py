@@ -0,0 +1,168 @@
+import os
+import time
+from collections import OrderedDict
+
+from redis.asyncio import Redis
+from telegram import InlineKeyboardButton
+
+from core.database.cache import redis_pool
+
+
+class MemoryNavigationBackend:
+    """
+    Keeps navigation positions in process memory.
+
+    Entries expire `ttl` seconds after they were last written, and the least recently written
+    entries are evicted once `max_entries` is reached. Suitable for a single bot process.
+    """
+
+    def __init__(self, ttl: int, max_entries: int = 100_000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[int, float]] = OrderedDict()
+
+    async def get(self, key: str) -> int | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: int) -> None:
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        self._evict()
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        # Entries are ordered by last write, so expired ones are always at the front
+        while self._entries:
+            key, (_, expires_at) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[key]
+
+
+class RedisNavigationBackend:
+    """
+    Keeps navigation positions in Redis so they are shared by every bot replica.
+    """
+
+    def __init__(self, ttl: int, client: Redis | None = None):
+        self.ttl = ttl
+        self.r = client or Redis(connection_pool=redis_pool)
+
+    async def get(self, key: str) -> int | None:
+        value = await self.r.get(key)
+        return int(value) if value is not None else None
+
+    async def set(self, key: str, value: int) -> None:
+        await self.r.set(key, value, ex=self.ttl)
+
+    async def delete(self, key: str) -> None:
+        await self.r.delete(key)
+
+
+class NavigationStore:
+    """
+    Per-chat position in the Previous/Next list views (saved jobs, applications, companies...).
+
+    Each chat has its own index per view, so concurrent users never move each other's
+    position. Positions expire after a period of inactivity.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def _key(chat_id: int, view: str) -> str:
+        return f"nav:{chat_id}:{view}"
+
+    async def get(self, chat_id: int, view: str) -> int:
+        """
+        Retrieves the current index of a chat in a list view.
+
+        Args:
+            chat_id (int): The chat browsing the list.
+            view (str): The name of the list view, e.g. "savedjob".
+
+        Returns:
+            int: The stored index, or 0 if none is stored or it has expired.
+        """
+
+        return await self.backend.get(self._key(chat_id, view)) or 0
+
+    async def set(self, chat_id: int, view: str, index: int, total: int) -> int:
+        """
+        Stores the index of a chat in a list view, clamped to the list bounds.
+
+        Args:
+            chat_id (int): The chat browsing the list.
+            view (str): The name of the list view, e.g. "savedjob".
+            index (int): The requested index.
+            total (int): The number of items currently in the list.
+
+        Returns:
+            int: The index that was stored.
+        """
+
+        index = max(0, min(index, total - 1))
+        await self.backend.set(self._key(chat_id, view), index)
+        return index
+
+    async def clear(self, chat_id: int, view: str) -> None:
+        """
+        Forgets the index of a chat in a list view.
+
+        Args:
+            chat_id (int): The chat browsing the list.
+            view (str): The name of the list view, e.g. "savedjob".
+        """
+
+        await self.backend.delete(self._key(chat_id, view))
+
+
+def navigation_buttons(
+    prefix: str, index: int, total: int, suffix: str = ""
+) -> list[InlineKeyboardButton]:
+    """
+    Builds the Previous/Next buttons of a list view for the given position.
+
+    Args:
+        prefix (str): The callback data prefix of the view, e.g. "savedjob".
+        index (int): The index of the item shown.
+        total (int): The number of items in the list.
+        suffix (str, optional): Extra callback data appended after the direction. Defaults to "".
+
+    Returns:
+        list[InlineKeyboardButton]: The buttons, empty if the list has a single item.
+    """
+
+    buttons = []
+    if index > 0:
+        buttons.append(
+            InlineKeyboardButton("Previous", callback_data=f"{prefix}_previous{suffix}")
+        )
+    if index < total - 1:
+        buttons.append(
+            InlineKeyboardButton("Next", callback_data=f"{prefix}_next{suffix}")
+        )
+    return buttons
+
+
+def _create_store() -> NavigationStore:
+    ttl = int(os.getenv("NAV_STATE_TTL", "3600"))
+    if os.getenv("NAV_STATE_BACKEND", "memory").lower() == "redis":
+        return NavigationStore(RedisNavigationBackend(ttl))
+    return NavigationStore(MemoryNavigationBackend(ttl))
+
+
+# Initialize navigation store
+navigation = _create_store()
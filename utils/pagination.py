@@ -0,0 +1,66 @@
+import datetime
+
+EPOCH = datetime.datetime(1970, 1, 1)
+AWARE_PREFIX = "u"
+
+
+def encode_cursor(created_at: datetime.datetime, row_id: int) -> str:
+    """
+    Encode a `(created_at, id)` keyset position into a short token for callback data.
+
+    The timestamp is stored as hex microseconds since the epoch so the token stays well below
+    Telegram's 64 byte callback data limit. Timezone-aware timestamps are normalised to UTC
+    and flagged so they decode back to aware datetimes.
+
+    Args:
+        created_at (datetime.datetime): The creation time of the row.
+        row_id (int): The primary key of the row, used as a tie breaker.
+
+    Returns:
+        str: The encoded cursor, e.g. "62f1c0d3a1b2c.1f".
+    """
+
+    prefix = ""
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        prefix = AWARE_PREFIX
+
+    micros = (created_at - EPOCH) // datetime.timedelta(microseconds=1)
+    return f"{prefix}{micros:x}.{row_id:x}"
+
+
+def decode_cursor(token: str) -> tuple[datetime.datetime, int]:
+    """
+    Decode a token produced by `encode_cursor`.
+
+    Args:
+        token (str): The encoded cursor.
+
+    Returns:
+        tuple[datetime.datetime, int]: The `(created_at, id)` keyset position.
+
+    Raises:
+        ValueError: If the token is malformed.
+    """
+
+    aware = token.startswith(AWARE_PREFIX)
+    if aware:
+        token = token[len(AWARE_PREFIX) :]
+
+    micros, _, row_id = token.partition(".")
+    if not micros or not row_id:
+        raise ValueError(f"Malformed cursor: {token!r}")
+
+    try:
+        created_at = EPOCH + datetime.timedelta(microseconds=int(micros, 16))
+    except OverflowError as e:
+        # Hex that decodes past datetime's range, e.g. a tampered button
+        raise ValueError(f"Malformed cursor: {token!r}") from e
+    if aware:
+        created_at = created_at.replace(tzinfo=datetime.timezone.utc)
+
+    row_id = int(row_id, 16)
+    # Past bigint, the keyset query itself would fail
+    if row_id >= 2**63:
+        raise ValueError(f"Malformed cursor: {token!r}")
+    return created_at, row_id
@@ -0,0 +1,169 @@
+import asyncio
+import logging
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from core.database.cache import redis_pool
+from utils.constants import CITIES
+from utils.db import execute_query_async
+
+logger = logging.getLogger(__name__)
+
+# Published to by whatever changes the categories table, e.g. the admin dashboard
+CATEGORIES_CHANNEL = "reference_data:categories"
+
+# Seconds to wait before resubscribing after the Redis connection drops
+RESUBSCRIBE_DELAY = 5
+
+
+def _two_columns(
+    buttons: list[InlineKeyboardButton],
+) -> list[list[InlineKeyboardButton]]:
+    return [buttons[i : i + 2] for i in range(0, len(buttons), 2)]
+
+
+def _choices(*labels: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        _two_columns(
+            [InlineKeyboardButton(label, callback_data=label) for label in labels]
+        )
+    )
+
+
+# Static keyboards, built once at import. Telegram objects are frozen, so handlers can share
+# them across updates.
+CITIES_KEYBOARD = InlineKeyboardMarkup(
+    _two_columns([InlineKeyboardButton(city, callback_data=city) for city in CITIES])
+    + [[InlineKeyboardButton("Others", callback_data="Others")]]
+)
+
+EDUCATION_KEYBOARD = _choices(
+    "Secondary School",
+    "Certificate",
+    "TVET",
+    "Diploma",
+    "Bachelors Degree",
+    "Masters Degree",
+    "Phd",
+    "Not Required",
+)
+
+EXPERIENCE_KEYBOARD = _choices(
+    "Entry", "Junior", "Intermediate", "Senior", "Expert", "Not Required"
+)
+
+GENDER_PREFERENCE_KEYBOARD = InlineKeyboardMarkup(
+    [
+        [
+            InlineKeyboardButton("Male", callback_data="Male"),
+            InlineKeyboardButton("Female", callback_data="Female"),
+        ],
+        [InlineKeyboardButton("Both", callback_data="Both")],
+    ]
+)
+
+
+class ReferenceData:
+    """
+    Reference data loaded from the database once and kept in memory, with its keyboards.
+
+    Categories are loaded at startup and reloaded whenever a message is published on
+    CATEGORIES_CHANNEL, so every bot replica picks up changes without a restart.
+    """
+
+    def __init__(self, client: Redis | None = None):
+        self.r = client or Redis(connection_pool=redis_pool)
+        self.categories: tuple = ()
+        self.category_keyboard: InlineKeyboardMarkup | None = None
+        self._listener: asyncio.Task | None = None
+
+    async def load_categories(self) -> None:
+        """
+        Loads the categories and builds the sector keyboard. Keeps the previous ones if the
+        query fails.
+        """
+
+        try:
+            categories = await execute_query_async(
+                "SELECT category_id, name FROM categories ORDER BY category_id"
+            )
+        except Exception as e:
+            logger.error("Failed to load categories, keeping the previous ones: %s", e)
+            return
+
+        self.categories = tuple(categories)
+        self.category_keyboard = InlineKeyboardMarkup(
+            _two_columns(
+                [
+                    InlineKeyboardButton(
+                        category["name"],
+                        callback_data=f"{category["name"]}_{category["category_id"]}",
+                    )
+                    for category in self.categories
+                ]
+            )
+        )
+        logger.info("Loaded %d categories", len(self.categories))
+
+    async def get_category_keyboard(self) -> InlineKeyboardMarkup:
+        """
+        Returns the sector keyboard, loading the categories first if they aren't loaded yet.
+
+        Returns:
+            InlineKeyboardMarkup: One button per category, in 2-column rows.
+        """
+
+        if self.category_keyboard is None:
+            await self.load_categories()
+        return self.category_keyboard or InlineKeyboardMarkup([])
+
+    async def notify_categories_changed(self) -> None:
+        """
+        Tells every running bot to reload the categories. Call this after changing them.
+        """
+
+        await self.r.publish(CATEGORIES_CHANNEL, "changed")
+
+    async def _listen(self) -> None:
+        reconnecting = False
+        while True:
+            try:
+                async with self.r.pubsub() as pubsub:
+                    await pubsub.subscribe(CATEGORIES_CHANNEL)
+                    if reconnecting:
+                        # Changes may have been published while we were disconnected
+                        await self.load_categories()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            await self.load_categories()
+            except RedisError as e:
+                logger.error("Reference data subscription failed: %s", e)
+            except Exception as e:
+                # Whatever failed, keep listening, or this replica never reloads again
+                logger.exception("Reference data listener failed: %s", e)
+            reconnecting = True
+            await asyncio.sleep(RESUBSCRIBE_DELAY)
+
+    async def start(self, application=None) -> None:
+        """
+        Loads the reference data and starts listening for changes. Usable as a
+        python-telegram-bot `post_init` callback.
+        """
+
+        await self.load_categories()
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self, application=None) -> None:
+        """
+        Stops listening for changes. Usable as a python-telegram-bot `post_shutdown` callback.
+        """
+
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+
+
+reference_data = ReferenceData()
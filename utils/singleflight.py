@@ -0,0 +1,42 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight call.
+
+    The first caller for a key starts the call, and everyone who asks for the same key while it
+    is still running awaits that call's result (or exception) instead of starting their own.
+    Once it finishes the key is forgotten, so later callers start a fresh call. The call runs
+    as its own task, so a caller that is cancelled does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Runs `fn` for `key`, or joins the call already in flight for it.
+
+        Args:
+            key (Hashable): Identifies the call, e.g. a job ID.
+            fn (Callable[[], Awaitable[Any]]): Starts the call when none is in flight.
+
+        Returns:
+            Any: The result of the (shared) call.
+        """
+
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        """
+        Returns the number of calls currently in flight.
+        """
+
+        return len(self._calls)